@@ -0,0 +1,192 @@
+"""
+audio_chunker.py
+----------------
+Cut a long recording into upload-sized chunks at pauses, streaming.
+
+1) ffmpeg decodes the source to 16 kHz mono 16-bit PCM on a pipe; blocks are read
+   straight into a fixed buffer one chunk long, so memory is a few chunks' worth
+   (buffer, the chunk being encoded) whatever the length of the recording.
+2) When the buffer holds --max-sec of audio (or the --target-mb size limit at
+   --bitrate, whichever is shorter), the cut goes at the quietest --pause-sec
+   stretch in its last --search-sec (frame RMS energy, as chunked_transcribe.py
+   does in memory), so chunks end in pauses instead of mid-word.
+3) Each chunk is encoded by a second ffmpeg in a background thread while decoding
+   goes on, and manifest.json records every chunk's exact start/end in the
+   source (sample counts, not encoded durations).
+
+batch_whisper.py reads the manifest to shift cue times; transcribe_diarize.py
+--manifest cuts at the same points in pipeline mode.
+
+USAGE:
+    python audio_chunker.py ../show.mp3 --out-dir ../chunks --prefix 2011
+    python audio_chunker.py show.mp3 --out-dir chunks --format mp3 --bitrate 48k --max-sec 900
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from chunked_transcribe import SAMPLE_RATE, frame_energy_db
+
+MANIFEST_NAME = "manifest.json"
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+# Lossy formats get -b:a; wav is written without ffmpeg
+CODEC_ARGS = {
+    "m4a": ["-c:a", "aac"],
+    "mp3": ["-c:a", "libmp3lame"],
+    "flac": ["-c:a", "flac"],
+}
+LOSSY = {"m4a", "mp3"}
+
+
+def parse_bitrate(bitrate: str) -> int:
+    """'64k' -> 64000 bits/s."""
+    b = bitrate.strip().lower()
+    return int(float(b[:-1]) * 1000) if b.endswith("k") else int(b)
+
+
+def max_chunk_sec(max_sec: float, target_mb: float, fmt: str, bitrate: str, sr: int = SAMPLE_RATE) -> float:
+    """Longest chunk that stays under both max_sec and target_mb once encoded (5% headroom;
+    flac is budgeted as uncompressed)."""
+    bytes_per_sec = parse_bitrate(bitrate) / 8 if fmt in LOSSY else sr * 2
+    return min(max_sec, target_mb * 1e6 * 0.95 / bytes_per_sec)
+
+
+def quietest_cut(samples: np.ndarray, pause_sec: float = 0.4, frame_sec: float = 0.03, sr: int = SAMPLE_RATE) -> int:
+    """Sample index at the centre of the quietest pause_sec-long stretch of samples."""
+    energy = frame_energy_db(samples.astype(np.float32) / 32768.0, frame_sec, sr)
+    width = max(1, min(len(energy), int(round(pause_sec / frame_sec))))
+    smoothed = np.convolve(energy, np.ones(width) / width, mode="same")
+    frame = max(1, int(sr * frame_sec))
+    return int(np.argmin(smoothed)) * frame + frame // 2
+
+
+def pcm_stream(path: str, sr: int = SAMPLE_RATE) -> subprocess.Popen:
+    """ffmpeg decoding path to mono s16le PCM on stdout."""
+    return subprocess.Popen([FFMPEG, "-nostdin", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(sr), "-"],
+                            stdout=subprocess.PIPE)
+
+
+def split_stream(stream, chunk_samples: int, search_samples: int, pause_sec: float = 0.4,
+                 sr: int = SAMPLE_RATE) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (start_sample, int16 samples) chunks of at most chunk_samples from a raw PCM
+    stream, each cut at the quietest point of its last search_samples."""
+    buf = np.empty(chunk_samples, dtype=np.int16)
+    raw = memoryview(buf).cast("B")
+    filled = 0   # bytes in buf (a read can end mid-sample)
+    pos = 0      # source sample index of buf[0]
+    while True:
+        while filled < len(raw):
+            n = stream.readinto(raw[filled:])
+            if not n:
+                break
+            filled += n
+        if filled < len(raw):
+            break
+        lo = chunk_samples - search_samples
+        cut = lo + quietest_cut(buf[lo:], pause_sec, sr=sr)
+        yield pos, buf[:cut].copy()
+        raw[:filled - cut * 2] = raw[cut * 2:filled].tobytes()
+        filled -= cut * 2
+        pos += cut
+    if filled >= 2:
+        yield pos, buf[:filled // 2].copy()
+
+
+def write_chunk(samples: np.ndarray, out_path: str, fmt: str, bitrate: str, sr: int = SAMPLE_RATE) -> None:
+    if fmt == "wav":
+        with wave.open(out_path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sr)
+            w.writeframes(memoryview(samples).cast("B"))
+        return
+    cmd = [FFMPEG, "-nostdin", "-v", "error", "-y", "-f", "s16le", "-ar", str(sr), "-ac", "1", "-i", "-",
+           *CODEC_ARGS[fmt], *(["-b:a", bitrate] if fmt in LOSSY else []), out_path]
+    subprocess.run(cmd, input=memoryview(samples).cast("B"), check=True)
+
+
+def chunk_file(source: str, out_dir: str, prefix: Optional[str] = None, fmt: str = "m4a", bitrate: str = "64k",
+               max_sec: float = 600.0, target_mb: float = 24.0, search_sec: float = 30.0,
+               pause_sec: float = 0.4, sr: int = SAMPLE_RATE) -> Dict:
+    """Chunk source into out_dir; returns the manifest (also written to out_dir/manifest.json)."""
+    os.makedirs(out_dir, exist_ok=True)
+    prefix = prefix or Path(source).stem
+    limit = max_chunk_sec(max_sec, target_mb, fmt, bitrate, sr)
+    chunk_samples = int(limit * sr)
+    search_samples = max(1, min(chunk_samples - 1, int(search_sec * sr)))
+    print(f"Chunking {source}: at most {limit:.0f}s per chunk, cut in the last {search_samples / sr:.0f}s")
+
+    t0 = time.perf_counter()
+    chunks: List[Dict] = []
+    proc = pcm_stream(source, sr)
+    encoding: Optional[Future] = None
+    with ThreadPoolExecutor(max_workers=1) as encoder:
+        for start, samples in split_stream(proc.stdout, chunk_samples, search_samples, pause_sec, sr):
+            name = f"{prefix}_{len(chunks):03d}.{fmt}"
+            if encoding is not None:
+                encoding.result()  # one chunk encoding at a time keeps memory bounded
+            encoding = encoder.submit(write_chunk, samples, os.path.join(out_dir, name), fmt, bitrate, sr)
+            chunks.append({"index": len(chunks), "file": name, "start": start / sr,
+                           "end": (start + len(samples)) / sr, "samples": len(samples)})
+            print(f"  {name}  {start / sr:8.2f}s - {(start + len(samples)) / sr:8.2f}s")
+        if encoding is not None:
+            encoding.result()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg could not decode {source} (exit {proc.returncode})")
+
+    manifest = {
+        "source": os.path.abspath(source),
+        "sample_rate": sr,
+        "duration": chunks[-1]["end"] if chunks else 0.0,
+        "format": fmt,
+        "chunks": chunks,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {len(chunks)} chunks and {MANIFEST_NAME} to {out_dir} in {time.perf_counter() - t0:.1f}s")
+    return manifest
+
+
+def load_manifest(path: str) -> Tuple[List[str], List[float]]:
+    """Chunk paths (resolved next to the manifest) and their start offsets, in order."""
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    chunks = sorted(manifest["chunks"], key=lambda c: c["index"])
+    return [os.path.join(base, c["file"]) for c in chunks], [float(c["start"]) for c in chunks]
+
+
+def manifest_cuts(path: str) -> List[float]:
+    """Interior cut points of a manifest (every chunk start but the first)."""
+    return load_manifest(path)[1][1:]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Split audio into upload-sized chunks at pauses and write a manifest.")
+    ap.add_argument("source", help="Audio/video file ffmpeg can decode")
+    ap.add_argument("--out-dir", required=True)
+    ap.add_argument("--prefix", default=None, help="Chunk file prefix (default: source file stem)")
+    ap.add_argument("--format", default="m4a", choices=["m4a", "mp3", "flac", "wav"])
+    ap.add_argument("--bitrate", default="64k", help="Bitrate for m4a/mp3")
+    ap.add_argument("--max-sec", type=float, default=600.0, help="Longest chunk in seconds")
+    ap.add_argument("--target-mb", type=float, default=24.0, help="Largest chunk in MB (OpenAI uploads are capped at 25 MB)")
+    ap.add_argument("--search-sec", type=float, default=30.0, help="Look this far back from the limit for a pause")
+    ap.add_argument("--pause-sec", type=float, default=0.4, help="Length of the quiet stretch to cut in")
+    args = ap.parse_args()
+
+    chunk_file(args.source, args.out_dir, args.prefix, args.format, args.bitrate,
+               args.max_sec, args.target_mb, args.search_sec, args.pause_sec)
+
+
+if __name__ == "__main__":
+    main()
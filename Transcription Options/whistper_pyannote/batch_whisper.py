@@ -1,5 +1,39 @@
-import os, glob, sys
-from openai import OpenAI
+"""
+batch_whisper.py
+----------------
+Send the 2011_*.m4a chunks to the OpenAI transcription endpoint and join the
+results into one transcript.
+
+- Chunks are uploaded from a bounded thread pool (--concurrency); wall time is
+  roughly the slowest requests instead of the sum of all of them.
+- Rate limits (429), timeouts, connection errors and 5xx responses are retried
+  with exponential backoff and full jitter (--max-retries).
+- Results are reassembled in chunk order. SRT/VTT cue times are shifted by each
+  chunk's true start and SRT cues are renumbered. Starts come from the
+  manifest.json audio_chunker.py writes next to its chunks; without one, from
+  i * --chunk-sec for fixed-length chunks or the sum of ffprobe durations.
+
+USAGE:
+    python batch_whisper.py --mode srt --concurrency 4
+    python batch_whisper.py --chunk-dir ../chunks --out-dir "../Other Transcripts" --mode text
+    python audio_chunker.py show.mp3 --out-dir ../chunks --prefix 2011 && python batch_whisper.py --mode srt
+    python batch_whisper.py --chunk-sec 600 --base-url http://127.0.0.1:8000/v1   # fixed-length chunks, other endpoint
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from audio_chunker import MANIFEST_NAME, load_manifest
 
 # If you keep your API key in .env, load it:
 try:
@@ -8,27 +42,22 @@ try:
 except Exception:
     pass
 
-client = OpenAI()  # uses OPENAI_API_KEY env var
-
-CHUNK_DIR = "/Users/mason/Desktop/Transcription Options/chunks"
-OUT_DIR   = "/Users/mason/Desktop/Transcription Options/Other Transcripts"
+HERE = Path(__file__).resolve().parent
+CHUNK_DIR = str(HERE.parent / "chunks")
+OUT_DIR   = str(HERE.parent / "Other Transcripts")
 MODE      = "srt"   # "text", "srt", "vtt", or "verbose_json"
 
-paths = sorted(glob.glob(os.path.join(CHUNK_DIR, "2011_*.m4a")))
-if not paths:
-    print("No chunks found. Check CHUNK_DIR pattern.")
-    sys.exit(1)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_CUE_TIME = re.compile(r"(\d{2}):(\d{2}):(\d{2})([,.])(\d{3})")
 
-full_txt = []
-srt_parts = []
-counter = 0
 
 def renumber_srt(srt_text, start_index):
     out = []
     idx = start_index
     for block in srt_text.strip().split("\n\n"):
         lines = block.splitlines()
-        if len(lines) < 2: 
+        if len(lines) < 2:
             continue
         # replace first line (index) with our running counter
         lines[0] = str(idx)
@@ -36,40 +65,162 @@ def renumber_srt(srt_text, start_index):
         idx += 1
     return "\n\n".join(out), idx
 
-for p in paths:
-    with open(p, "rb") as f:
-        resp = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=f,
-            response_format=MODE
-        )
-
-    if MODE == "text":
-        # Append to a big text file
-        full_txt.append(resp)
-    elif MODE == "srt":
-        part = resp  # already a string
-        part_renum, counter = renumber_srt(part, counter + 1)
-        srt_parts.append(part_renum)
-    elif MODE == "vtt":
-        # Simple concat is usually fine for VTT
-        srt_parts.append(resp)
+
+def shift_cue_times(text: str, offset: float) -> str:
+    """Add offset seconds to every HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (VTT) timestamp."""
+    offset_ms = int(round(offset * 1000))
+
+    def shift(m: re.Match) -> str:
+        ms = ((int(m.group(1)) * 60 + int(m.group(2))) * 60 + int(m.group(3))) * 1000 + int(m.group(5)) + offset_ms
+        h, ms = divmod(ms, 3600000)
+        mnt, ms = divmod(ms, 60000)
+        s, ms = divmod(ms, 1000)
+        return f"{h:02d}:{mnt:02d}:{s:02d}{m.group(4)}{ms:03d}"
+
+    return _CUE_TIME.sub(shift, text)
+
+
+def strip_vtt_header(vtt_text: str) -> str:
+    """Cue blocks of a WebVTT document, without the WEBVTT header block."""
+    text = vtt_text.strip()
+    if text.startswith("WEBVTT"):
+        text = text.split("\n\n", 1)[1] if "\n\n" in text else ""
+    return text.strip()
+
+
+def probe_duration(path: str) -> float:
+    out = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                          "-of", "default=noprint_wrappers=1:nokey=1", path],
+                         check=True, capture_output=True, text=True).stdout
+    return float(out.strip())
+
+
+def chunk_offsets(paths: List[str], chunk_sec: Optional[float] = None,
+                  duration_fn: Callable[[str], float] = probe_duration) -> List[float]:
+    """Start time of each chunk within the original recording."""
+    if chunk_sec:
+        return [i * chunk_sec for i in range(len(paths))]
+    offsets, t = [], 0.0
+    for p in paths:
+        offsets.append(t)
+        t += duration_fn(p)
+    return offsets
+
+
+def is_retryable(exc: Exception) -> bool:
+    import openai
+    if isinstance(exc, openai.APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code in RETRYABLE_STATUS
+
+
+def transcribe_chunk(client, path: str, mode: str, model: str = "whisper-1", retries: int = 5,
+                     base_delay: float = 1.0, max_delay: float = 30.0,
+                     sleep: Callable[[float], None] = time.sleep) -> Any:
+    """One transcription request, retried with exponential backoff and full jitter."""
+    attempt = 0
+    while True:
+        try:
+            with open(path, "rb") as f:
+                return client.audio.transcriptions.create(model=model, file=f, response_format=mode)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            print(f"  retry {attempt + 1}/{retries} for {os.path.basename(path)} in {delay:.1f}s: {type(e).__name__}\n", end="")
+            sleep(delay)
+            attempt += 1
+
+
+def transcribe_all(client, paths: List[str], mode: str, concurrency: int = 4, **kwargs) -> List[Any]:
+    """Transcribe every chunk from a bounded thread pool; results come back in chunk order."""
+    t0 = time.perf_counter()
+
+    def one(p: str):
+        t = time.perf_counter()
+        resp = transcribe_chunk(client, p, mode, **kwargs)
+        # one write per line so lines from different threads don't interleave
+        print(f"  {os.path.basename(p)} done in {time.perf_counter() - t:.1f}s\n", end="")
+        return resp
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(one, paths))
+    print(f"Transcribed {len(paths)} chunks in {time.perf_counter() - t0:.1f}s (concurrency {concurrency})")
+    return results
+
+
+def assemble(results: List[Any], offsets: List[float], mode: str) -> str:
+    """Join per-chunk responses in order, shifting cue times to the full recording."""
+    if mode == "text":
+        return "\n\n".join(results)
+    if mode == "srt":
+        parts = []
+        next_index = 1
+        for resp, offset in zip(results, offsets):
+            part, next_index = renumber_srt(shift_cue_times(resp, offset), next_index)
+            if part:
+                parts.append(part)
+        return "\n\n".join(parts) + "\n"
+    if mode == "vtt":
+        cues = [shift_cue_times(strip_vtt_header(resp), offset) for resp, offset in zip(results, offsets)]
+        return "WEBVTT\n\n" + "\n\n".join(c for c in cues if c) + "\n"
+    raise ValueError(f"Cannot assemble mode {mode!r}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Transcribe audio chunks with the OpenAI API and join them.")
+    ap.add_argument("--chunk-dir", default=CHUNK_DIR)
+    ap.add_argument("--pattern", default="2011_*.m4a", help="Chunk file glob inside --chunk-dir (sorted = playback order)")
+    ap.add_argument("--out-dir", default=OUT_DIR)
+    ap.add_argument("--out-name", default="2011_full", help="Base name of the joined output")
+    ap.add_argument("--mode", default=MODE, choices=["text", "srt", "vtt", "verbose_json"])
+    ap.add_argument("--model", default="whisper-1")
+    ap.add_argument("--concurrency", type=int, default=4, help="Chunks uploaded at once")
+    ap.add_argument("--max-retries", type=int, default=5, help="Retries per chunk on 429/5xx/timeouts")
+    ap.add_argument("--manifest", default=None,
+                    help=f"audio_chunker.py manifest listing chunks and offsets (default: --chunk-dir/{MANIFEST_NAME} if present)")
+    ap.add_argument("--chunk-sec", type=float, default=None,
+                    help="Fixed chunk length for cue offsets when there is no manifest (default: ffprobe each chunk)")
+    ap.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"), help="API base URL (e.g. a local stand-in)")
+    args = ap.parse_args()
+
+    manifest = args.manifest or os.path.join(args.chunk_dir, MANIFEST_NAME)
+    if os.path.exists(manifest):
+        paths, offsets = load_manifest(manifest)
+        print(f"Using {manifest}: {len(paths)} chunks")
+    else:
+        paths = sorted(glob.glob(os.path.join(args.chunk_dir, args.pattern)))
+        offsets = None
+    if not paths:
+        print("No chunks found. Check --chunk-dir / --pattern.")
+        sys.exit(1)
+    if offsets is None:
+        offsets = chunk_offsets(paths, args.chunk_sec) if args.mode in ("srt", "vtt") else [0.0] * len(paths)
+
+    from openai import OpenAI
+    # Retries are ours (with backoff across the whole pool), not the SDK's
+    client = OpenAI(base_url=args.base_url, max_retries=0)  # uses OPENAI_API_KEY env var
+
+    results = transcribe_all(client, paths, args.mode, concurrency=args.concurrency,
+                             model=args.model, retries=args.max_retries)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.mode == "verbose_json":
+        # one JSON per chunk
+        for p, resp in zip(paths, results):
+            base = os.path.splitext(os.path.basename(p))[0]
+            outp = os.path.join(args.out_dir, f"{base}.json")
+            with open(outp, "w", encoding="utf-8") as fo:
+                fo.write(resp.model_dump_json(indent=2) if hasattr(resp, "model_dump_json") else json.dumps(resp, indent=2))
     else:
-        # verbose_json – write one JSON per chunk
-        base = os.path.splitext(os.path.basename(p))[0]
-        outp = os.path.join(OUT_DIR, f"{base}.json")
+        ext = "txt" if args.mode == "text" else args.mode
+        outp = os.path.join(args.out_dir, f"{args.out_name}.{ext}")
         with open(outp, "w", encoding="utf-8") as fo:
-            fo.write(resp.model_dump_json(indent=2))
+            fo.write(assemble(results, offsets, args.mode))
+        print(f"Wrote {outp}")
 
-# Write combined outputs
-if MODE == "text" and full_txt:
-    with open(os.path.join(OUT_DIR, "2011_full.txt"), "w", encoding="utf-8") as fo:
-        fo.write("\n\n".join(full_txt))
+    print("Done.")
 
-if MODE in ("srt", "vtt") and srt_parts:
-    ext = MODE
-    with open(os.path.join(OUT_DIR, f"2011_full.{ext}"), "w", encoding="utf-8") as fo:
-        # For SRT we renumbered cues; for VTT this is just concatenation
-        fo.write("\n\n".join(srt_parts))
 
-print("Done.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+chunked_transcribe.py
+---------------------
+Parallel faster-whisper transcription of one long recording, used by
+transcribe_diarize.py --jobs N.
+
+1) The audio is decoded once (16 kHz mono float32) and cut at the quietest point
+   near every --chunk-sec boundary (frame RMS energy smoothed over a short pause
+   window, searched within +/- --search-sec), so cuts land in pauses, not words.
+2) Each chunk is padded with --overlap-sec of audio on both sides and sent to a
+   process pool; every worker loads the Whisper model once (pool initializer).
+3) Word timestamps are shifted back to absolute time and stitched: a word belongs
+   to the chunk whose core [cut_i, cut_i+1) contains its midpoint. The overlap only
+   gives the model context at the edges, so each word is kept exactly once.
+
+Returns plain tuples (start, end, text, [(w_start, w_end, w_text), ...]) so worker
+processes never import pyannote/torch. Workers are spawned, not forked: the caller
+runs pyannote (torch, OpenMP threads) alongside, and forking a process with live
+threads can deadlock the child.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+SegmentTuple = Tuple[float, float, str, List[Tuple[float, float, str]]]
+
+
+@dataclass
+class Chunk:
+    index: int
+    start: float       # audio slice sent to the model, including overlap
+    end: float
+    core_start: float  # words whose midpoint falls in [core_start, core_end) are kept
+    core_end: float
+
+
+def frame_energy_db(audio: np.ndarray, frame_sec: float = 0.03, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """RMS energy per frame, in dB."""
+    n = max(1, int(sr * frame_sec))
+    frames = len(audio) // n
+    x = audio[:frames * n].reshape(frames, n).astype(np.float32)
+    return 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+
+
+def silence_cut_points(audio: np.ndarray, chunk_sec: float = 120.0, search_sec: float = 15.0,
+                       pause_sec: float = 0.4, frame_sec: float = 0.03, sr: int = SAMPLE_RATE) -> List[float]:
+    """Cut times (seconds) roughly every chunk_sec, each at the quietest pause_sec-long
+    stretch within search_sec of the nominal boundary."""
+    energy = frame_energy_db(audio, frame_sec, sr)
+    width = max(1, int(round(pause_sec / frame_sec)))
+    smoothed = np.convolve(energy, np.ones(width) / width, mode="same")
+    duration = len(audio) / sr
+    cuts: List[float] = []
+    t = 0.0
+    while duration - t > chunk_sec + search_sec:
+        target = t + chunk_sec
+        lo = max(int((target - search_sec) / frame_sec), int(t / frame_sec) + 1)
+        hi = min(int((target + search_sec) / frame_sec), len(smoothed))
+        k = lo + int(np.argmin(smoothed[lo:hi]))
+        t = (k + 0.5) * frame_sec
+        cuts.append(t)
+    return cuts
+
+
+def plan_chunks(duration: float, cuts: List[float], overlap_sec: float) -> List[Chunk]:
+    bounds = [0.0] + list(cuts) + [duration]
+    chunks = []
+    for i in range(len(bounds) - 1):
+        core_end = bounds[i + 1] if i + 1 < len(bounds) - 1 else float("inf")
+        chunks.append(Chunk(i, max(0.0, bounds[i] - overlap_sec), min(duration, bounds[i + 1] + overlap_sec),
+                            bounds[i], core_end))
+    return chunks
+
+
+_MODEL = None
+_TRANSCRIBE_KWARGS: Dict[str, Any] = {}
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, cpu_threads: int, transcribe_kwargs: Dict[str, Any]):
+    global _MODEL
+    from faster_whisper import WhisperModel
+    _MODEL = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+    _TRANSCRIBE_KWARGS.update(transcribe_kwargs)
+
+
+def _transcribe_chunk(job: Tuple[Chunk, np.ndarray]) -> Tuple[Chunk, List[SegmentTuple], float]:
+    chunk, samples = job
+    t0 = time.perf_counter()
+    segments_iter, _info = _MODEL.transcribe(samples, word_timestamps=True, **_TRANSCRIBE_KWARGS)
+    out: List[SegmentTuple] = []
+    for seg in segments_iter:
+        words = [(chunk.start + float(w.start), chunk.start + float(w.end), w.word)
+                 for w in (seg.words or []) if w.start is not None and w.end is not None]
+        out.append((chunk.start + float(seg.start), chunk.start + float(seg.end), seg.text.strip(), words))
+    return chunk, out, time.perf_counter() - t0
+
+
+def stitch(results: List[Tuple[Chunk, List[SegmentTuple]]]) -> List[SegmentTuple]:
+    """Keep each word (and each word-less segment) only in the chunk whose core holds its midpoint."""
+    merged: List[SegmentTuple] = []
+    for chunk, segments in results:
+        def owned(s: float, e: float) -> bool:
+            return chunk.core_start <= (s + e) / 2.0 < chunk.core_end
+
+        for start, end, text, words in segments:
+            if not words:
+                if owned(start, end):
+                    merged.append((start, end, text, words))
+                continue
+            kept = [w for w in words if owned(w[0], w[1])]
+            if not kept:
+                continue
+            if len(kept) == len(words):
+                merged.append((start, end, text, words))
+            else:
+                merged.append((kept[0][0], kept[-1][1], "".join(w[2] for w in kept).strip(), kept))
+    merged.sort(key=lambda s: s[0])
+    return merged
+
+
+def transcribe_chunked(audio: np.ndarray, model_size: str, device: str, compute_type: str,
+                       jobs: int, threads_per_job: Optional[int] = None,
+                       chunk_sec: float = 120.0, overlap_sec: float = 2.0, search_sec: float = 15.0,
+                       transcribe_kwargs: Optional[Dict[str, Any]] = None,
+                       cuts: Optional[List[float]] = None) -> List[SegmentTuple]:
+    """Transcribe 16 kHz mono audio across `jobs` worker processes; returns stitched segments.
+    `cuts` overrides the silence search (e.g. an audio_chunker.py manifest's chunk starts)."""
+    duration = len(audio) / SAMPLE_RATE
+    if cuts is None:
+        cuts = silence_cut_points(audio, chunk_sec, search_sec)
+    chunks = plan_chunks(duration, [c for c in cuts if 0.0 < c < duration], overlap_sec)
+    if threads_per_job is None:
+        threads_per_job = max(1, (os.cpu_count() or 1) // max(1, jobs))
+    print(f"Split {duration / 60:.1f} min into {len(chunks)} chunks; {jobs} workers x {threads_per_job} threads")
+
+    work = [(c, audio[int(c.start * SAMPLE_RATE):int(c.end * SAMPLE_RATE)]) for c in chunks]
+    results: List[Tuple[Chunk, List[SegmentTuple]]] = []
+    with ProcessPoolExecutor(max_workers=max(1, jobs), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(model_size, device, compute_type, threads_per_job, transcribe_kwargs or {})) as pool:
+        for chunk, segments, secs in pool.map(_transcribe_chunk, work):
+            n_words = sum(len(s[3]) for s in segments)
+            print(f"  chunk {chunk.index + 1}/{len(chunks)} [{chunk.core_start:.1f}s-{min(chunk.core_end, duration):.1f}s] "
+                  f"{n_words} words in {secs:.1f}s")
+            results.append((chunk, segments))
+    return stitch(results)
@@ -0,0 +1,138 @@
+"""
+speaker_assign.py
+-----------------
+Speaker per Whisper segment from a pyannote diarization, used by
+transcribe_diarize.py. Needs only NumPy: the diarization is read through
+itertracks(), so this module (and benchmarks/bench_speaker_assign.py) never
+imports faster-whisper, pyannote.audio or torch.
+
+- diarization_arrays() flattens the diarization once into start/end/speaker arrays
+  plus a running max of turn ends;
+- speaker_overlaps() gives every span's overlap with every speaker in one
+  searchsorted pass, visiting only the turns that can touch each span;
+- assign_segment_speakers() takes the majority speaker over each segment's word
+  midpoints (+/- 50 ms), or over the whole span for segments without words.
+
+pick_speaker_for_span() is the original per-span scan over every track (needs
+pyannote.core), kept as the reference the vectorized path must match.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+
+@dataclass
+class Word:
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class Segment:
+    start: float
+    end: float
+    text: str
+    words: List[Word]
+
+
+def pick_speaker_for_span(diarization, t0: float, t1: float) -> str:
+    """Choose the speaker label with the most overlap over [t0, t1]."""
+    from pyannote.core import Segment as PSeg
+    window = PSeg(t0, t1)
+    overlaps = {}
+    for turn, _, speaker in diarization.itertracks(yield_label=True):
+        ov = turn & window
+        if ov is not None:
+            dur = ov.duration
+            overlaps[speaker] = overlaps.get(speaker, 0.0) + dur
+    if not overlaps:
+        return "SPK?"
+    label = max(overlaps, key=overlaps.get)
+    return str(label)
+
+
+# pyannote treats a Segment no longer than this as empty (pyannote.core.segment.SEGMENT_PRECISION)
+SEGMENT_PRECISION = 1e-6
+
+
+@dataclass
+class SpeakerTurns:
+    """A diarization flattened once into arrays, in itertracks order."""
+    start: np.ndarray
+    end: np.ndarray
+    speaker: np.ndarray        # index into labels
+    labels: List[str]          # in order of first appearance
+    reach: np.ndarray          # running max of end: no turn before i ends after reach[i]
+
+
+def diarization_arrays(diarization) -> SpeakerTurns:
+    starts, ends, speakers, labels, ids = [], [], [], [], {}
+    for turn, _, speaker in diarization.itertracks(yield_label=True):
+        starts.append(turn.start)
+        ends.append(turn.end)
+        if speaker not in ids:
+            ids[speaker] = len(labels)
+            labels.append(str(speaker))
+        speakers.append(ids[speaker])
+    end = np.array(ends, dtype=np.float64)
+    return SpeakerTurns(np.array(starts, dtype=np.float64), end, np.array(speakers, dtype=np.int64),
+                        labels, np.maximum.accumulate(end) if len(end) else end)
+
+
+def speaker_overlaps(turns: SpeakerTurns, t0: np.ndarray, t1: np.ndarray) -> np.ndarray:
+    """(spans x speakers) total overlap of each [t0, t1] with each speaker's turns.
+
+    Only turns that can touch a span are visited: turns are in start order, so the
+    candidates for [a, b] are those from the first whose running max end passes a up
+    to the last starting before b. Per-turn overlaps follow pyannote's Segment
+    intersection (empty below SEGMENT_PRECISION) and are summed in itertracks order,
+    so totals equal pick_speaker_for_span's bit for bit.
+    """
+    t0 = np.asarray(t0, dtype=np.float64)
+    t1 = np.asarray(t1, dtype=np.float64)
+    totals = np.zeros((len(t0), len(turns.labels)), dtype=np.float64)
+    if not len(turns.start) or not len(t0):
+        return totals
+    lo = np.searchsorted(turns.reach, t0, side="right")
+    hi = np.searchsorted(turns.start, t1, side="left")
+    counts = np.maximum(hi - lo, 0)
+    span = np.repeat(np.arange(len(t0)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    turn = np.repeat(lo, counts) + offsets
+    ov = np.minimum(turns.end[turn], t1[span]) - np.maximum(turns.start[turn], t0[span])
+    keep = ov > SEGMENT_PRECISION
+    np.add.at(totals, (span[keep], turns.speaker[turn[keep]]), ov[keep])
+    return totals
+
+
+def pick_speakers_for_spans(turns: SpeakerTurns, t0: np.ndarray, t1: np.ndarray) -> List[str]:
+    """pick_speaker_for_span for many spans at once. As there, every speaker is a
+    candidate even with zero overlap, and ties go to the speaker seen first."""
+    if not turns.labels:
+        return ["SPK?"] * len(t0)
+    best = np.argmax(speaker_overlaps(turns, t0, t1), axis=1)
+    return [turns.labels[k] for k in best.tolist()]
+
+
+def assign_segment_speakers(segments: List[Segment], diarization) -> List[str]:
+    """Speaker per Whisper segment: majority vote over its words' midpoints (+/- 50 ms),
+    ties to the speaker voted first; segments without words use their whole span.
+    One vectorized pass over all words; same answers as the per-word loop in main()."""
+    turns = diarization_arrays(diarization)
+    mids = np.array([(w.start + w.end) / 2.0 for seg in segments for w in seg.words], dtype=np.float64)
+    word_spk = pick_speakers_for_spans(turns, mids - 0.05, mids + 0.05)
+    wordless = [i for i, seg in enumerate(segments) if not seg.words]
+    span_spk = pick_speakers_for_spans(turns, np.array([segments[i].start for i in wordless], dtype=np.float64),
+                                       np.array([segments[i].end for i in wordless], dtype=np.float64))
+    out = dict(zip(wordless, span_spk))
+    k = 0
+    for i, seg in enumerate(segments):
+        if seg.words:
+            votes = Counter(word_spk[k:k + len(seg.words)])
+            out[i] = votes.most_common(1)[0][0]
+            k += len(seg.words)
+    return [out[i] for i in range(len(segments))]
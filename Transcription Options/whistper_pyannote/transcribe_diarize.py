@@ -1,34 +1,17 @@
 import os
 import math
+import time
 from pathlib import Path
 from typing import List, Tuple
 
-# Transcription
-from faster_whisper import WhisperModel
-
-# Diarization
-from pyannote.audio import Pipeline
-
-# Utilities
-from dataclasses import dataclass
+# faster_whisper and pyannote.audio (torch) are imported where they are used: --jobs
+# workers are spawned and re-import this module, and must not load torch.
 
 from dotenv import load_dotenv
-load_dotenv()  # take environment variables from .env.
-
 
-@dataclass
-class Word:
-    start: float
-    end: float
-    text: str
+from speaker_assign import Segment, Word, assign_segment_speakers
 
-
-@dataclass
-class Segment:
-    start: float
-    end: float
-    text: str
-    words: List[Word]
+load_dotenv()  # take environment variables from .env.
 
 
 def sec_to_srt_time(t: float) -> str:
@@ -40,20 +23,19 @@ def sec_to_srt_time(t: float) -> str:
     return f"{hours:02d}:{mins:02d}:{secs:02d},{ms:03d}"
 
 
-def pick_speaker_for_span(diarization, t0: float, t1: float) -> str:
-    """Choose the speaker label with the most overlap over [t0, t1]."""
-    from pyannote.core import Segment as PSeg
-    window = PSeg(t0, t1)
-    overlaps = {}
-    for turn, _, speaker in diarization.itertracks(yield_label=True):
-        ov = turn & window
-        if ov is not None:
-            dur = ov.duration
-            overlaps[speaker] = overlaps.get(speaker, 0.0) + dur
-    if not overlaps:
-        return "SPK?"
-    label = max(overlaps, key=overlaps.get)
-    return str(label)
+def diarize(hf_token: str, audio):
+    """Run pyannote speaker diarization on a file path or an in-memory waveform dict."""
+    from pyannote.audio import Pipeline
+    print("Loading pyannote pipeline (speaker diarization)...")
+    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=hf_token)
+    print("Running diarization...")
+    return pipeline(audio)
+
+
+def waveform_input(audio) -> dict:
+    """pyannote input for already-decoded 16 kHz mono samples (skips decoding the file twice)."""
+    import torch
+    return {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": 16000}
 
 
 def merge_contiguous_by_speaker(lines: List[Tuple[str, float, float, str]], max_gap: float = 0.6) -> List[Tuple[str, float, float, str]]:
@@ -84,6 +66,14 @@ def main():
     parser.add_argument("--language", default=None, help="Language hint, e.g., 'en'.")
     parser.add_argument("--beam-size", type=int, default=5)
     parser.add_argument("--vad-filter", action="store_true", help="Enable VAD filtering in faster-whisper.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Pipeline mode if > 1: split at silences and transcribe chunks in N worker processes "
+                             "while diarization runs alongside (see chunked_transcribe.py)")
+    parser.add_argument("--chunk-sec", type=float, default=120.0, help="Pipeline mode: target chunk length")
+    parser.add_argument("--overlap-sec", type=float, default=2.0, help="Pipeline mode: audio shared by neighbouring chunks")
+    parser.add_argument("--threads-per-job", type=int, default=None, help="Pipeline mode: CPU threads per worker (default: cores / jobs)")
+    parser.add_argument("--manifest", default=None,
+                        help="Pipeline mode: cut at the chunk boundaries of an audio_chunker.py manifest.json instead of searching")
     args = parser.parse_args()
 
     audio_path = Path(args.audio)
@@ -93,55 +83,68 @@ def main():
     out_base = Path(args.output) if args.output else audio_path.with_suffix("")
     out_base.parent.mkdir(parents=True, exist_ok=True)
 
-    # 1) Transcribe with faster-whisper
-    print("Loading Whisper model...")
     # Favor int8 on CPU for speed/memory; float16 on GPU
     compute_type = "int8" if args.device == "cpu" else "float16"
-    model = WhisperModel(args.model, device=args.device, compute_type=compute_type)
-
-    print("Transcribing...")
-    segments_iter, info = model.transcribe(
-        str(audio_path),
-        beam_size=args.beam_size,
-        language=args.language,
-        vad_filter=args.vad_filter,
-        word_timestamps=True,
-    )
-
-    w_segments: List[Segment] = []
-    for seg in segments_iter:
-        words: List[Word] = []
-        if seg.words:
-            for w in seg.words:
-                if w.start is not None and w.end is not None:
-                    words.append(Word(start=float(w.start), end=float(w.end), text=w.word))
-        w_segments.append(Segment(start=float(seg.start), end=float(seg.end), text=seg.text.strip(), words=words))
-
-    # 2) Diarize with pyannote
-    print("Loading pyannote pipeline (speaker diarization)...")
     hf_token = args.hf_token or os.environ.get("HF_TOKEN")
     if not hf_token:
         raise RuntimeError("No Hugging Face token provided. Use --hf-token or set HF_TOKEN in your .env.")
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=hf_token)
 
-    print("Running diarization...")
-    diarization = pipeline(str(audio_path))
+    if args.jobs > 1:
+        # Pipeline mode: decode once, diarize in a background thread while chunks transcribe in worker processes
+        from concurrent.futures import ThreadPoolExecutor
+        from faster_whisper import decode_audio
+        from chunked_transcribe import SAMPLE_RATE, transcribe_chunked
+        from audio_chunker import manifest_cuts
+
+        t0 = time.perf_counter()
+        audio = decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+        with ThreadPoolExecutor(max_workers=1) as diarize_pool:
+            diarize_future = diarize_pool.submit(diarize, hf_token, waveform_input(audio))
+            print("Transcribing (chunked)...")
+            stitched = transcribe_chunked(
+                audio, args.model, args.device, compute_type, args.jobs, args.threads_per_job,
+                chunk_sec=args.chunk_sec, overlap_sec=args.overlap_sec,
+                transcribe_kwargs=dict(beam_size=args.beam_size, language=args.language, vad_filter=args.vad_filter),
+                cuts=manifest_cuts(args.manifest) if args.manifest else None,
+            )
+            print(f"Transcription done in {time.perf_counter() - t0:.1f}s; waiting for diarization...")
+            diarization = diarize_future.result()
+        print(f"Transcription + diarization: {time.perf_counter() - t0:.1f}s for {len(audio) / SAMPLE_RATE / 60:.1f} min of audio")
+        w_segments = [Segment(start=s, end=e, text=text, words=[Word(start=ws, end=we, text=wt) for ws, we, wt in words])
+                      for s, e, text, words in stitched]
+    else:
+        # 1) Transcribe with faster-whisper
+        from faster_whisper import WhisperModel
+        print("Loading Whisper model...")
+        model = WhisperModel(args.model, device=args.device, compute_type=compute_type)
+
+        print("Transcribing...")
+        segments_iter, info = model.transcribe(
+            str(audio_path),
+            beam_size=args.beam_size,
+            language=args.language,
+            vad_filter=args.vad_filter,
+            word_timestamps=True,
+        )
+
+        w_segments: List[Segment] = []
+        for seg in segments_iter:
+            words: List[Word] = []
+            if seg.words:
+                for w in seg.words:
+                    if w.start is not None and w.end is not None:
+                        words.append(Word(start=float(w.start), end=float(w.end), text=w.word))
+            w_segments.append(Segment(start=float(seg.start), end=float(seg.end), text=seg.text.strip(), words=words))
+
+        # 2) Diarize with pyannote
+        diarization = diarize(hf_token, str(audio_path))
 
     # 3) Assign a speaker to each Whisper segment (use overlap majority)
     print("Assigning speakers to segments...")
-    spk_lines: List[Tuple[str, float, float, str]] = []
-    for seg in w_segments:
-        if seg.words:
-            from collections import Counter
-            votes = Counter()
-            for w in seg.words:
-                mid = (w.start + w.end) / 2.0
-                spk = pick_speaker_for_span(diarization, mid - 0.05, mid + 0.05)
-                votes[spk] += 1
-            speaker = votes.most_common(1)[0][0] if votes else pick_speaker_for_span(diarization, seg.start, seg.end)
-        else:
-            speaker = pick_speaker_for_span(diarization, seg.start, seg.end)
-        spk_lines.append((speaker, seg.start, seg.end, seg.text))
+    spk_lines: List[Tuple[str, float, float, str]] = [
+        (speaker, seg.start, seg.end, seg.text)
+        for speaker, seg in zip(assign_segment_speakers(w_segments, diarization), w_segments)
+    ]
 
     # Normalize speaker labels to SPK00, SPK01, ... in order of first appearance
     spk_map = {}
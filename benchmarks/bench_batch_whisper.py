@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+bench_batch_whisper.py
+----------------------
+batch_whisper.py against a local stub of the OpenAI transcription endpoint (no
+API key or network needed). The stub answers POST /v1/audio/transcriptions after
+--latency seconds with SRT/VTT whose times start at 0 in every chunk, and fails
+the first attempt of every third chunk with a 429 or a 500.
+
+Runs the chunks sequentially and with --concurrency N, checks both produce the
+same joined transcript, with cues in chunk order, numbered 1..n and shifted by
+each chunk's start, and reports the speedup. Needs the openai package.
+
+USAGE:
+    python benchmarks/bench_batch_whisper.py
+    python benchmarks/bench_batch_whisper.py --chunks 12 --concurrency 6 --latency 0.5
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Transcription Options" / "whistper_pyannote"))
+
+from batch_whisper import assemble, chunk_offsets, transcribe_all  # noqa: E402
+
+CUES_PER_CHUNK = 5
+
+def cue_time(sec: float, sep: str) -> str:
+    ms = int(round(sec * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{sep}{ms % 1000:03d}"
+
+def fake_response(name: str, fmt: str) -> str:
+    """CUES_PER_CHUNK cues, 2 s apart, timed from the start of the chunk (numbered in SRT,
+    no cue identifiers in VTT, like the real endpoint)."""
+    if fmt == "vtt":
+        blocks = [f"{cue_time(2 * i, '.')} --> {cue_time(2 * i + 1.5, '.')}\n{name} cue {i}" for i in range(CUES_PER_CHUNK)]
+        return "WEBVTT\n\n" + "\n\n".join(blocks) + "\n"
+    blocks = [f"{i + 1}\n{cue_time(2 * i, ',')} --> {cue_time(2 * i + 1.5, ',')}\n{name} cue {i}" for i in range(CUES_PER_CHUNK)]
+    return "\n\n".join(blocks) + "\n"
+
+class StubAPI(BaseHTTPRequestHandler):
+    latency = 0.0
+    attempts: dict = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        name = re.search(rb'filename="([^"]+)"', body).group(1).decode()
+        fmt = re.search(rb'name="response_format"\r\n\r\n(\w+)', body).group(1).decode()
+        with self.lock:
+            attempt = self.attempts[name] = self.attempts.get(name, 0) + 1
+        time.sleep(self.latency)
+        index = int(re.search(r"_(\d+)\.", name).group(1))
+        if attempt == 1 and index % 3 == 1:
+            self.send_response(429 if index % 2 else 500)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "stub failure", "type": "server_error"}}')
+            return
+        out = fake_response(name, fmt).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+def check(joined: str, mode: str, n_chunks: int, chunk_sec: float) -> None:
+    blocks = joined.strip().split("\n\n")
+    if mode == "vtt":
+        assert blocks.pop(0) == "WEBVTT", "missing single WEBVTT header"
+        assert "WEBVTT" not in joined[6:], "repeated WEBVTT header"
+    assert len(blocks) == n_chunks * CUES_PER_CHUNK, f"{len(blocks)} cues"
+    sep = "," if mode == "srt" else "."
+    for k, block in enumerate(blocks):
+        lines = block.split("\n")
+        if mode == "srt":
+            assert lines.pop(0) == str(k + 1), f"cue {k + 1} misnumbered"
+        times, text = lines
+        chunk, cue = divmod(k, CUES_PER_CHUNK)
+        assert text == f"2011_{chunk:03d}.m4a cue {cue}", f"cue {k + 1} out of order: {text}"
+        start = chunk * chunk_sec + 2 * cue
+        assert times == f"{cue_time(start, sep)} --> {cue_time(start + 1.5, sep)}", f"cue {k + 1} at {times}"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.3, help="Seconds the stub takes per request")
+    ap.add_argument("--chunk-sec", type=float, default=600.0)
+    args = ap.parse_args()
+
+    from openai import OpenAI
+
+    StubAPI.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OpenAI(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="stub", max_retries=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.chunks):
+            p = Path(tmp) / f"2011_{i:03d}.m4a"
+            p.write_bytes(b"\0" * 1024)
+            paths.append(str(p))
+        offsets = chunk_offsets(paths, args.chunk_sec)
+
+        failed = False
+        for mode in ("srt", "vtt"):
+            timings, joined = {}, {}
+            for concurrency in (1, args.concurrency):
+                StubAPI.attempts.clear()
+                t0 = time.perf_counter()
+                results = transcribe_all(client, paths, mode, concurrency=concurrency,
+                                         retries=3, base_delay=0.05, max_delay=0.2)
+                timings[concurrency] = time.perf_counter() - t0
+                joined[concurrency] = assemble(results, offsets, mode)
+                check(joined[concurrency], mode, args.chunks, args.chunk_sec)
+            retried = sum(n > 1 for n in StubAPI.attempts.values())
+            same = joined[1] == joined[args.concurrency]
+            failed |= not same
+            print(f"{mode}: sequential {timings[1]:6.2f}s, concurrency {args.concurrency} "
+                  f"{timings[args.concurrency]:6.2f}s ({timings[1] / timings[args.concurrency]:.1f}x), "
+                  f"{retried} chunks retried, identical output: {same}")
+    server.shutdown()
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+bench_cache.py
+--------------
+Time parsing the Transcribe JSONs in outputs/ against loading them back from a
+fresh transcript cache (transcript_cache.py), and check the loaded tables match.
+
+USAGE:
+    python benchmarks/bench_cache.py
+    python benchmarks/bench_cache.py --repeat 5
+"""
+
+import argparse
+import glob
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from transcript_cache import TranscriptCache, load_transcript, parse_transcript  # noqa: E402
+
+def same(a, b) -> bool:
+    (ta, sa), (tb, sb) = a, b
+    cols = [(ta.start, tb.start), (ta.end, tb.end), (ta.conf, tb.conf), (ta.token, tb.token),
+            (ta.is_word, tb.is_word), (sa.start, sb.start), (sa.end, sb.end), (sa.speaker, sb.speaker)]
+    return (all(np.array_equal(x, y, equal_nan=True) for x, y in cols)
+            and ta.vocab == tb.vocab and sa.labels == sb.labels)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--glob", default=str(ROOT / "outputs" / "*.json"))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(args.glob))
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(tmp)
+        t0 = time.perf_counter()
+        parsed = [load_transcript(p, cache=cache) for p in paths]  # cold: parse + write
+        t_cold = time.perf_counter() - t0
+
+        t_parse = t_warm = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for p in paths:
+                parse_transcript(p)
+            t_parse = min(t_parse, time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            loaded = [load_transcript(p, cache=cache) for p in paths]
+            t_warm = min(t_warm, time.perf_counter() - t0)
+
+        mismatches = sum(not same(a, b) for a, b in zip(parsed, loaded))
+        size = sum(s for _, _, s in cache.entries())
+
+    print(f"{len(paths)} files, cache {size / (1 << 20):.1f} MiB")
+    print(f"parse JSON:         {t_parse:7.3f}s")
+    print(f"cold (parse+write): {t_cold:7.3f}s")
+    print(f"warm (hash+mmap):   {t_warm:7.3f}s   ({t_parse / max(t_warm, 1e-9):.1f}x faster than parsing)")
+    print(f"mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
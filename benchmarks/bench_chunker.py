@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+bench_chunker.py
+----------------
+audio_chunker.py on a real recording: writes wav chunks (lossless, so the check is
+exact), then verifies the chunks laid end to end are the decoded source sample for
+sample and that the manifest offsets match, compares the loudness at the chosen
+cuts with cuts at fixed multiples of --max-sec, and reports peak Python/NumPy
+memory (tracemalloc) against holding the whole decoded file. Needs ffmpeg (or
+FFMPEG=/path/to/ffmpeg).
+
+USAGE:
+    python benchmarks/bench_chunker.py
+    python benchmarks/bench_chunker.py --audio show.mp3 --max-sec 600 --search-sec 30
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Transcription Options" / "whistper_pyannote"))
+
+from audio_chunker import SAMPLE_RATE, chunk_file, load_manifest, pcm_stream  # noqa: E402
+from chunked_transcribe import frame_energy_db  # noqa: E402
+
+def decode_all(path: str) -> np.ndarray:
+    proc = pcm_stream(path)
+    data = proc.stdout.read()
+    proc.wait()
+    return np.frombuffer(data, dtype=np.int16)
+
+def pause_db(audio: np.ndarray, t: float, half: float = 0.2) -> float:
+    """Loudness (dB) of the 0.4 s around t."""
+    a = audio[max(0, int((t - half) * SAMPLE_RATE)):int((t + half) * SAMPLE_RATE)]
+    return float(frame_energy_db(a.astype(np.float32) / 32768.0).mean())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--audio", default=str(ROOT / "Transcription Options" / "chunks" / "2011_000.m4a"))
+    ap.add_argument("--max-sec", type=float, default=60.0)
+    ap.add_argument("--search-sec", type=float, default=10.0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        manifest = chunk_file(args.audio, tmp, "bench", "wav", max_sec=args.max_sec, search_sec=args.search_sec)
+        secs = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        paths, offsets = load_manifest(str(Path(tmp) / "manifest.json"))
+        parts = []
+        for p in paths:
+            with wave.open(p, "rb") as w:
+                parts.append(np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16))
+
+    source = decode_all(args.audio)
+    joined = np.concatenate(parts)
+    starts = np.cumsum([0] + [len(p) for p in parts[:-1]]) / SAMPLE_RATE
+    exact = np.array_equal(joined, source)
+    offsets_ok = np.allclose(starts, offsets)
+    longest = max(len(p) for p in parts) / SAMPLE_RATE
+
+    cuts = offsets[1:]
+    fixed = list(np.arange(1, len(cuts) + 1) * args.max_sec)
+    print(f"{args.audio}: {len(source) / SAMPLE_RATE / 60:.1f} min -> {len(paths)} chunks in {secs:.1f}s, longest {longest:.1f}s")
+    print(f"samples identical to source: {exact}, manifest offsets match: {offsets_ok}")
+    if cuts:
+        print(f"loudness at cuts: silence-aware {np.mean([pause_db(source, t) for t in cuts]):6.1f} dB, "
+              f"fixed {np.mean([pause_db(source, t) for t in fixed]):6.1f} dB")
+    print(f"peak traced memory {peak / (1 << 20):.1f} MiB vs {source.nbytes / (1 << 20):.1f} MiB for the whole decoded file")
+    if not (exact and offsets_ok and longest <= args.max_sec):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
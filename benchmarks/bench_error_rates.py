@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_error_rates.py
+--------------------
+error_rates.py against what the comparison notebook uses, on the 2011 control
+transcript and each file in 'Other Transcripts':
+- WER from difflib.SequenceMatcher opcodes (the notebook's analyze_error_types),
+  which is fast but not a minimum edit count, so it over-reports errors;
+- the notebook's pure-Python two-row Levenshtein, timed on the first
+  --prefix-words words (the full hour takes minutes) and used as ground truth;
+- error_rates.align (exact alignment + S/I/D) and edit_distance (bit-parallel).
+Also times CER, which the notebook skips (NaN) above 10M character pairs.
+
+USAGE:
+    python benchmarks/bench_error_rates.py
+    python benchmarks/bench_error_rates.py --prefix-words 3000
+"""
+
+import argparse
+import difflib
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from error_rates import (  # noqa: E402
+    CONTROL, OTHER, align, char_error_rate, clean_transcript_text, edit_distance, encode, read_transcript,
+)
+
+def difflib_errors(ref, hyp) -> int:
+    errors = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, ref, hyp).get_opcodes():
+        if tag == "replace":
+            errors += max(i2 - i1, j2 - j1)
+        elif tag == "delete":
+            errors += i2 - i1
+        elif tag == "insert":
+            errors += j2 - j1
+    return errors
+
+def python_levenshtein(seq1, seq2) -> int:
+    """The notebook's _levenshtein_distance."""
+    len1, len2 = len(seq1), len(seq2)
+    if len1 == 0:
+        return len2
+    if len2 == 0:
+        return len1
+    prev = list(range(len2 + 1))
+    curr = [0] * (len2 + 1)
+    for i in range(1, len1 + 1):
+        curr[0] = i
+        for j in range(1, len2 + 1):
+            cost = 0 if seq1[i - 1] == seq2[j - 1] else 1
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost)
+        prev, curr = curr, prev
+    return prev[len2]
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--prefix-words", type=int, default=1500, help="Words per side for the pure-Python check")
+    args = ap.parse_args()
+
+    ref_text = clean_transcript_text(read_transcript(CONTROL))
+    ref = ref_text.split()
+    print(f"control: {len(ref)} words, {len(ref_text)} chars")
+    print(f"{'file':24s} {'difflib':>15s} {'align':>15s} {'bit-parallel':>15s} {'CER':>13s} "
+          f"{'prefix: python':>20s} {'align':>9s}")
+    bad = 0
+    for path in sorted(p for p in OTHER.iterdir() if p.suffix in (".txt", ".srt", ".json")):
+        hyp_text = clean_transcript_text(read_transcript(path))
+        hyp = hyp_text.split()
+        d_err, t_difflib = timed(difflib_errors, ref, hyp)
+        a, t_align = timed(align, ref, hyp)
+        r, h = encode(ref, hyp)
+        dist, t_bits = timed(edit_distance, r, h)
+        cer, t_cer = timed(char_error_rate, ref_text, hyp_text)
+
+        k = args.prefix_words
+        py_dist, t_py = timed(python_levenshtein, ref[:k], hyp[:k])
+        pa, t_pa = timed(align, ref[:k], hyp[:k])
+        bad += (a.errors != dist) + (pa.errors != py_dist)
+        print(f"{path.name:24s} {d_err / len(ref):6.3f} {t_difflib:6.2f}s  {a.wer:6.3f} {t_align:6.2f}s  "
+              f"{dist / len(ref):6.3f} {t_bits:6.2f}s  {cer:5.3f} {t_cer:5.2f}s  "
+              f"{py_dist:5d} {t_py:6.2f}s  {pa.errors:5d} {t_pa:5.2f}s")
+    print(f"(WER, seconds; prefix columns are edit counts on the first {args.prefix_words} words of each side)")
+    print(f"disagreements with the exact distance: {bad}")
+    if bad:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
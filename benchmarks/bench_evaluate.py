@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+bench_evaluate.py
+-----------------
+evaluate_corpus.py on a synthetic corpus: --shows copies of the 2011 comparison set
+(control.txt plus every file in 'Other Transcripts'), each hypothesis lightly edited
+per show so no two pairs share content. Times a cold run at --jobs 1 and --jobs N,
+a warm run (everything cached), and a run after adding one new service to every
+show, which should score only the new pairs.
+
+USAGE:
+    python benchmarks/bench_evaluate.py --shows 8 --jobs 4
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from error_rates import CONTROL, OTHER  # noqa: E402
+from evaluate_corpus import discover_pairs, evaluate  # noqa: E402
+
+def build_corpus(root: Path, shows: int) -> None:
+    for s in range(shows):
+        show = root / f"show_{s:02d}"
+        (show / "services").mkdir(parents=True)
+        shutil.copy(CONTROL, show / "control.txt")
+        for p in sorted(OTHER.iterdir()):
+            if p.suffix in (".txt", ".srt"):  # the Transcribe JSON duplicates amazon_transcribe.txt
+                text = p.read_text(encoding="utf-8")
+                (show / "services" / p.name).write_text(text.replace(" the ", " a ", s + 1), encoding="utf-8")
+
+def run(corpus: Path, cache: Path, jobs: int, label: str) -> None:
+    pairs = discover_pairs(str(corpus))
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as quiet:
+        stdout, sys.stdout = sys.stdout, quiet
+        try:
+            rows = evaluate(pairs, jobs, cache_dir=str(cache))
+        finally:
+            sys.stdout = stdout
+    scored = sum(not r["cached"] for r in rows)
+    print(f"{label:34s} {time.perf_counter() - t0:7.2f}s  {scored:3d} scored, {len(rows) - scored:3d} cached")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shows", type=int, default=4)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus, cache = Path(tmp) / "corpus", Path(tmp) / "cache"
+        build_corpus(corpus, args.shows)
+        print(f"{args.shows} shows, {len(discover_pairs(str(corpus)))} pairs, {os.cpu_count()} cores")
+        run(corpus, Path(tmp) / "cache1", 1, "cold, --jobs 1")
+        run(corpus, cache, args.jobs, f"cold, --jobs {args.jobs}")
+        run(corpus, cache, args.jobs, "warm (all cached)")
+        for show in corpus.iterdir():
+            shutil.copy(OTHER / "2011_full.srt", show / "services" / "new_service.srt")
+        run(corpus, cache, args.jobs, "after adding one service")
+
+if __name__ == "__main__":
+    main()
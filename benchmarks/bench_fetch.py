@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+bench_fetch.py
+--------------
+Check fetch_results.fetch_all against an in-memory S3 stand-in (no AWS account
+needed), then time it with a per-request latency at --concurrency 1 and N.
+
+Checks:
+- first run downloads every object, byte for byte;
+- a rerun skips them all (matching size and ETag) without a single GetObject;
+- an object rewritten with the same size but new content is downloaded again;
+- a download that fails mid-stream, a truncated body, a body that is not JSON and
+  JSON without "results" are all reported failed, leave no .part file behind and
+  leave an existing local copy untouched;
+- two prefixes holding the same file name are both refused, nothing written.
+Exits non-zero on any mismatch.
+
+USAGE:
+    python benchmarks/bench_fetch.py
+    python benchmarks/bench_fetch.py --objects 200 --latency-ms 30 --concurrency 16
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import botocore.exceptions
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fetch_results import fetch_all  # noqa: E402
+
+BUCKET = "bench-bucket"
+
+class BrokenBody(io.BytesIO):
+    """A response body whose connection drops after `after` bytes."""
+
+    def __init__(self, data: bytes, after: int):
+        super().__init__(data)
+        self.after = after
+
+    def read(self, n=-1):
+        if self.tell() >= self.after:
+            raise IOError("connection reset by peer")
+        return super().read(min(n, self.after - self.tell()) if n and n > 0 else self.after - self.tell())
+
+class FakeS3:
+    """Objects in a dict; ListObjectsV2 pages of `page` keys; optional latency per request.
+    faults[key] = "reset" | "truncate" makes GetObject misbehave for that key."""
+
+    def __init__(self, latency: float = 0.0, page: int = 1000):
+        self.objects = {}
+        self.faults = {}
+        self.latency = latency
+        self.page = page
+        self.calls = {"list": 0, "head": 0, "get": 0}
+        self.lock = threading.Lock()
+
+    def put(self, key: str, data: bytes):
+        self.objects[key] = data
+
+    def _call(self, kind: str):
+        with self.lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _meta(self, key: str):
+        data = self.objects.get(key)
+        if data is None:
+            raise botocore.exceptions.ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return f'"{hashlib.md5(data).hexdigest()}"', len(data)
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None):
+        self._call("list")
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        first = int(ContinuationToken or 0)
+        page = keys[first:first + self.page]
+        out = {"Contents": [{"Key": k, "ETag": self._meta(k)[0], "Size": self._meta(k)[1]} for k in page],
+               "IsTruncated": first + self.page < len(keys)}
+        if out["IsTruncated"]:
+            out["NextContinuationToken"] = str(first + self.page)
+        return out
+
+    def head_object(self, Bucket, Key):
+        self._call("head")
+        etag, size = self._meta(Key)
+        return {"ETag": etag, "ContentLength": size}
+
+    def get_object(self, Bucket, Key):
+        self._call("get")
+        self._meta(Key)
+        data = self.objects[Key]
+        fault = self.faults.get(Key)
+        if fault == "reset":
+            return {"Body": BrokenBody(data, len(data) // 2)}
+        if fault == "truncate":
+            return {"Body": io.BytesIO(data[: len(data) // 2])}
+        return {"Body": io.BytesIO(data)}
+
+def transcript(i: int, pad: int = 0) -> bytes:
+    doc = {"jobName": f"show-{i:04d}", "results": {"transcripts": [{"transcript": "word " * (50 + i % 7)}],
+                                                   "items": [], "pad": "x" * pad}}
+    return json.dumps(doc).encode()
+
+def uri(key: str) -> str:
+    return f"s3://{BUCKET}/{key}"
+
+def part_files(folder: Path):
+    return sorted(p.name for p in folder.iterdir() if p.name.endswith(".part"))
+
+def check(problems: list, ok: bool, what: str):
+    print(f"  {'ok  ' if ok else 'FAIL'} {what}")
+    if not ok:
+        problems.append(what)
+
+def run_checks(objects: int) -> list:
+    problems = []
+    s3 = FakeS3(page=7)  # small pages, so listing pagination is exercised too
+    keys = [f"outputs/show-{i:04d}.json" for i in range(objects)]
+    for i, k in enumerate(keys):
+        s3.put(k, transcript(i))
+    uris = [uri(k) for k in keys]
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        print("fresh download, rerun, changed object:")
+        summary = fetch_all(s3, uris, tmp, concurrency=4)
+        check(problems, len(summary["downloaded"]) == objects, f"{len(summary['downloaded'])}/{objects} downloaded")
+        check(problems, all((out / Path(k).name).read_bytes() == s3.objects[k] for k in keys), "local files match S3")
+
+        gets = s3.calls["get"]
+        summary = fetch_all(s3, uris, tmp, concurrency=4)
+        check(problems, len(summary["skipped"]) == objects and s3.calls["get"] == gets,
+              f"rerun: {len(summary['skipped'])}/{objects} skipped, {s3.calls['get'] - gets} GetObject calls")
+
+        changed = keys[0]
+        old = s3.objects[changed]
+        s3.put(changed, old.replace(b"word", b"WORD", 1))
+        summary = fetch_all(s3, uris, tmp, concurrency=4)
+        check(problems, summary["downloaded"] == [uri(changed)] and (out / Path(changed).name).read_bytes() == s3.objects[changed],
+              "same size, new ETag: downloaded again")
+
+        print("failed downloads (existing copy kept, new one not created, no .part left):")
+        bad = {
+            "reset": (keys[1], None),
+            "truncate": (keys[2], None),
+            "not JSON": (keys[3], b"{" * len(s3.objects[keys[3]])),
+            "no 'results'": (keys[4], json.dumps({"jobName": "x"}).encode()),
+            "reset, new file": ("outputs/new-show.json", None),
+        }
+        before = {k: (out / Path(k).name).read_bytes() for k, _ in bad.values() if (out / Path(k).name).exists()}
+        for label, (k, data) in bad.items():
+            # new content, so any local copy is stale and a download is attempted
+            s3.put(k, (data if data is not None else s3.objects.get(k, transcript(999))) + b" ")
+            if label in ("reset", "truncate", "reset, new file"):
+                s3.faults[k] = label.split(",")[0]
+        summary = fetch_all(s3, [uri(k) for k, _ in bad.values()], tmp, concurrency=4)
+        for label, (k, _) in bad.items():
+            local = out / Path(k).name
+            kept = local.read_bytes() == before[k] if k in before else not local.exists()
+            check(problems, uri(k) in summary["failed"] and kept, f"{label}: failed, local file {'kept' if k in before else 'absent'}")
+        check(problems, not part_files(out), f".part files left: {part_files(out)}")
+
+        print("same file name under two prefixes:")
+        s3.put("outputs/a/dup.json", transcript(1))
+        s3.put("outputs/b/dup.json", transcript(2))
+        summary = fetch_all(s3, [uri("outputs/a/dup.json"), uri("outputs/b/dup.json")], tmp, concurrency=4)
+        check(problems, len(summary["failed"]) == 2 and not (out / "dup.json").exists(), "both refused, nothing written")
+    return problems
+
+def timed(s3: FakeS3, uris, concurrency: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        fetch_all(s3, uris, tmp, concurrency=concurrency)
+        return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--objects", type=int, default=100)
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="Simulated latency per S3 request")
+    ap.add_argument("--concurrency", type=int, default=16)
+    args = ap.parse_args()
+
+    problems = run_checks(20)
+
+    s3 = FakeS3(latency=args.latency_ms / 1000)
+    for i in range(args.objects):
+        s3.put(f"outputs/show-{i:04d}.json", transcript(i, pad=20000))
+    uris = [uri(k) for k in s3.objects]
+    serial = timed(s3, uris, 1)
+    parallel = timed(s3, uris, args.concurrency)
+    print(f"{args.objects} downloads at {args.latency_ms:g}ms per request: concurrency 1 {serial:.2f}s, "
+          f"{args.concurrency} {parallel:.2f}s ({serial / parallel:.1f}x)")
+
+    if problems:
+        print(f"FAIL: {len(problems)} check(s) failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+bench_index.py
+--------------
+transcript_index.py on a synthetic archive: --shows rendered Markdown transcripts,
+one a week from 1989-10-07, each --turns speaker turns whose words are drawn with
+the word frequencies of outputs/*.txt (so common and rare terms are realistic).
+Prints
+- the full build: shows/s, turns/s and MB/s of transcript text, and index size;
+- incremental updates: a no-op pass over the unchanged archive, then one new
+  show (this week's render), then --touch re-rendered shows;
+- query latency (median / p95 / max over --repeat runs) for common and rare
+  words, phrases, prefixes, NEAR, speaker and date filters, chronological order.
+
+USAGE:
+    python benchmarks/bench_index.py
+    python benchmarks/bench_index.py --shows 1400 --turns 140 --seed 3
+"""
+
+import argparse
+import datetime
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from transcript_index import TranscriptIndex  # noqa: E402
+
+QUERIES = {
+    "common word": ("children", {}),
+    "rare word": ("perestroika", {}),
+    "phrase": ('"public schools"', {}),
+    "prefix": ("educat*", {}),
+    "boolean": ("abortion OR adoption NOT government", {}),
+    "near": ("NEAR(family government, 5)", {}),
+    "speaker filter": ("children", {"speaker": "Phyllis Schlafly"}),
+    "date range": ("children", {"date_from": "1995", "date_to": "1999"}),
+    "chronological": ("children", {"order": "aired"}),
+}
+SPEAKERS = ["Phyllis Schlafly", "Bruce Hayes", "spk_2", "spk_3", "spk_4"]
+
+def vocabulary():
+    counts = Counter()
+    for p in sorted((ROOT / "outputs").glob("*.txt")):
+        counts.update(re.findall(r"[A-Za-z']+", p.read_text(encoding="utf-8")))
+    for w in ("perestroika", "adoption"):  # keep the rare query terms rare but present
+        counts[w] = max(counts[w], 1)
+    words = list(counts)
+    cum, total = [], 0
+    for w in words:
+        total += counts[w]
+        cum.append(total)
+    return words, cum
+
+def clock(t: float) -> str:
+    return f"{int(t // 60):02d}:{t % 60:05.2f}"
+
+def write_show(path: Path, rng: random.Random, words, cum, turns: int):
+    t = rng.uniform(0.3, 2.0)
+    lines = []
+    for i in range(turns):
+        n = max(1, int(rng.expovariate(1 / 60)))
+        text = " ".join(rng.choices(words, cum_weights=cum, k=n))
+        end = t + n * rng.uniform(0.3, 0.45)
+        spk = SPEAKERS[0] if i % 2 else rng.choice(SPEAKERS[1:])
+        lines.append(f"**{spk}:** [{clock(t)} - {clock(end)}] {text[0].upper()}{text[1:]}.")
+        t = end + rng.uniform(0.1, 2.0)
+    path.write_text("\n\n".join(lines) + "\n", encoding="utf-8")
+
+def show_path(folder: Path, week: int) -> Path:
+    aired = datetime.date(1989, 10, 7) + datetime.timedelta(weeks=week)
+    return folder / f"EFRL-{aired.isoformat()}-1.txt"
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shows", type=int, default=1000)
+    ap.add_argument("--turns", type=int, default=120, help="Speaker turns per show")
+    ap.add_argument("--touch", type=int, default=10, help="Shows to re-render for the incremental update")
+    ap.add_argument("--repeat", type=int, default=50, help="Runs per query")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    words, cum = vocabulary()
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "outputs"
+        folder.mkdir()
+        _, secs = timed(lambda: [write_show(show_path(folder, w), rng, words, cum, args.turns) for w in range(args.shows)])
+        mb = sum(p.stat().st_size for p in folder.iterdir()) / 1e6
+        print(f"corpus: {args.shows} shows, {mb:.0f} MB of Markdown ({show_path(folder, 0).stem} .. "
+              f"{show_path(folder, args.shows - 1).stem}), generated in {secs:.1f}s")
+
+        index = TranscriptIndex(str(Path(tmp) / "index.db"))
+        c, secs = timed(index.update, [str(folder)], verbose=False)
+        s = index.stats()
+        print(f"build: {c['added']} shows, {c['turns']} turns in {secs:.1f}s "
+              f"({c['added'] / secs:.0f} shows/s, {c['turns'] / secs:.0f} turns/s, {mb / secs:.1f} MB/s); index {s['mb']:.0f} MB")
+
+        c, secs = timed(index.update, [str(folder)], verbose=False)
+        print(f"update, nothing changed: {c['unchanged']} unchanged in {secs * 1000:.0f}ms")
+        write_show(show_path(folder, args.shows), rng, words, cum, args.turns)
+        c, secs = timed(index.update, [str(folder)], verbose=False)
+        print(f"update, 1 new show: {c['added']} added in {secs * 1000:.0f}ms")
+        for week in rng.sample(range(args.shows), min(args.touch, args.shows)):
+            write_show(show_path(folder, week), rng, words, cum, args.turns)
+        c, secs = timed(index.update, [str(folder)], verbose=False)
+        print(f"update, {args.touch} re-rendered: {c['updated']} updated in {secs * 1000:.0f}ms")
+
+        print(f"{'query':16s} {'hits':>5s} {'median':>9s} {'p95':>9s} {'max':>9s}")
+        for name, (query, kwargs) in QUERIES.items():
+            times = []
+            for _ in range(args.repeat):
+                hits, secs = timed(index.search, query, limit=20, **kwargs)
+                times.append(secs)
+            times.sort()
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            print(f"{name:16s} {len(hits):5d} {times[len(times) // 2] * 1000:7.2f}ms {p95 * 1000:7.2f}ms {times[-1] * 1000:7.2f}ms")
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+bench_ingest.py
+---------------
+transcript_ingest.py readers on growing inputs: 2011_full.srt and
+microsoft_word.txt repeated --copies times (1x, 2x, 4x, ...). For each size, prints
+- the time to build the WordTable (ingest), which should grow linearly;
+- the peak traced memory of the reader alone (cues -> items, nothing kept), which
+  should stay flat because at most one cue is held;
+- the peak of the full ingest, which grows only with the columnar table itself.
+First checks cues run together without blank lines, where a cue's last line is a
+number; exits non-zero if the reader takes that number for the next cue's id.
+
+USAGE:
+    python benchmarks/bench_ingest.py --copies 16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from error_rates import OTHER  # noqa: E402
+from transcript_ingest import cue_items, ingest, iter_subtitle_cues, iter_text_cues  # noqa: E402
+
+def reader_peak(path: Path) -> int:
+    reader = iter_subtitle_cues if path.suffix == ".srt" else iter_text_cues
+    tracemalloc.start()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for cue in reader(f):
+            for _item in cue_items(cue):
+                pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def ingest_cost(path: Path):
+    t0 = time.perf_counter()
+    table, _ = ingest(str(path))
+    secs = time.perf_counter() - t0
+    tracemalloc.start()
+    ingest(str(path))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return int(table.is_word.sum()), secs, peak
+
+# Cues run together (no blank lines), once without ids and once with them; the first cue
+# ends in a number that is not a cue id.
+RUN_TOGETHER = [
+    "00:00:01.000 --> 00:00:02.000\nWe moved in\n1989\n00:00:02.000 --> 00:00:03.000\nand stayed",
+    "1\n00:00:01,000 --> 00:00:02,000\nWe moved in\n1989\n2\n00:00:02,000 --> 00:00:03,000\nand stayed",
+]
+
+def check_cue_ids() -> bool:
+    want = ["We moved in 1989", "and stayed"]
+    for src in RUN_TOGETHER:
+        texts = [cue.text for cue in iter_subtitle_cues(src.splitlines())]
+        if texts != want:
+            print(f"cue ids: got {texts}, want {want}")
+            return False
+    return True
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--copies", type=int, default=16, help="Largest repetition count (powers of two up to it)")
+    args = ap.parse_args()
+    if not check_cue_ids():
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("2011_full.srt", "microsoft_word.txt"):
+            src = (OTHER / name).read_text(encoding="utf-8")
+            print(f"{name}")
+            print(f"  {'copies':>6s} {'MB':>6s} {'words':>8s} {'ingest':>8s} {'us/word':>8s} {'reader peak':>12s} {'ingest peak':>12s}")
+            n = 1
+            while n <= args.copies:
+                path = Path(tmp) / f"{n}{Path(name).suffix}"
+                path.write_text("\n\n".join([src] * n), encoding="utf-8")
+                words, secs, peak = ingest_cost(path)
+                print(f"  {n:6d} {path.stat().st_size / 1e6:6.1f} {words:8d} {secs:7.2f}s {secs / words * 1e6:8.2f} "
+                      f"{reader_peak(path) / 1024:9.0f} KiB {peak / (1 << 20):8.1f} MiB")
+                n *= 2
+
+if __name__ == "__main__":
+    main()
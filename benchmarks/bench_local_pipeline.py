@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+bench_local_pipeline.py
+-----------------------
+Throughput of transcribe_diarize.py's chunked pipeline mode against a single
+faster-whisper call over the whole recording, on CPU with the `tiny` model.
+
+The input is decoded once and tiled up to --minutes (default: an hour-long show),
+so any short clip works. Reports wall time, real-time factor and how closely the
+chunked word sequence agrees with the single-call one. Needs faster-whisper.
+
+USAGE:
+    python benchmarks/bench_local_pipeline.py
+    python benchmarks/bench_local_pipeline.py --audio show.mp3 --minutes 60 --jobs 8 --model tiny
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Transcription Options" / "whistper_pyannote"))
+
+from chunked_transcribe import SAMPLE_RATE, transcribe_chunked  # noqa: E402
+
+def whole_file(audio: np.ndarray, model_size: str, threads: int):
+    from faster_whisper import WhisperModel
+    model = WhisperModel(model_size, device="cpu", compute_type="int8", cpu_threads=threads)
+    segments, _info = model.transcribe(audio, beam_size=5, language="en", word_timestamps=True)
+    return [w.word for seg in segments for w in (seg.words or [])]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--audio", default=str(ROOT / "Transcription Options" / "chunks" / "2011_000.m4a"))
+    ap.add_argument("--minutes", type=float, default=60.0, help="Tile the decoded audio up to this length")
+    ap.add_argument("--model", default="tiny")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--threads-per-job", type=int, default=None)
+    ap.add_argument("--chunk-sec", type=float, default=120.0)
+    ap.add_argument("--overlap-sec", type=float, default=2.0)
+    ap.add_argument("--skip-baseline", action="store_true", help="Only time the chunked pipeline")
+    args = ap.parse_args()
+
+    from faster_whisper import decode_audio
+    clip = decode_audio(args.audio, sampling_rate=SAMPLE_RATE)
+    reps = max(1, int(np.ceil(args.minutes * 60 * SAMPLE_RATE / len(clip))))
+    audio = np.tile(clip, reps)[:int(args.minutes * 60 * SAMPLE_RATE)]
+    seconds = len(audio) / SAMPLE_RATE
+    print(f"{args.audio}: {seconds / 60:.1f} min of audio, model {args.model}, {os.cpu_count()} cores")
+
+    t0 = time.perf_counter()
+    segments = transcribe_chunked(audio, args.model, "cpu", "int8", args.jobs, args.threads_per_job,
+                                  chunk_sec=args.chunk_sec, overlap_sec=args.overlap_sec,
+                                  transcribe_kwargs=dict(beam_size=5, language="en"))
+    t_chunked = time.perf_counter() - t0
+    chunked_words = [w[2] for s in segments for w in s[3]]
+    print(f"{f'chunked ({args.jobs} jobs):':<20}{t_chunked:8.1f}s  {seconds / t_chunked:6.1f}x real time  {len(chunked_words)} words")
+
+    if args.skip_baseline:
+        return
+    t0 = time.perf_counter()
+    baseline_words = whole_file(audio, args.model, os.cpu_count() or 1)
+    t_base = time.perf_counter() - t0
+    print(f"{'single call:':<20}{t_base:8.1f}s  {seconds / t_base:6.1f}x real time  {len(baseline_words)} words")
+
+    norm = lambda ws: [w.strip().lower().strip(".,?!\"'") for w in ws]  # noqa: E731
+    agree = difflib.SequenceMatcher(None, norm(baseline_words), norm(chunked_words), autojunk=False).ratio()
+    print(f"speedup: {t_base / t_chunked:.1f}x, word agreement with single call: {agree:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+bench_merge.py
+--------------
+Accuracy and runtime of the ROVER alignment engine vs the legacy time-bucket merge
+in merge_majority_vote.py, scored against the 2011 Sowell control transcript.
+
+Scenarios:
+- real    : the two Transcribe runs of the show (-EFLive-test-job-1.json, asrOutput.json)
+- drifted : asrOutput.json plus two perturbed copies whose clocks drift (up to
+            --drift-sec by the end of the show) and which carry random substitutions
+            and deletions, i.e. what three independent runs that disagree look like
+- services: three different services read through transcript_ingest.py, as
+            merge_majority_vote.py --inputs does: Transcribe (asrOutput.json), Whisper
+            (2011_full.srt, cue times interpolated) and the Word export
+            (microsoft_word.txt, untimed, times borrowed from the first input)
+
+USAGE:
+    python benchmarks/bench_merge.py
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from error_rates import edit_distance, encode  # noqa: E402
+from merge_majority_vote import (  # noqa: E402
+    build_wtn, bucketize, compose_rover_text, compose_text, extract_sequence,
+    majority_vote_punct, majority_vote_word, prepare_tables, rover_vote, split_hyphenated, table_sequence,
+)
+from transcript_cache import load_transcript  # noqa: E402
+
+SOWELL = ROOT / "Transcription Options"
+CONTROL = SOWELL / "Original MP3 and Control Transcript" / "control.txt"
+RUNS = [ROOT / "-EFLive-test-job-1.json", SOWELL / "Other Transcripts" / "asrOutput.json"]
+SERVICES = [SOWELL / "Other Transcripts" / name for name in ("asrOutput.json", "2011_full.srt", "microsoft_word.txt")]
+SPEAKERS = {"Bill Hayes", "Phyllis Schlafly", "Thomas Sowell", "Commercial"}
+
+def words_of(text: str):
+    text = text.lower().replace("-", " ")
+    return re.findall(r"[a-z0-9']+", text)
+
+def control_words():
+    lines = [l.strip() for l in CONTROL.read_text(encoding="utf-8").splitlines()]
+    return words_of(" ".join(l for l in lines if l and l not in SPEAKERS))
+
+def wer(ref, hyp) -> float:
+    """Exact word error rate (bit-parallel edit distance, error_rates.py)."""
+    r, h = encode(ref, hyp)
+    return edit_distance(r, h) / max(1, len(ref))
+
+def perturb(seq, drift_sec: float, sub_rate: float, del_rate: float, seed: int):
+    rng = random.Random(seed)
+    vocab = [w for (_s, _e, w, _c, _p) in seq]
+    total = seq[-1][0] if seq else 1.0
+    out = []
+    for start, end, word, conf, punct in seq:
+        if rng.random() < del_rate:
+            continue
+        shift = drift_sec * start / total
+        if rng.random() < sub_rate:
+            word, conf = rng.choice(vocab), rng.uniform(0.2, 0.7)
+        out.append((start + shift, end + shift, word, conf, punct))
+    return out
+
+def bucket_merge(runs, bucket_sec: float) -> str:
+    word_buckets, punct_buckets = defaultdict(list), defaultdict(list)
+    for seq in runs:
+        for start, _end, word, conf, punct in seq:
+            b = bucketize(start, bucket_sec)
+            word_buckets[b].append((word, conf))
+            if punct:
+                punct_buckets[b].append(punct)
+    return compose_text(majority_vote_word(word_buckets), majority_vote_punct(punct_buckets))
+
+def score(name, ref, fn):
+    t0 = time.perf_counter()
+    text = fn()
+    secs = time.perf_counter() - t0
+    print(f"  {name:28s} WER {wer(ref, words_of(text)):6.3f}   {secs:6.2f}s")
+
+def run_scenario(title, ref, runs, args):
+    print(f"{title}: {len(runs)} runs, {sum(len(r) for r in runs)} words")
+    for k, seq in enumerate(runs):
+        score(f"input {k}", ref, lambda seq=seq: " ".join(w + (p or "") for (_s, _e, w, _c, p) in seq))
+    score(f"bucket merge ({args.bucket_sec}s)", ref, lambda: bucket_merge(runs, args.bucket_sec))
+    score(f"rover merge (window {args.window_sec}s)", ref,
+          lambda: compose_rover_text(rover_vote(build_wtn(runs, args.window_sec))))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bucket-sec", type=float, default=0.2)
+    ap.add_argument("--window-sec", type=float, default=2.0)
+    ap.add_argument("--drift-sec", type=float, default=1.5)
+    ap.add_argument("--seed", type=int, default=2011)
+    args = ap.parse_args()
+
+    ref = control_words()
+    print(f"control: {len(ref)} words")
+    real = []
+    for path in RUNS:
+        items = json.loads(path.read_text(encoding="utf-8"))["results"]["items"]
+        real.append(split_hyphenated(extract_sequence(items)))
+    run_scenario("real", ref, real, args)
+
+    base = real[1]
+    drifted = [base,
+               perturb(base, args.drift_sec, 0.08, 0.04, args.seed),
+               perturb(base, -args.drift_sec, 0.08, 0.04, args.seed + 1)]
+    run_scenario("drifted", ref, drifted, args)
+
+    t0 = time.perf_counter()
+    tables = prepare_tables([load_transcript(str(p))[0] for p in SERVICES], text_conf=0.9)
+    services = [split_hyphenated(table_sequence(t)) for t in tables]
+    print(f"(services read in {time.perf_counter() - t0:.2f}s)")
+    run_scenario("services", ref, services, args)
+
+if __name__ == "__main__":
+    main()
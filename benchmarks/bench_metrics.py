@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+bench_metrics.py
+----------------
+Cost of the metrics.py instrumentation:
+- per call: span() and incr() with recording off and on, against an empty loop;
+- end to end: render_file over outputs/*.json (parsed once, cached, as in a batch
+  rerun) --repeat times with recording off, then on; median per pass, how many
+  spans one pass records, and what they cost at the per-call price (the measured
+  difference between the medians is mostly file-system noise at this size).
+Exits non-zero if a disabled call costs more than --max-off-ns, or the recorded
+calls cost more than --max-slowdown percent of a render pass.
+
+USAGE:
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --repeat 20 --max-slowdown 0.5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import metrics  # noqa: E402
+from diarization_to_markdown import render_file  # noqa: E402
+from transcript_cache import TranscriptCache  # noqa: E402
+
+def per_call_ns(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+def span_once():
+    with metrics.span("bench"):
+        pass
+
+def incr_once():
+    metrics.incr("bench")
+
+def render_pass(jsons, out_dir: Path, cache: TranscriptCache) -> float:
+    t0 = time.perf_counter()
+    for p in jsons:
+        render_file(str(p), str(out_dir / f"{p.stem}.txt"), {}, None, None, "Other", cache=cache)
+    return time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200000, help="Calls per per-call measurement")
+    ap.add_argument("--repeat", type=int, default=9, help="Render passes per setting")
+    ap.add_argument("--max-off-ns", type=float, default=1000, help="Fail above this many ns per disabled call")
+    ap.add_argument("--max-slowdown", type=float, default=1.0, help="Fail if recording costs more than this share of a pass, %%")
+    args = ap.parse_args()
+
+    base = per_call_ns(lambda: None, args.calls)
+    rows = []
+    for on in (False, True):
+        metrics.METRICS.enabled = on
+        rows.append((on, per_call_ns(span_once, args.calls) - base, per_call_ns(incr_once, args.calls) - base))
+    metrics.METRICS.enabled = False
+    metrics.METRICS.reset()
+    print(f"per call (net of a {base:.0f}ns empty call):")
+    for on, s, i in rows:
+        print(f"  recording {'on ' if on else 'off'}: span {s:6.0f}ns  incr {i:6.0f}ns")
+
+    jsons = sorted((ROOT / "outputs").glob("*.json"))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = TranscriptCache(str(tmp / "cache"))
+        render_pass(jsons, tmp, cache)  # fill the cache, warm up
+        times = {False: [], True: []}
+        for _ in range(args.repeat):
+            for on in (False, True):  # interleaved, so drift hits both settings alike
+                metrics.METRICS.enabled = on
+                times[on].append(render_pass(jsons, tmp, cache))
+        metrics.METRICS.enabled = False
+    spans = sum(s[0] for s in metrics.METRICS.snapshot()["spans"].values()) // args.repeat
+    off, on = statistics.median(times[False]), statistics.median(times[True])
+    # each span here comes with at most one incr()
+    slowdown = spans * (rows[1][1] + rows[1][2]) / 1e9 / off * 100
+    print(f"render pass over {len(jsons)} JSONs (cached), median of {args.repeat}:")
+    print(f"  recording off: {off * 1000:7.1f}ms")
+    print(f"  recording on:  {on * 1000:7.1f}ms (measured {(on / off - 1) * 100:+.1f}%)")
+    print(f"  {spans} spans per pass: {spans * (rows[1][1] + rows[1][2]) / 1e6:.3f}ms recording on "
+          f"({slowdown:.2f}%), {spans * (rows[0][1] + rows[0][2]) / 1e6:.3f}ms off")
+
+    worst_off = max(rows[0][1], rows[0][2])
+    if worst_off > args.max_off_ns or slowdown > args.max_slowdown:
+        print(f"FAIL: disabled call {worst_off:.0f}ns (limit {args.max_off_ns:.0f}), "
+              f"slowdown {slowdown:.1f}% (limit {args.max_slowdown:.1f}%)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_normalizer.py
+-------------------
+text_normalizer.normalize_text against the comparison notebook's normalize_text
+(copied below verbatim, nine re.sub passes):
+- property check: --cases random strings built from the characters and fragments
+  the rules act on (fillers, nested/unbalanced brackets and parentheses across
+  newlines, curly quotes, dashes, Unicode whitespace, final sigma) must give the
+  same output from normalize_text and from normalize_tokens over the lines;
+- speed: each file in 'Other Transcripts' (and all of them joined), best of
+  --repeat runs.
+Exits non-zero on any mismatch.
+
+USAGE:
+    python benchmarks/bench_normalizer.py
+    python benchmarks/bench_normalizer.py --cases 100000 --seed 7
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from error_rates import OTHER, read_transcript  # noqa: E402
+from text_normalizer import normalize_text, normalize_tokens  # noqa: E402
+
+def notebook_normalize_text(text):
+    """Normalize text for comparison by standardizing punctuation, case, etc."""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r"[’‘`]", "'", text)
+    text = re.sub(r"'s\b", "'s", text)
+    text = re.sub(r"[“”]", '"', text)
+    text = re.sub(r"[‘’]", "'", text)
+    text = re.sub(r'—|–', '-', text)
+    text = re.sub(r'\b(um|uh|ah|er)\b', '', text)
+    text = re.sub(r'\[.*?\]', '', text)
+    text = re.sub(r'\(.*?\)', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    return text
+
+FRAGMENTS = [
+    "um", "Uh", "AH", "er", "umm", "erm", "hum", "the", "It's", "x", "9", "_",
+    "[", "]", "(", ")", "[laughs]", "(inaudible)", "(a [b) c] d)",
+    " ", " ", "  ", "\n", "\t", "\r", "\r\n", "\x0b", "\x1c", "\xa0", " ", "　",
+    "’", "‘", "`", "“", "”", "—", "–", "-", "'s", "'", '"', ",", ".", ":",
+    "Σ", "ΑΣ", "İ", "é", "ß",
+]
+
+def random_text(rng: random.Random) -> str:
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 40)))
+
+def check(text: str) -> bool:
+    expected = notebook_normalize_text(text)
+    return normalize_text(text) == expected and " ".join(normalize_tokens(text.split("\n"))) == expected
+
+def best_of(repeat: int, fn, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cases", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    bad = [t for t in (random_text(rng) for _ in range(args.cases)) if not check(t)]
+    texts = {p.name: read_transcript(p) for p in sorted(OTHER.iterdir()) if p.suffix in (".txt", ".srt", ".json")}
+    texts["(all joined)"] = "\n".join(texts.values())
+    bad += [name for name, text in texts.items() if not check(text)]
+    print(f"property check: {args.cases} random strings + {len(texts)} files, {len(bad)} mismatches")
+    for t in bad[:5]:
+        print(f"  {t!r}")
+
+    print(f"{'file':24s} {'chars':>9s} {'notebook':>10s} {'single-pass':>12s} {'speedup':>8s}")
+    for name, text in texts.items():
+        t_old = best_of(args.repeat, notebook_normalize_text, text)
+        t_new = best_of(args.repeat, normalize_text, text)
+        print(f"{name:24s} {len(text):9d} {t_old * 1000:8.2f}ms {t_new * 1000:10.2f}ms {t_old / t_new:7.1f}x")
+    if bad:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
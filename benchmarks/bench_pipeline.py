@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py
+-----------------
+pipeline.py against the README's stage-at-a-time workflow, on --shows synthetic
+shows with in-process fakes of Transcribe and S3 (no AWS account needed):
+- Transcribe runs at most --quota jobs at once (the account's concurrent-job quota;
+  the rest wait QUEUED, as on AWS), each taking --min-job..--max-job seconds (an
+  hour of audio scaled down); results are the JSONs in outputs/, reused cyclically;
+- S3 serves them at --mbps.
+Both sides call the same code: the manual run is transcribe_batch.submit_jobs +
+wait_for_jobs, then fetch_results.fetch_all, then diarization_to_markdown.batch_render,
+then one transcript_index update. Prints both wall times and how far the
+pipeline's stages overlapped (first render vs last transcription).
+
+Then a crash test: the pipeline is interrupted after --crash-after stage
+completions and rerun with the same state file. Checks, exiting non-zero on failure:
+no Transcribe job is started twice, no stage finished before the crash runs again,
+and every rendered transcript matches the manual run's byte for byte.
+
+Last, a flaky-poll run: a --flaky share of Transcribe's list and get calls fail with
+ThrottlingException. Failed status lookups must be retried, not taken as failed
+jobs: every show must finish, with no job deleted or started twice.
+
+And a lost-submission run: the state file says transcribe is RUNNING for shows whose
+job Transcribe never started, half of them with no ledger record (a crash before the
+start call) and half recorded as in flight. Each must be submitted exactly once and
+finish, instead of being polled for good (the run is stopped after --max-polls).
+
+USAGE:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --shows 200 --quota 50 --min-job 2 --max-job 10 --render-jobs 4
+"""
+
+import argparse
+import contextlib
+import hashlib
+import heapq
+import io
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import botocore.exceptions
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from diarization_to_markdown import batch_render  # noqa: E402
+from fetch_results import fetch_all  # noqa: E402
+from job_ledger import JobLedger, settings_hash  # noqa: E402
+from pipeline import DONE, RUNNING, Pipeline, PipelineState, build_parser, load_shows  # noqa: E402
+from transcribe_batch import (TokenBucket, expected_output_uri, standard_job_request,  # noqa: E402
+                              start_standard_job, submit_jobs, wait_for_jobs)
+from transcript_index import TranscriptIndex  # noqa: E402
+
+BUCKET, PREFIX = "bench-bucket", "outputs/"
+
+def client_error(code: str, op: str):
+    return botocore.exceptions.ClientError({"Error": {"Code": code, "Message": code}}, op)
+
+class FakeTranscribe:
+    """Jobs start in submission order as quota slots free up (FIFO, like the service queue)."""
+
+    def __init__(self, sources, quota: int, min_job: float, max_job: float, seed: int = 0, flaky: float = 0.0):
+        self.sources = sources
+        self.flaky = flaky      # share of list/get calls that fail with ThrottlingException
+        self.flaky_rng = random.Random(seed + 1)
+        self.deletes = 0
+        self.quota = quota
+        self.rng = random.Random(seed)
+        self.min_job, self.max_job = min_job, max_job
+        self.jobs = {}          # name -> (start, end, output key)
+        self.slots = []         # end times of the jobs holding quota slots
+        self.starts = {}        # name -> start_transcription_job calls that created a job
+        self.api_calls = 0
+        self.lock = threading.Lock()
+
+    def status(self, name: str, now: float) -> str:
+        start, end, _key = self.jobs[name]
+        return "QUEUED" if now < start else "IN_PROGRESS" if now < end else "COMPLETED"
+
+    def start_transcription_job(self, **request):
+        with self.lock:
+            self.api_calls += 1
+            name = request["TranscriptionJobName"]
+            if name in self.jobs:
+                raise client_error("ConflictException", "StartTranscriptionJob")
+            now = time.monotonic()
+            start = now if len(self.slots) < self.quota else max(now, heapq.heappop(self.slots))
+            end = start + self.rng.uniform(self.min_job, self.max_job)
+            heapq.heappush(self.slots, end)
+            self.jobs[name] = (start, end, request["OutputKey"])
+            self.starts[name] = self.starts.get(name, 0) + 1
+            return {"TranscriptionJob": {"TranscriptionJobName": name, "TranscriptionJobStatus": "QUEUED"}}
+
+    def maybe_throttle(self, op: str):
+        if self.flaky and self.flaky_rng.random() < self.flaky:
+            raise client_error("ThrottlingException", op)
+
+    def list_transcription_jobs(self, Status, MaxResults=100, JobNameContains="", NextToken=None):
+        with self.lock:
+            self.api_calls += 1
+            self.maybe_throttle("ListTranscriptionJobs")
+            now = time.monotonic()
+            names = sorted(n for n in self.jobs if JobNameContains in n and self.status(n, now) == Status)
+            first = int(NextToken or 0)
+            page = names[first:first + MaxResults]
+            out = {"TranscriptionJobSummaries": [{"TranscriptionJobName": n, "TranscriptionJobStatus": Status} for n in page]}
+            if first + MaxResults < len(names):
+                out["NextToken"] = str(first + MaxResults)
+            return out
+
+    def get_transcription_job(self, TranscriptionJobName):
+        with self.lock:
+            self.api_calls += 1
+            self.maybe_throttle("GetTranscriptionJob")
+            if TranscriptionJobName not in self.jobs:
+                raise client_error("NotFoundException", "GetTranscriptionJob")
+            return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName,
+                                         "TranscriptionJobStatus": self.status(TranscriptionJobName, time.monotonic())}}
+
+    def delete_transcription_job(self, TranscriptionJobName):
+        with self.lock:
+            self.deletes += 1
+            self.jobs.pop(TranscriptionJobName, None)
+
+    def completed_object(self, key: str):
+        """The source JSON behind an output key, once its job has completed."""
+        with self.lock:
+            now = time.monotonic()
+            for name, (_start, end, job_key) in self.jobs.items():
+                if job_key == key and now >= end:
+                    return self.sources[name]
+        return None
+
+class FakeS3:
+    def __init__(self, transcribe: FakeTranscribe, mbps: float):
+        self.transcribe = transcribe
+        self.mbps = mbps
+        self.etags = {}
+
+    def _object(self, key: str) -> Path:
+        path = self.transcribe.completed_object(key)
+        if path is None:
+            raise client_error("404", "HeadObject")
+        if path not in self.etags:
+            self.etags[path] = hashlib.md5(path.read_bytes()).hexdigest()
+        return path
+
+    def head_object(self, Bucket, Key):
+        path = self._object(Key)
+        return {"ETag": f'"{self.etags[path]}"', "ContentLength": path.stat().st_size}
+
+    def get_object(self, Bucket, Key):
+        path = self._object(Key)
+        data = path.read_bytes()
+        time.sleep(len(data) / (self.mbps * 1e6))
+        return {"Body": io.BytesIO(data)}
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        contents = []
+        for name, (_s, _e, key) in list(self.transcribe.jobs.items()):
+            if key.startswith(Prefix) and self.transcribe.completed_object(key) is not None:
+                head = self.head_object(Bucket, key)
+                contents.append({"Key": key, "ETag": head["ETag"], "Size": head["ContentLength"]})
+        return {"Contents": contents, "IsTruncated": False}
+
+def make_corpus(folder: Path, shows: int):
+    sources = sorted((ROOT / "outputs").glob("*.json"))
+    names = [f"BENCH-{1990 + i // 52}-{i % 52:02d}" for i in range(shows)]
+    csv_path = folder / "index.csv"
+    lines = ["s3_uri,guest_name,job_name,max_speakers"]
+    lines += [f"s3://{BUCKET}/audio/{n}.mp3,unknown,{n},10" for n in names]
+    csv_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return csv_path, {n: sources[i % len(sources)] for i, n in enumerate(names)}
+
+def pipeline_args(csv_path: Path, work: Path, a):
+    (work / "out").mkdir(parents=True, exist_ok=True)
+    return build_parser().parse_args([
+        "--csv", str(csv_path), "--out-dir", str(work / "out"), "--state", str(work / "state.db"),
+        "--ledger", str(work / "ledger.db"), "--index", str(work / "index.db"), "--cache-dir", str(work / "cache"),
+        "--output-bucket", BUCKET, "--output-prefix", PREFIX, "--transcribe-concurrency", str(a.quota * 2),
+        "--submit-rate", "0", "--poll-seconds", str(a.poll), "--max-poll-seconds", str(a.poll * 4),
+        "--render-jobs", str(a.render_jobs), "--download-concurrency", "8"])
+
+def run_manual(csv_path: Path, work: Path, sources, a) -> float:
+    args = pipeline_args(csv_path, work, a)
+    transcribe = FakeTranscribe(sources, a.quota, a.min_job, a.max_job, a.seed)
+    s3 = FakeS3(transcribe, a.mbps)
+    shows = load_shows(str(csv_path), args.out_dir)
+    t0 = time.monotonic()
+    summary = submit_jobs(transcribe, [s.row for s in shows], args, start_standard_job,
+                          concurrency=args.submit_concurrency, bucket=TokenBucket(rate=0))
+    wait_for_jobs(transcribe, summary["submitted"], poll_sec=a.poll, max_poll_sec=a.poll * 4)
+    fetch_all(s3, [expected_output_uri(standard_job_request(s.row, args)) for s in shows], args.out_dir, concurrency=8)
+    batch_render([(s.json_path, s.out_path) for s in shows], a.render_jobs, None, None, None, "Other",
+                 cache_dir=args.cache_dir)
+    index = TranscriptIndex(args.index)
+    index.update([args.out_dir], verbose=False)
+    index.close()
+    return time.monotonic() - t0
+
+def run_pipeline(csv_path: Path, work: Path, sources, a, transcribe=None, crash_after=None, max_polls=None):
+    args = pipeline_args(csv_path, work, a)
+    transcribe = transcribe or FakeTranscribe(sources, a.quota, a.min_job, a.max_job, a.seed)
+    state, ledger = PipelineState(args.state), JobLedger(args.ledger)
+    p = Pipeline(load_shows(str(csv_path), args.out_dir), args, state, ledger, transcribe, FakeS3(transcribe, a.mbps))
+    events = []
+    finish = p.finish
+
+    def finish_and_log(fut, show, stage, started):
+        finish(fut, show, stage, started)
+        if p.status[(show.name, stage)] == RUNNING:  # a job submitted, not finished
+            return
+        events.append((p.clock() - p.t0, show.name, stage))
+        if crash_after is not None and len(events) >= crash_after:
+            raise KeyboardInterrupt
+    p.finish = finish_and_log
+    poll = p.poll
+
+    polls = []
+
+    def poll_and_log():
+        before = set(p.polling)
+        poll()
+        events.extend((p.clock() - p.t0, name, "transcribe") for name in before - set(p.polling))
+        polls.append(len(p.polling))
+        if max_polls is not None and len(polls) >= max_polls:
+            raise KeyboardInterrupt
+    p.poll = poll_and_log
+    crashed = False
+    try:
+        p.run()
+    except KeyboardInterrupt:
+        crashed = True
+    elapsed = p.clock() - p.t0
+    ledger.close()
+    state.close()
+    return elapsed, events, transcribe, crashed
+
+def lose_submissions(csv_path: Path, work: Path, a, shows: int):
+    """State as a crash leaves it: transcribe RUNNING for the first `shows` shows, none of
+    them started at Transcribe; the second half recorded in the ledger as submitted."""
+    args = pipeline_args(csv_path, work, a)
+    work.mkdir(parents=True, exist_ok=True)
+    state, ledger = PipelineState(args.state), JobLedger(args.ledger)
+    lost = load_shows(str(csv_path), args.out_dir)[:shows]
+    for i, show in enumerate(lost):
+        state.set(show.name, "transcribe", RUNNING)
+        if i >= shows // 2:
+            request = standard_job_request(show.row, args)
+            ledger.record_submitted(show.name, show.row["s3_uri"].strip(), settings_hash(request),
+                                    expected_output_uri(request))
+    ledger.close()
+    state.close()
+    return [show.name for show in lost]
+
+def stage_rows(work: Path):
+    state = PipelineState(str(work / "state.db"))
+    try:
+        return {(r["show"], r["stage"]): (r["status"], r["attempts"]) for r in state.rows()}
+    finally:
+        state.close()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shows", type=int, default=60)
+    ap.add_argument("--quota", type=int, default=10, help="Concurrent Transcribe jobs the fake account runs")
+    ap.add_argument("--min-job", type=float, default=1.0, help="Shortest fake job, seconds")
+    ap.add_argument("--max-job", type=float, default=4.0, help="Longest fake job, seconds")
+    ap.add_argument("--poll", type=float, default=0.25, help="Poll interval for both runs, seconds")
+    ap.add_argument("--mbps", type=float, default=50.0, help="Fake S3 download speed, MB/s")
+    ap.add_argument("--render-jobs", type=int, default=1)
+    ap.add_argument("--crash-after", type=int, default=None, help="Stage completions before the simulated crash (default: half)")
+    ap.add_argument("--flaky", type=float, default=0.3, help="Share of poll calls failing in the flaky-poll run")
+    ap.add_argument("--max-polls", type=int, default=500, help="Polls before the lost-submission run counts as stuck")
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_path, sources = make_corpus(tmp, a.shows)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manual = run_manual(csv_path, tmp / "manual", sources, a)
+            piped, events, _t, _c = run_pipeline(csv_path, tmp / "pipeline", sources, a)
+        last_transcribed = max(t for t, _n, stage in events if stage == "transcribe")
+        first_rendered = min(t for t, _n, stage in events if stage == "render")
+        rendered_before = sum(1 for t, _n, stage in events if stage == "render" and t < last_transcribed)
+        print(f"{a.shows} shows, Transcribe quota {a.quota}, jobs {a.min_job:g}-{a.max_job:g}s, {a.render_jobs} render process(es)")
+        print(f"  stage at a time: {manual:6.1f}s")
+        print(f"  pipeline:        {piped:6.1f}s ({manual / piped:.2f}x)")
+        print(f"  first render at {first_rendered:.1f}s, last transcription at {last_transcribed:.1f}s; "
+              f"{rendered_before}/{a.shows} shows rendered before it")
+
+        crash_after = a.crash_after or a.shows * 2  # about half of the 4 stage completions per show
+        work = tmp / "resume"
+        with contextlib.redirect_stdout(io.StringIO()):
+            _e, events1, transcribe, crashed = run_pipeline(csv_path, work, sources, a, crash_after=crash_after)
+            before = stage_rows(work)
+            _e, events2, transcribe, _c = run_pipeline(csv_path, work, sources, a, transcribe=transcribe)
+        after = stage_rows(work)
+        redone = [k for k, (status, attempts) in before.items() if status == DONE and after[k][1] != attempts]
+        resubmitted = [n for n, c in transcribe.starts.items() if c > 1]
+        unfinished = [k for k, (status, _a) in after.items() if status not in ("DONE", "SKIPPED")]
+        mismatched = [p.name for p in sorted((tmp / "manual" / "out").glob("*.txt"))
+                      if p.read_bytes() != (work / "out" / p.name).read_bytes()]
+        print(f"crash after {len(events1)} stage completions (crashed: {crashed}), "
+              f"{sum(1 for s, _a in before.values() if s == DONE)} stages done; resume finished {len(events2)} more")
+        print(f"  redone: {len(redone)}, jobs started twice: {len(resubmitted)}, unfinished: {len(unfinished)}, "
+              f"transcripts differing from the manual run: {len(mismatched)}")
+
+        work = tmp / "flaky"
+        flaky = FakeTranscribe(sources, a.quota, a.min_job, a.max_job, a.seed, flaky=a.flaky)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            run_pipeline(csv_path, work, sources, a, transcribe=flaky)
+        rows = stage_rows(work)
+        flaky_unfinished = [k for k, (status, _a) in rows.items() if status not in ("DONE", "SKIPPED")]
+        flaky_twice = [n for n, c in flaky.starts.items() if c > 1]
+        lookups = sum(1 for line in log.getvalue().splitlines() if line.startswith("[poll] failed") or "lookups failed" in line)
+        print(f"flaky poll ({a.flaky:.0%} of list/get calls throttled): {lookups} polls hit errors; "
+              f"unfinished: {len(flaky_unfinished)}, jobs deleted: {flaky.deletes}, started twice: {len(flaky_twice)}")
+
+        work = tmp / "lost"
+        lost = lose_submissions(csv_path, work, a, 4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _e, _ev, fresh, stuck = run_pipeline(csv_path, work, sources, a, max_polls=a.max_polls)
+        rows = stage_rows(work)
+        lost_unfinished = [k for k, (status, _a) in rows.items() if status not in ("DONE", "SKIPPED")]
+        lost_starts = [fresh.starts.get(name, 0) for name in lost]
+        print(f"lost submissions ({len(lost)} shows RUNNING, never started): stuck: {stuck}, "
+              f"unfinished: {len(lost_unfinished)}, starts per lost show: {lost_starts}")
+
+        if not crashed or redone or resubmitted or unfinished or mismatched:
+            sys.exit(1)
+        if flaky_unfinished or flaky.deletes or flaky_twice or not lookups:
+            sys.exit(1)
+        if stuck or lost_unfinished or lost_starts != [1] * len(lost):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
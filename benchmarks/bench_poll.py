@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_poll.py
+-------------
+API calls per poll cycle for a mixed batch against a fake Transcribe account with
+a long job history: one JobNameContains filter for the whole batch (its common
+prefix, "" for mixed CSVs) vs transcribe_batch.poll_job_statuses (one filter per
+job-name stem, per-job gets for names outside any group). Checks that both resolve
+every job to its true status and exits non-zero if not, or if the grouped poll
+makes more calls than a get per job would.
+
+USAGE:
+    python benchmarks/bench_poll.py
+    python benchmarks/bench_poll.py --history 20000 --batch 200
+"""
+
+import argparse
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from transcribe_batch import _list_group, list_filters, poll_job_statuses  # noqa: E402
+
+STATUSES = ("QUEUED", "IN_PROGRESS", "COMPLETED", "FAILED")
+
+class FakeAccount:
+    def __init__(self, jobs):
+        self.jobs = jobs  # name -> status
+        self.calls = 0
+
+    def list_transcription_jobs(self, Status, MaxResults=100, JobNameContains="", NextToken=None):
+        self.calls += 1
+        names = sorted(n for n, st in self.jobs.items() if st == Status and JobNameContains in n)
+        first = int(NextToken or 0)
+        out = {"TranscriptionJobSummaries": [{"TranscriptionJobName": n, "TranscriptionJobStatus": Status}
+                                             for n in names[first:first + MaxResults]]}
+        if first + MaxResults < len(names):
+            out["NextToken"] = str(first + MaxResults)
+        return out
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self.calls += 1
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName,
+                                     "TranscriptionJobStatus": self.jobs[TranscriptionJobName]}}
+
+def make_account(history: int, batch: int, seed: int):
+    rng = random.Random(seed)
+    jobs = {}
+    for i in range(history):  # finished jobs from earlier years and other series
+        series = rng.choice(["EFRL-1985", "EFRL-1986", "HooverUncommon-2018", "job-Thomas-Sowell"])
+        jobs[f"{series}-{i:05d}"] = rng.choice(["COMPLETED"] * 9 + ["FAILED"])
+    names = [f"EFRL-1989-{m:02d}-{d:02d}-1" for m in range(1, 13) for d in range(1, 29)][:batch * 3 // 4]
+    names += [f"HooverUncommon-2019-{i:03d}" for i in range(batch - len(names) - 2)]
+    names += ["x1", "test"]
+    for n in names:
+        jobs[n] = rng.choice(STATUSES)
+    return jobs, names
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--history", type=int, default=5000, help="Finished jobs already in the account")
+    ap.add_argument("--batch", type=int, default=60, help="Jobs being polled")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    jobs, names = make_account(args.history, args.batch, args.seed)
+    truth = {n: jobs[n] for n in names}
+
+    single = FakeAccount(jobs)
+    prefix = os.path.commonprefix(sorted(names))
+    old = _list_group(single, set(names), prefix, False, 1000, {})
+    grouped = FakeAccount(jobs)
+    new = poll_job_statuses(grouped, names)
+
+    groups, singles = list_filters(names)
+    print(f"{len(names)} jobs polled, {len(jobs)} jobs in the account")
+    print(f"  one filter ({prefix!r}):        {single.calls:5d} API calls")
+    print(f"  per stem {sorted(groups)} + {len(singles)} gets: {grouped.calls:5d} API calls")
+    problems = []
+    if old != truth:
+        problems.append("single-filter poll resolved wrong statuses")
+    if new != truth:
+        problems.append("grouped poll resolved wrong statuses")
+    if grouped.calls > len(names):
+        problems.append(f"grouped poll made {grouped.calls} calls for {len(names)} jobs")
+    for p in problems:
+        print(f"FAIL: {p}")
+    if problems:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+bench_render.py
+---------------
+1. Regression check, to run before merging any renderer change: re-render every
+   outputs/*.json with the default options through each path the CLI can take
+   (to_transcript on the parsed dict, render_file from the JSON, with --stream,
+   and from a cold then warm transcript cache) and compare byte-for-byte with the
+   committed outputs/*.txt. Any difference is printed with its first differing
+   line and makes the script exit 1 (before the timing, or alone with --check-only).
+2. Timing: the production renderer (to_transcript on the parsed dict, render_file from
+   the JSON) against reference_render.baseline_to_transcript, a verbatim copy of the
+   original string-flushing to_transcript, on synthetic shows of --hours / 4, / 2 and
+   --hours with long single-speaker stretches: both on the parsed dict, and both from
+   the JSON file to the written output. The outputs must agree. Per-item times show
+   how each path scales with show length (from the file, both grow with the cyclic GC
+   walking the parsed dicts). A profile of the largest baseline run splits its time
+   between flush() and the find_speaker scan. flush()'s same-speaker merge looked at
+   the text after the timestamp and so never fired; flush() re-split only the previous
+   utterance, which is linear in total text.
+
+USAGE:
+    python benchmarks/bench_render.py --check-only      # the pre-merge check
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --outputs outputs --hours 3
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from diarization_to_markdown import render_file, to_transcript  # noqa: E402
+from reference_render import baseline_to_transcript  # noqa: E402
+from transcript_cache import TranscriptCache  # noqa: E402
+
+RENDER_PATHS = (("render_file", {}), ("render_file --stream", {"stream": True}),
+                ("render_file cache miss", {"cache": True}), ("render_file cache hit", {"cache": True}))
+
+def first_difference(got: str, want: str) -> str:
+    got_lines, want_lines = got.splitlines(), want.splitlines()
+    for i, (g, w) in enumerate(zip(got_lines, want_lines)):
+        if g != w:
+            return f"line {i + 1}:\n      got:  {g[:120]!r}\n      want: {w[:120]!r}"
+    if len(got_lines) != len(want_lines):
+        return f"{len(got_lines)} lines, expected {len(want_lines)}"
+    return "line endings or trailing newline differ"
+
+def render_paths(json_path: Path, tmp: Path, cache: TranscriptCache):
+    """(path name, rendered text) for each way the CLI can render json_path."""
+    obj = json.loads(json_path.read_text(encoding="utf-8"))
+    yield "to_transcript", to_transcript(obj, {}, None, None, "Other")
+    out = tmp / f"{json_path.stem}.txt"
+    for name, kwargs in RENDER_PATHS:
+        if kwargs.get("cache"):
+            kwargs = {"cache": cache}
+        render_file(str(json_path), str(out), {}, None, None, "Other", **kwargs)
+        yield name, out.read_text(encoding="utf-8")
+
+def check_outputs(folder: Path) -> int:
+    failures = 0
+    pairs = [(j, j.with_suffix(".txt")) for j in sorted(folder.glob("*.json")) if j.with_suffix(".txt").exists()]
+    if not pairs:
+        print(f"regression: no JSON + TXT pairs in {folder}")
+        return 1
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TranscriptCache(str(Path(tmp) / "cache"))
+        for json_path, txt_path in pairs:
+            want = txt_path.read_text(encoding="utf-8")
+            for name, got in render_paths(json_path, Path(tmp), cache):
+                if got != want:
+                    print(f"MISMATCH {json_path.name} via {name}: {first_difference(got, want)}")
+                    failures += 1
+    print(f"regression: {len(pairs)} outputs x {1 + len(RENDER_PATHS)} render paths, {failures} mismatches")
+    return failures
+
+def synthetic_show(hours: float, seed: int):
+    """Mostly one speaker with long monologues, interrupted by short interjections."""
+    rng = random.Random(seed)
+    vocab = [w for w in "the of and to a in is that for it as was with be by on not he this are or".split()]
+    timeline, items = [], []
+    t = 0.0
+    while t < hours * 3600.0:
+        spk = "spk_0" if rng.random() < 0.7 else f"spk_{rng.randint(1, 3)}"
+        seg_len = rng.uniform(60.0, 300.0) if spk == "spk_0" else rng.uniform(1.0, 6.0)
+        start = t
+        while t < start + seg_len:
+            d = rng.uniform(0.15, 0.45)
+            items.append({"type": "pronunciation", "start_time": f"{t:.3f}", "end_time": f"{t + d:.3f}",
+                          "alternatives": [{"content": rng.choice(vocab)}]})
+            if rng.random() < 0.08:
+                items.append({"type": "punctuation", "alternatives": [{"content": rng.choice(".,?")}]})
+            t += d
+        timeline.append((start, t, spk))
+    return timeline, items
+
+def synthetic_json(timeline, items):
+    """A Transcribe JSON holding the synthetic show."""
+    segments = [{"speaker_label": spk, "start_time": f"{start:.3f}", "end_time": f"{end:.3f}"}
+                for start, end, spk in timeline]
+    return {"results": {"items": items, "speaker_labels": {"segments": segments}}}
+
+def baseline_from_file(json_path: Path, out: Path):
+    """What the original CLI did per file: json.load, to_transcript, write."""
+    obj = json.loads(json_path.read_text(encoding="utf-8"))
+    out.write_text(baseline_to_transcript(obj, {}, None, None, "Other"), encoding="utf-8")
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--outputs", default=str(ROOT / "outputs"), help="Folder of JSON + rendered TXT pairs")
+    ap.add_argument("--hours", type=float, default=3.0)
+    ap.add_argument("--seed", type=int, default=1989)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--check-only", action="store_true", help="Only run the regression check")
+    args = ap.parse_args()
+
+    if check_outputs(Path(args.outputs)):
+        print("FAIL: rendered output differs from the committed outputs/*.txt")
+        sys.exit(1)
+    if args.check_only:
+        return
+
+    print(f"{'hours':>6s} {'items':>8s} {'path':<24s} {'best':>8s} {'us/item':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for hours in (args.hours / 4, args.hours / 2, args.hours):
+            obj = synthetic_json(*synthetic_show(hours, args.seed))
+            json_path, out = Path(tmp) / "show.json", Path(tmp) / "show.txt"
+            json_path.write_text(json.dumps(obj), encoding="utf-8")
+            n = len(obj["results"]["items"])
+            want = baseline_to_transcript(obj, {}, None, None, "Other")
+            paths = (("baseline_to_transcript", lambda: baseline_to_transcript(obj, {}, None, None, "Other")),
+                     ("to_transcript", lambda: to_transcript(obj, {}, None, None, "Other")),
+                     ("baseline, from the file", lambda: baseline_from_file(json_path, out)),
+                     ("render_file", lambda: render_file(str(json_path), str(out), {}, None, None, "Other")))
+            for name, fn in paths:
+                secs = best_of(fn, args.repeat)
+                print(f"{hours:6g} {n:8d} {name:<24s} {secs:7.3f}s {secs / n * 1e6:8.2f}")
+            if to_transcript(obj, {}, None, None, "Other") != want or out.read_text(encoding="utf-8") != want:
+                print("FAIL: the production renderer and baseline_to_transcript disagree on the synthetic show")
+                sys.exit(1)
+
+    profile = cProfile.Profile()
+    profile.runcall(baseline_to_transcript, obj, {}, None, None, "Other")
+    stats = pstats.Stats(profile).stats
+    for (_, _, func), (_, _, _, cumulative, _) in sorted(stats.items()):
+        if func in ("flush", "_baseline_find_speaker"):
+            print(f"baseline_to_transcript, {args.hours:g} h, profiled: {func} {cumulative:.3f}s cumulative")
+
+if __name__ == "__main__":
+    main()
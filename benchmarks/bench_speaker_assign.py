@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_speaker_assign.py
+-----------------------
+Speaker assignment (speaker_assign.py, used by transcribe_diarize.py) on a
+synthetic diarization, no model needed: the per-word pick_speaker_for_span loop
+over every track against the vectorized assign_segment_speakers, checking both
+pick the same speaker for every Whisper segment. Turns overlap, touch and leave
+gaps; some segments have no words.
+
+Needs NumPy and pyannote.core (for the Annotation and the reference loop), not
+faster-whisper, pyannote.audio or torch.
+
+USAGE:
+    python benchmarks/bench_speaker_assign.py --minutes 60
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "Transcription Options" / "whistper_pyannote"))
+
+from pyannote.core import Annotation, Segment as PSeg  # noqa: E402
+
+from speaker_assign import Segment, Word, assign_segment_speakers, pick_speaker_for_span  # noqa: E402
+
+def synthetic_diarization(minutes: float, speakers: int, rng: random.Random) -> Annotation:
+    ann = Annotation()
+    t = 0.0
+    while t < minutes * 60:
+        dur = rng.uniform(0.5, 25.0)
+        ann[PSeg(t, t + dur)] = f"SPEAKER_{rng.randrange(speakers):02d}"
+        roll = rng.random()
+        t = t + dur + (rng.uniform(0.1, 2.0) if roll < 0.3 else 0.0 if roll < 0.5 else -rng.uniform(0.0, 1.0))
+    return ann
+
+def synthetic_segments(minutes: float, rng: random.Random):
+    segments = []
+    t = 0.0
+    while t < minutes * 60:
+        words = []
+        for _ in range(rng.randint(0, 20)):
+            d = rng.uniform(0.1, 0.6)
+            words.append(Word(t, t + d, " w"))
+            t += d + rng.uniform(0.0, 0.3)
+        end = t if words else t + rng.uniform(0.5, 3.0)
+        segments.append(Segment(words[0].start if words else t, end, "", words))
+        t = end + rng.uniform(0.0, 1.5)
+    return segments
+
+def per_word_loop(segments, diarization):
+    """The original main() loop."""
+    out = []
+    for seg in segments:
+        if seg.words:
+            votes = Counter()
+            for w in seg.words:
+                mid = (w.start + w.end) / 2.0
+                votes[pick_speaker_for_span(diarization, mid - 0.05, mid + 0.05)] += 1
+            out.append(votes.most_common(1)[0][0])
+        else:
+            out.append(pick_speaker_for_span(diarization, seg.start, seg.end))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=60.0)
+    ap.add_argument("--speakers", type=int, default=6)
+    ap.add_argument("--seed", type=int, default=2011)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    diarization = synthetic_diarization(args.minutes, args.speakers, rng)
+    segments = synthetic_segments(args.minutes, rng)
+    n_words = sum(len(s.words) for s in segments)
+    print(f"{len(list(diarization.itertracks()))} turns, {len(segments)} segments, {n_words} words ({args.minutes:g} min)")
+
+    t0 = time.perf_counter()
+    fast = assign_segment_speakers(segments, diarization)
+    t_fast = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    slow = per_word_loop(segments, diarization)
+    t_slow = time.perf_counter() - t0
+
+    mismatches = sum(a != b for a, b in zip(slow, fast))
+    print(f"per-word loop:  {t_slow:8.3f}s")
+    print(f"vectorized:     {t_fast:8.3f}s")
+    print(f"speedup: {t_slow / max(t_fast, 1e-9):.0f}x, mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
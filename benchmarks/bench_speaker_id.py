@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+bench_speaker_id.py
+-------------------
+speaker_identity.py on the 2011 show (the m4a chunks in 'Transcription Options/chunks'
+with asrOutput.json's speaker labels; spk_0 is Phyllis Schlafly and spk_1 Thomas
+Sowell, spk_2/spk_3 the commercials, by alignment with control.txt):
+- accuracy: enroll Phyllis and Sowell from the first --split seconds, then identify
+  every label of the rest of the show, as recorded and through a simulated other
+  channel (band-limited, quieter, with hiss). Phyllis and Sowell must get their
+  names back and the commercial voices must stay unnamed; exits non-zero otherwise.
+  The similarity margins are printed so --threshold can be judged;
+- speed: decode + prints for the whole show, and the projected time to label
+  --shows shows (a year is 52) on one core;
+- lookup: identify() against stores of 1k..100k random prints.
+Needs ffmpeg (or FFMPEG=/path/to/ffmpeg).
+
+USAGE:
+    python benchmarks/bench_speaker_id.py
+    python benchmarks/bench_speaker_id.py --split 1200 --threshold 0.6
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from speaker_identity import (DEFAULT_THRESHOLD, DIM, SAMPLE_RATE, SpeakerStore,  # noqa: E402
+                              decode_audio, show_prints)
+from transcript_ingest import ingest  # noqa: E402
+from word_table import SegmentTable  # noqa: E402
+
+SHOW = ROOT / "Transcription Options"
+KNOWN = {"spk_0": "Phyllis Schlafly", "spk_1": "Thomas Sowell"}
+
+def window(segments: SegmentTable, samples: np.ndarray, lo: float, hi: float):
+    """The segments starting in [lo, hi) and the audio from lo, as if it were its own show."""
+    keep = (segments.start >= lo) & (segments.start < hi)
+    part = SegmentTable(segments.start[keep] - lo, segments.end[keep] - lo, segments.speaker[keep], segments.labels)
+    return part, samples[int(lo * SAMPLE_RATE):int(min(hi + 600, len(samples) / SAMPLE_RATE) * SAMPLE_RATE)]
+
+def other_channel(samples: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Cheap stand-in for another studio/tape: 3-tap low-pass, -6 dB, white noise."""
+    hiss = np.random.default_rng(seed).normal(0, 0.003, len(samples))
+    return (np.convolve(samples, np.ones(3) / 3, mode="same") * 0.5 + hiss).astype(np.float32)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--split", type=float, default=1500, help="Enroll from [0, split), identify on the rest")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    ap.add_argument("--shows", type=int, default=52, help="Shows to project the labelling time for")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    samples = np.concatenate([decode_audio(str(p)) for p in sorted((SHOW / "chunks").glob("*.m4a"))])
+    t_decode = time.perf_counter() - t0
+    _table, segments = ingest(str(SHOW / "Other Transcripts" / "asrOutput.json"))
+    hours = len(samples) / SAMPLE_RATE / 3600
+    t0 = time.perf_counter()
+    show_prints(segments, samples)
+    t_prints = time.perf_counter() - t0
+
+    store = SpeakerStore.load("")
+    store.enroll("first half", show_prints(*window(segments, samples, 0, args.split)), KNOWN)
+    bad = 0
+    for condition, audio in (("as recorded", samples), ("other channel", other_channel(samples))):
+        prints = show_prints(*window(segments, audio, args.split, float("inf")))
+        labels, names, best = store.scores(prints)
+        got = store.identify(prints, args.threshold)
+        print(f"{condition}: similarity to {', '.join(names)}")
+        for label, row in zip(labels, best):
+            name = got.get(label, ("",))[0]
+            ok = name == KNOWN.get(label, "")
+            bad += not ok
+            print(f"  {label} ({prints[label][1]:4.0f}s speech) {np.array2string(row, precision=3)} -> "
+                  f"{name or '(unnamed)'}{'' if ok else '   WRONG, expected ' + KNOWN.get(label, '(unnamed)')}")
+
+    per_show = t_decode + t_prints
+    print(f"speed: {hours * 60:.0f} min show, decode {t_decode:.2f}s + prints {t_prints:.2f}s "
+          f"= {per_show:.2f}s ({hours * 3600 / per_show:.0f}x real time); {args.shows} shows ~ {per_show * args.shows / 60:.1f} min on one core")
+
+    rng = np.random.default_rng(0)
+    query = {f"spk_{i}": (v / np.linalg.norm(v), 60.0) for i, v in enumerate(rng.normal(size=(10, DIM)).astype(np.float32))}
+    for n in (1000, 10000, 100000):
+        v = rng.normal(size=(n, DIM)).astype(np.float32)
+        big = SpeakerStore([f"name {i % (n // 10)}" for i in range(n)], ["synthetic"] * n,
+                           v / np.linalg.norm(v, axis=1, keepdims=True), np.full(n, 60, np.float32))
+        big.identify(query)
+        t0 = time.perf_counter()
+        for _ in range(10):
+            big.identify(query)
+        print(f"lookup: 10 labels vs {n:6d} prints ({n // 10} names) {(time.perf_counter() - t0) / 10 * 1000:.2f}ms")
+    if bad:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+bench_speaker_lookup.py
+-----------------------
+Compare the linear find_speaker scan against SpeakerIndex (bisect per word, kept in
+reference_render.py) and SegmentTable.lookup (one searchsorted over all words) on a
+synthetic 3-hour diarized transcript, and check that all resolve identical speakers
+(including overlapping segments, touching boundaries and gaps).
+
+USAGE:
+    python benchmarks/bench_speaker_lookup.py --hours 3
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from diarization_to_markdown import find_speaker  # noqa: E402
+from reference_render import SpeakerIndex  # noqa: E402
+from word_table import SegmentTable  # noqa: E402
+
+def synthetic_timeline(hours: float, speakers: int, seed: int):
+    """Segments of 2-40s with occasional gaps, touching edges and overlaps."""
+    rng = random.Random(seed)
+    timeline = []
+    t = 0.0
+    total = hours * 3600.0
+    while t < total:
+        dur = rng.uniform(2.0, 40.0)
+        start = round(t, 3)
+        end = round(t + dur, 3)
+        timeline.append((start, end, f"spk_{rng.randrange(speakers)}"))
+        roll = rng.random()
+        if roll < 0.2:
+            t = end + rng.uniform(0.1, 3.0)      # gap
+        elif roll < 0.4:
+            t = end                              # touching boundary
+        else:
+            t = end - rng.uniform(0.0, 1.5)      # overlap
+    return timeline
+
+def synthetic_word_times(timeline, words_per_sec: float, seed: int):
+    rng = random.Random(seed + 1)
+    total = timeline[-1][1] + 5.0
+    times = []
+    t = 0.0
+    while t < total:
+        times.append(round(t, 3))
+        t += rng.expovariate(words_per_sec)
+    # Probe every boundary exactly as well
+    for s, e, _ in timeline:
+        times.append(s)
+        times.append(e)
+    times.sort()
+    return times
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, default=3.0)
+    ap.add_argument("--speakers", type=int, default=4)
+    ap.add_argument("--words-per-sec", type=float, default=2.5)
+    ap.add_argument("--seed", type=int, default=1989)
+    args = ap.parse_args()
+
+    timeline = synthetic_timeline(args.hours, args.speakers, args.seed)
+    times = synthetic_word_times(timeline, args.words_per_sec, args.seed)
+    print(f"{len(timeline)} segments, {len(times)} lookups ({args.hours:g} h)")
+
+    t0 = time.perf_counter()
+    linear = [find_speaker(timeline, t) for t in times]
+    t_linear = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = SpeakerIndex(timeline)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    indexed = [index.lookup(t) for t in times]
+    t_index = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    segments = SegmentTable.from_timeline(timeline)
+    ids = segments.lookup(np.array(times))
+    t_table = time.perf_counter() - t0
+    vectorized = [segments.labels[i] if i >= 0 else None for i in ids.tolist()]
+
+    mismatches = sum(1 for a, b, c in zip(linear, indexed, vectorized) if not a == b == c)
+    print(f"find_speaker (linear):     {t_linear:8.3f}s")
+    print(f"SpeakerIndex build:        {t_build:8.3f}s")
+    print(f"SpeakerIndex lookups:      {t_index:8.3f}s")
+    print(f"SegmentTable build+lookup: {t_table:8.3f}s")
+    print(f"speedup: {t_linear / max(t_build + t_index, 1e-9):.1f}x (index), "
+          f"{t_linear / max(t_table, 1e-9):.1f}x (vectorized), mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
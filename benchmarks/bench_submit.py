@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+bench_submit.py
+---------------
+Check transcribe_batch.submit_jobs against a botocore Stubber'd Transcribe client
+(no AWS account or network needed), with the backoff and rate-limit sleeps
+recorded instead of slept:
+- ThrottlingException x2, then OK          -> submitted after 2 retries
+- ConflictException                        -> skipped, listed as existing
+- AccessDeniedException                    -> failed, not retried
+- ThrottlingException beyond --max-retries -> failed after max-retries retries
+- a row without s3_uri                     -> skipped, no API call
+- resubmission, delete throttled x2        -> deleted after 2 retries, then started
+- resubmission, delete AccessDenied        -> that row failed, not started, the batch goes on
+and that the submitted/failed/skipped summary, the retry count and the requests
+sent are as expected. Then times --jobs submissions through the stub at
+--submit-rate to show the token bucket's schedule (simulated clock).
+Exits non-zero on any mismatch.
+
+USAGE:
+    python benchmarks/bench_submit.py
+    python benchmarks/bench_submit.py --jobs 500 --submit-rate 5
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import boto3  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+import metrics  # noqa: E402
+from transcribe_batch import TokenBucket, row_job_name, standard_job_request, start_standard_job, submit_jobs  # noqa: E402
+
+MAX_RETRIES = 3
+
+class FakeClock:
+    """A monotonic clock that only moves when something sleeps on it."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, secs: float):
+        self.sleeps.append(secs)
+        self.now += secs
+
+def job_args(**overrides) -> SimpleNamespace:
+    base = dict(csv="index.csv", output_bucket="out-bucket", output_prefix="transcripts/", language_code="en-US",
+                force_channel=False, max_speakers=2, redact_pii=False)
+    base.update(overrides)
+    return SimpleNamespace(**base)
+
+def stub_client():
+    client = boto3.client("transcribe", region_name="us-east-1", aws_access_key_id="test",
+                          aws_secret_access_key="test")
+    return client, Stubber(client)
+
+def started(name: str):
+    return {"TranscriptionJob": {"TranscriptionJobName": name, "TranscriptionJobStatus": "IN_PROGRESS"}}
+
+def check_paths() -> list:
+    args = job_args()
+    rows = [
+        {"s3_uri": "s3://audio/throttled.mp3", "guest_name": "A", "job_name": "EFRL-throttled"},
+        {"s3_uri": "s3://audio/conflict.mp3", "guest_name": "B", "job_name": "EFRL-conflict"},
+        {"s3_uri": "s3://audio/denied.mp3", "guest_name": "C", "job_name": "EFRL-denied"},
+        {"s3_uri": "s3://audio/exhausted.mp3", "guest_name": "D", "job_name": "EFRL-exhausted"},
+        {"s3_uri": "", "guest_name": "E", "job_name": "EFRL-no-uri"},
+        {"s3_uri": "s3://audio/redo.mp3", "guest_name": "F", "job_name": "EFRL-redo"},
+        {"s3_uri": "s3://audio/redo-denied.mp3", "guest_name": "G", "job_name": "EFRL-redo-denied"},
+    ]
+    client, stubber = stub_client()
+    method = "start_transcription_job"
+    req = {row_job_name(r): standard_job_request(r, args) for r in rows if r["s3_uri"]}
+    for _ in range(2):
+        stubber.add_client_error(method, "ThrottlingException", http_status_code=400,
+                                 expected_params=req["EFRL-throttled"])
+    stubber.add_response(method, started("EFRL-throttled"), req["EFRL-throttled"])
+    stubber.add_client_error(method, "ConflictException", http_status_code=409, expected_params=req["EFRL-conflict"])
+    stubber.add_client_error(method, "AccessDeniedException", http_status_code=403, expected_params=req["EFRL-denied"])
+    for _ in range(MAX_RETRIES + 1):
+        stubber.add_client_error(method, "ThrottlingException", http_status_code=400,
+                                 expected_params=req["EFRL-exhausted"])
+    delete = "delete_transcription_job"
+    for _ in range(2):
+        stubber.add_client_error(delete, "ThrottlingException", http_status_code=400,
+                                 expected_params={"TranscriptionJobName": "EFRL-redo"})
+    stubber.add_response(delete, {}, {"TranscriptionJobName": "EFRL-redo"})
+    stubber.add_response(method, started("EFRL-redo"), req["EFRL-redo"])
+    stubber.add_client_error(delete, "AccessDeniedException", http_status_code=403,
+                             expected_params={"TranscriptionJobName": "EFRL-redo-denied"})
+
+    clock = FakeClock()
+    metrics.METRICS.reset()
+    metrics.METRICS.enabled = True
+    with stubber:
+        # concurrency 1: the Stubber hands out its queued responses in order
+        summary = submit_jobs(client, rows, args, start_standard_job, concurrency=1, retries=MAX_RETRIES,
+                              bucket=TokenBucket(rate=0), sleep=clock.sleep,
+                              delete_first=["EFRL-redo", "EFRL-redo-denied"])
+        unused = len(stubber._queue)
+    metrics.METRICS.enabled = False
+    counters = metrics.METRICS.snapshot()["counters"]
+
+    expect = {"submitted": ["EFRL-throttled", "EFRL-redo"], "skipped": ["EFRL-conflict", "EFRL-no-uri"],
+              "failed": ["EFRL-denied", "EFRL-exhausted", "EFRL-redo-denied"], "existing": ["EFRL-conflict"]}
+    problems = []
+    for key, names in expect.items():
+        if summary[key] != names:
+            problems.append(f"{key}: {summary[key]} (expected {names})")
+    retries = 2 + MAX_RETRIES + 2
+    if counters.get("transcribe.throttle_retries") != retries:
+        problems.append(f"throttle_retries {counters.get('transcribe.throttle_retries')} (expected {retries})")
+    if len(clock.sleeps) != retries:
+        problems.append(f"{len(clock.sleeps)} backoff sleeps (expected {retries})")
+    calls = 3 + 1 + 1 + MAX_RETRIES + 1 + 1
+    if counters.get("transcribe.api_calls.start") != calls:
+        problems.append(f"{counters.get('transcribe.api_calls.start')} start calls (expected {calls})")
+    if counters.get("transcribe.api_calls.delete") != 4:
+        problems.append(f"{counters.get('transcribe.api_calls.delete')} delete calls (expected 4)")
+    if unused:
+        problems.append(f"{unused} stubbed responses never requested")
+    print(f"stubbed paths: {summary['submitted']} submitted, {summary['skipped']} skipped, "
+          f"{summary['failed']} failed; {counters.get('transcribe.throttle_retries', 0):.0f} retries, "
+          f"{sum(clock.sleeps):.2f}s of backoff (not slept)")
+    return problems
+
+def check_rate(jobs: int, rate: float, concurrency: int) -> list:
+    args = job_args()
+    rows = [{"s3_uri": f"s3://audio/show-{i:04d}.mp3", "guest_name": "G", "job_name": f"show-{i:04d}"}
+            for i in range(jobs)]
+    client, stubber = stub_client()
+    for r in rows:
+        stubber.add_response("start_transcription_job", started(row_job_name(r)))
+    clock = FakeClock()
+    with stubber:
+        summary = submit_jobs(client, rows, args, start_standard_job, concurrency=1,
+                              bucket=TokenBucket(rate=rate, burst=concurrency, clock=clock, sleep=clock.sleep),
+                              sleep=clock.sleep)
+    # the first `burst` submissions go at once, the rest at `rate` per second
+    expected = max(0, jobs - concurrency) / rate if rate > 0 else 0.0
+    print(f"rate limit: {len(summary['submitted'])} jobs at {rate:g}/s (burst {concurrency}) "
+          f"take {clock.now:.1f}s simulated (expected {expected:.1f}s)")
+    problems = []
+    if len(summary["submitted"]) != jobs:
+        problems.append(f"rate run submitted {len(summary['submitted'])} of {jobs}")
+    if abs(clock.now - expected) > 1e-6 * max(1.0, expected):
+        problems.append(f"rate run took {clock.now:.3f}s simulated (expected {expected:.3f}s)")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=200, help="Submissions in the rate-limit run")
+    ap.add_argument("--submit-rate", type=float, default=5.0)
+    ap.add_argument("--submit-concurrency", type=int, default=8, help="Token bucket burst")
+    args = ap.parse_args()
+
+    problems = check_paths() + check_rate(args.jobs, args.submit_rate, args.submit_concurrency)
+    if problems:
+        for p in problems:
+            print(f"FAIL: {p}")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
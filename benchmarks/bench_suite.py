@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+bench_suite.py
+--------------
+Timed micro-benchmarks of the core transcript functions on synthetic Transcribe
+JSON (synthetic_transcribe.py, seeded) at 10 min, 1 h and 10 h, with results kept
+per machine so a slowdown between commits is flagged.
+
+Benchmarks (each at every size). What the CLIs run today:
+- render_file             : diarization_to_markdown.render_file on the JSON file, no cache (parse + speakers + write)
+- turns_from_tables       : WordTable/SegmentTable -> turns -> Markdown, the render path after parsing
+- SegmentTable.lookup     : speaker of every word in one searchsorted pass (slots rebuilt per call)
+- rover_vote              : merge_majority_vote.build_wtn + rover_vote over three drifted runs (merge default)
+- majority_vote_tables    : merge_majority_vote.majority_vote_tables over the same runs, 0.2 s buckets (--align bucket)
+The pre-columnar paths, kept to compare with older results:
+- extract_words           : merge_majority_vote.extract_words(doc)
+- majority_vote_word      : merge_majority_vote.majority_vote_word over three drifted runs, 0.2 s buckets
+- to_transcript           : diarization_to_markdown.to_transcript(doc, ...) (dict items + speakers + Markdown)
+- build_speaker_timeline  : diarization_to_markdown.build_speaker_timeline(speaker_labels)
+- find_speaker x1000      : diarization_to_markdown.find_speaker for 1000 word times spread over the show
+
+Timing is asv-style: inputs are built outside the timer, each benchmark is run enough
+times per sample to take >= 0.2 s (timeit autorange), and --repeat samples are taken
+in each of --rounds interleaved passes over the benchmarks, so every benchmark is
+sampled at different moments of the run. The minimum and median per call are
+reported, and all samples are stored.
+
+Results are appended to .bench_results/<machine>.jsonl (--results-dir, env
+BENCH_RESULTS_DIR), one line per run, tagged with the git commit (and whether the tree
+was dirty). Each run is compared with the latest stored commit other than this one
+(or --against COMMIT; with neither, this commit's earlier runs), made with the same
+generator settings; the samples of all that commit's stored runs are pooled. A
+benchmark is a REGRESSION, and the script exits non-zero, only if the slowdown holds
+across samples:
+- its median is more than --threshold (default 20%) above the baseline median, and
+- its median is above the slowest baseline sample, and
+- both still hold for each of --confirm (default 2) fresh measurements, taken after
+  every other benchmark of that size has run.
+A slowdown that is not confirmed is listed as noise and does not fail the run
+(back-to-back runs of one commit on a shared VM differ by up to ~30%).
+
+USAGE:
+    python benchmarks/bench_suite.py                       # all benchmarks, all sizes; compare, store
+    python benchmarks/bench_suite.py --sizes 10m,1h --bench to_transcript,find_speaker
+    python benchmarks/bench_suite.py --against 4cb34be --no-save
+    python benchmarks/bench_suite.py --history             # stored minimums per commit, no run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+
+from diarization_to_markdown import (build_speaker_timeline, find_speaker, format_markdown, render_file,  # noqa: E402
+                                     to_transcript, turns_from_tables)
+from merge_majority_vote import (bucketize, build_wtn, extract_words, majority_vote_tables,  # noqa: E402
+                                 majority_vote_word, prepare_tables, rover_vote, split_hyphenated, table_sequence)
+from synthetic_transcribe import synthetic_runs, synthetic_transcript  # noqa: E402
+from word_table import SegmentTable, WordTable  # noqa: E402
+
+SIZES = {"10m": 10, "1h": 60, "10h": 600}
+DEFAULT_RESULTS_DIR = os.environ.get("BENCH_RESULTS_DIR", str(ROOT / ".bench_results"))
+
+def vote_buckets(runs: List[Dict[str, Any]], bucket: float = 0.2) -> Dict[float, List]:
+    buckets: Dict[float, List] = defaultdict(list)
+    for doc in runs:
+        for t, w, c in extract_words(doc):
+            buckets[bucketize(t, bucket)].append((w, c))
+    return buckets
+
+def word_times(doc: Dict[str, Any], n: int, seed: int) -> List[float]:
+    starts = [float(it["start_time"]) for it in doc["results"]["items"] if it["type"] == "pronunciation"]
+    return random.Random(seed).sample(starts, min(n, len(starts)))
+
+# Each setup gets the show (runs[0]) and its drifted copies and returns the callable to time.
+
+def setup_majority_vote(runs):
+    buckets = vote_buckets(runs)
+    return lambda: majority_vote_word(buckets)
+
+def setup_find_speaker(runs):
+    timeline = build_speaker_timeline(runs[0]["results"]["speaker_labels"])
+    times = word_times(runs[0], 1000, 0)
+
+    def lookups():
+        for t in times:
+            find_speaker(timeline, t)
+    return lookups
+
+def tables(doc: Dict[str, Any]):
+    results = doc["results"]
+    return WordTable.from_items(results["items"]), SegmentTable.from_segments(results["speaker_labels"]["segments"])
+
+def fresh(segments: SegmentTable) -> SegmentTable:
+    """A copy without the cached lookup slots, as each rendered show starts with."""
+    return SegmentTable(segments.start, segments.end, segments.speaker, segments.labels)
+
+def setup_render_file(runs):
+    tmp = tempfile.TemporaryDirectory()
+    src, out = Path(tmp.name) / "show.json", Path(tmp.name) / "show.txt"
+    src.write_text(json.dumps(runs[0]), encoding="utf-8")
+
+    def render():
+        render_file(str(src), str(out), {}, None, None, "Other")
+        return tmp  # keeps the folder alive as long as the benchmark
+    return render
+
+def setup_turns_from_tables(runs):
+    table, segments = tables(runs[0])
+    return lambda: format_markdown(turns_from_tables(table, fresh(segments), {}, None, None, "Other"))
+
+def setup_lookup(runs):
+    table, segments = tables(runs[0])
+    times = table.start[table.is_word]
+    return lambda: fresh(segments).lookup(times)
+
+def merge_tables(runs):
+    return prepare_tables([WordTable.from_items(doc["results"]["items"]) for doc in runs], 0.9)
+
+def setup_rover(runs):
+    seqs = [split_hyphenated(table_sequence(t)) for t in merge_tables(runs)]
+    return lambda: rover_vote(build_wtn(seqs, 2.0), 0.5, 0.7)
+
+def setup_majority_tables(runs):
+    prepared = merge_tables(runs)
+    return lambda: majority_vote_tables(prepared, 0.2)
+
+BENCHMARKS: Dict[str, Callable[[List[Dict[str, Any]]], Callable[[], Any]]] = {
+    "render_file": setup_render_file,
+    "turns_from_tables": setup_turns_from_tables,
+    "SegmentTable.lookup": setup_lookup,
+    "rover_vote": setup_rover,
+    "majority_vote_tables": setup_majority_tables,
+    "extract_words": lambda runs: lambda: extract_words(runs[0]),
+    "majority_vote_word": setup_majority_vote,
+    "to_transcript": lambda runs: lambda: to_transcript(runs[0], {}, None, None, "Other"),
+    "build_speaker_timeline": lambda runs: lambda: build_speaker_timeline(runs[0]["results"]["speaker_labels"]),
+    "find_speaker x1000": setup_find_speaker,
+}
+
+def measure(fn: Callable[[], Any], repeat: int, min_sample: float = 0.2) -> Dict[str, Any]:
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:  # timeit's autorange, with our own sample length
+        if timer.timeit(number) >= min_sample:
+            break
+        number *= 2 if number < 10 else 5
+    return summarize([t / number for t in timer.repeat(repeat, number)], number, repeat)
+
+def summarize(samples: List[float], number: int, repeat: int) -> Dict[str, Any]:
+    return {"min": min(samples), "median": statistics.median(samples), "number": number, "repeat": repeat,
+            "samples": samples}
+
+def result_samples(r: Dict[str, Any]) -> List[float]:
+    return r.get("samples") or [r["min"], r["median"]]  # runs stored before samples were kept
+
+def pooled(baselines: List[Dict[str, Any]], key: str) -> Optional[List[float]]:
+    out = [t for rec in baselines if key in rec["results"] for t in result_samples(rec["results"][key])]
+    return out or None
+
+def verdict(samples: List[float], base: List[float], threshold: float) -> Tuple[float, str]:
+    """(median ratio, "slower" | "faster" | ""). Beyond the threshold is not enough: the
+    median must also lie outside every baseline sample, so one slow stretch of the
+    machine in either run does not count."""
+    median = statistics.median(samples)
+    ratio = median / statistics.median(base)
+    if ratio > 1 + threshold and median > max(base):
+        return ratio, "slower"
+    if ratio < 1 / (1 + threshold) and median < min(base):
+        return ratio, "faster"
+    return ratio, ""
+
+def git(*args: str) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def machine_id() -> str:
+    raw = f"{platform.node()}-{platform.machine()}-py{platform.python_version()}"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", raw)
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+def pick_baseline(history: List[Dict[str, Any]], commit: str, dirty: bool, against: Optional[str],
+                  settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every stored run of the baseline commit (same settings), oldest first."""
+    history = [rec for rec in history if all(rec.get(k) == v for k, v in settings.items())]
+    target = None
+    for rec in reversed(history):
+        if against:
+            if rec["commit"].startswith(against):
+                target = (rec["commit"], rec["dirty"])
+                break
+        elif (rec["commit"], rec["dirty"]) != (commit, dirty):
+            target = (rec["commit"], rec["dirty"])
+            break
+    if target is None:
+        if against or not history:
+            return []
+        target = (commit, dirty)  # only this commit stored so far: compare with its earlier runs
+    return [rec for rec in history if (rec["commit"], rec["dirty"]) == target]
+
+def fmt_secs(s: float) -> str:
+    return f"{s * 1e3:9.3f}ms" if s < 1 else f"{s:9.3f}s "
+
+def print_history(history: List[Dict[str, Any]]):
+    keys = sorted({k for rec in history for k in rec["results"]})
+    for key in keys:
+        print(key)
+        for rec in history:
+            if key in rec["results"]:
+                print(f"  {rec['date']}  {rec['commit'][:10]}{'+' if rec['dirty'] else ' '} {fmt_secs(rec['results'][key]['min'])}")
+
+def check_generator(seed: int) -> bool:
+    """Same seed, same document: otherwise stored results are not comparable."""
+    digest = lambda: hashlib.sha1(json.dumps(synthetic_transcript(10, 3, seed)).encode()).hexdigest()  # noqa: E731
+    return digest() == digest()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated, from {', '.join(SIZES)}")
+    ap.add_argument("--bench", default=None, help="Comma-separated name prefixes (default: all)")
+    ap.add_argument("--repeat", type=int, default=5, help="Samples per benchmark per round")
+    ap.add_argument("--speakers", type=int, default=3)
+    ap.add_argument("--drift", type=float, default=1.5, help="Seconds the last run drifts by the end of the show")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--threshold", type=float, default=0.20,
+                    help="Flag a median time that grew by more than this share")
+    ap.add_argument("--rounds", type=int, default=2,
+                    help="Interleaved passes over the benchmarks, --repeat samples each")
+    ap.add_argument("--confirm", type=int, default=2, help="Fresh measurements a suspected regression must also fail")
+    ap.add_argument("--against", default=None, help="Compare with the latest stored run of this commit (prefix)")
+    ap.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    ap.add_argument("--no-save", action="store_true", help="Do not store this run")
+    ap.add_argument("--history", action="store_true", help="Print the stored runs and exit")
+    args = ap.parse_args()
+
+    store = Path(args.results_dir) / f"{machine_id()}.jsonl"
+    history = load_history(store)
+    if args.history:
+        print_history(history)
+        return
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise SystemExit(f"Unknown sizes: {', '.join(unknown)} (choose from {', '.join(SIZES)})")
+    names = [n for n in BENCHMARKS if not args.bench or any(n.startswith(p.strip()) for p in args.bench.split(","))]
+    if not check_generator(args.seed):
+        print("FAIL: synthetic_transcribe is not deterministic for a fixed seed")
+        sys.exit(1)
+
+    commit = git("rev-parse", "HEAD") or "unknown"
+    dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    settings = {"seed": args.seed, "speakers": args.speakers, "drift": args.drift}
+    baseline = pick_baseline(history, commit, dirty, args.against, settings)
+    if args.against and not baseline:
+        raise SystemExit(f"No stored run for commit {args.against} with these --seed/--speakers/--drift in {store}")
+    last = baseline[-1] if baseline else None
+    print(f"commit {commit[:10]}{' (dirty)' if dirty else ''} on {machine_id()}; baseline: "
+          + (f"{last['commit'][:10]}{' (dirty)' if last['dirty'] else ''}, {len(baseline)} run(s) up to {last['date']}"
+             if last else "none"))
+    print(f"{'benchmark':24s} {'size':>4s} {'items':>7s} {'min':>11s} {'median':>11s} {'base med':>11s} {'ratio':>6s}")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    regressions: List[str] = []
+    improvements: List[str] = []
+    noisy: List[str] = []
+    for size in sizes:
+        t0 = time.perf_counter()
+        runs = synthetic_runs(SIZES[size], args.speakers, 3, args.drift, args.seed)
+        items = len(runs[0]["results"]["items"])
+        print(f"-- {size}: {items} items, {len(runs[0]['results']['speaker_labels']['segments'])} segments "
+              f"(generated in {time.perf_counter() - t0:.1f}s)")
+        fns = {name: BENCHMARKS[name](runs) for name in names}
+        samples: Dict[str, List[float]] = {name: [] for name in names}
+        number: Dict[str, int] = {}
+        for _ in range(args.rounds):  # interleaved, so each benchmark is sampled at different moments
+            for name, fn in fns.items():
+                r = measure(fn, args.repeat)
+                samples[name] += r["samples"]
+                number[name] = r["number"]
+        suspects = {}
+        for name in names:
+            key = f"{name}/{size}"
+            r = results[key] = summarize(samples[name], number[name], args.repeat * args.rounds)
+            base = pooled(baseline, key)
+            ratio, change = verdict(r["samples"], base, args.threshold) if base else (None, "")
+            if change == "slower":
+                suspects[name] = (key, base, ratio)
+            elif change == "faster":
+                improvements.append(key)
+            flag = {"slower": "  slower?", "faster": "  improved"}.get(change, "")
+            print(f"{name:24s} {size:>4s} {items:7d} {fmt_secs(r['min'])} {fmt_secs(r['median'])} "
+                  f"{fmt_secs(statistics.median(base)) if base else '          -'} "
+                  f"{f'{ratio:6.2f}' if ratio else '     -'}{flag}")
+        # a real slowdown shows again in fresh measurements taken after everything else ran; noise rarely does
+        again: Dict[str, List[Tuple[float, str]]] = {name: [] for name in suspects}
+        for _ in range(args.confirm):
+            for name, (key, base, _) in suspects.items():
+                again[name].append(verdict(measure(fns[name], args.repeat)["samples"], base, args.threshold))
+        for name, (key, base, ratio) in suspects.items():
+            confirmed = all(change == "slower" for _, change in again[name])
+            (regressions if confirmed else noisy).append(key)
+            print(f"  {key} {ratio:.2f}, rerun {', '.join(f'{x:.2f}' for x, _ in again[name]) or '-'}: "
+                  + ("REGRESSION" if confirmed else "not confirmed, noise"))
+        del runs
+
+    if not args.no_save:
+        store.parent.mkdir(parents=True, exist_ok=True)
+        record = {"commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%d %H:%M:%S"), "machine": machine_id(),
+                  "python": platform.python_version(), **settings, "results": results}
+        with open(store, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Stored in {store}")
+    if baseline:
+        print(f"{len(regressions)} regressions, {len(improvements)} improvements beyond {args.threshold:.0%}"
+              + (f"; {len(noisy)} within noise: {', '.join(noisy)}" if noisy else ""))
+    if regressions:
+        print("REGRESSIONS: " + ", ".join(regressions))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+bench_word_table.py
+-------------------
+Memory and time of the columnar WordTable against the per-item dicts it replaces,
+over the Transcribe JSONs in outputs/.
+
+- memory: traced bytes held by results.items (as json.load leaves it) vs. a WordTable
+- render: build_turns over items + SpeakerIndex (reference_render.py) vs. WordTable +
+  assign_speakers + iter_table_turns
+  (the rendered turns are compared and must be identical)
+
+USAGE:
+    python benchmarks/bench_word_table.py
+    python benchmarks/bench_word_table.py --glob "outputs/EFRL-1989-10-*.json"
+"""
+
+import argparse
+import glob
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from diarization_to_markdown import build_speaker_timeline, iter_table_turns, resolve_names  # noqa: E402
+from reference_render import SpeakerIndex, build_turns  # noqa: E402
+from word_table import SegmentTable, WordTable  # noqa: E402
+
+def traced(fn):
+    """(result, bytes still allocated by fn's result)."""
+    tracemalloc.start()
+    result = fn()
+    held, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held
+
+def rendered(turn):
+    """What a writer sees of a turn (the token split differs between the two builders)."""
+    return turn.speaker, turn.label, turn.start, turn.end, turn.text
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--glob", default=str(ROOT / "outputs" / "*.json"))
+    args = ap.parse_args()
+
+    paths = sorted(glob.glob(args.glob))
+    n_items = dict_bytes = table_bytes = 0
+    t_dicts = t_table = 0.0
+    mismatches = 0
+    for path in paths:
+        text = Path(path).read_text(encoding="utf-8")
+        obj, _ = traced(lambda: json.loads(text))
+        items = obj["results"]["items"]
+        _, held = traced(lambda: json.loads(json.dumps(items)))
+        table, held_table = traced(lambda: WordTable.from_items(items))
+        n_items += len(items)
+        dict_bytes += held
+        table_bytes += held_table
+
+        timeline = build_speaker_timeline(obj["results"].get("speaker_labels", {}))
+        name_map, allowed = resolve_names(timeline, {}, None, None)
+
+        t0 = time.perf_counter()
+        ref = build_turns(items, SpeakerIndex(timeline), name_map, allowed, "Other")
+        t_dicts += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        table = WordTable.from_items(items)
+        segments = SegmentTable.from_timeline(timeline)
+        table.assign_speakers(segments)
+        got = list(iter_table_turns(table, segments.labels, name_map, allowed, "Other"))
+        t_table += time.perf_counter() - t0
+        mismatches += [rendered(t) for t in ref] != [rendered(t) for t in got]
+
+    print(f"{len(paths)} files, {n_items} items")
+    print(f"memory: dicts {dict_bytes / n_items:7.1f} B/item   WordTable {table_bytes / n_items:6.1f} B/item "
+          f"({dict_bytes / max(table_bytes, 1):.1f}x smaller)")
+    print(f"render: dicts {t_dicts:7.3f}s   WordTable {t_table:7.3f}s (incl. building the table)")
+    print(f"turn mismatches: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+reference_render.py
+-------------------
+Earlier renderer implementations, kept for the benchmarks to check against and time
+against. Nothing outside benchmarks/ imports this.
+
+- baseline_to_transcript : to_transcript as it was before the streaming, columnar and
+  multi-format work, copied verbatim (find_speaker scan per word; utterance strings
+  flushed into a list).
+- SpeakerIndex, iter_turns, build_turns : the dict-based turn builder that came
+  between the two (bisect per word over the items as json.load leaves them). It
+  produced the same Turns as diarization_to_markdown.iter_table_turns.
+
+USAGE (as a library):
+    from reference_render import SpeakerIndex, baseline_to_transcript, build_turns
+"""
+
+import bisect
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diarization_to_markdown import Turn  # noqa: E402
+from word_table import interval_slots  # noqa: E402
+
+# ---- baseline (before any of the render changes) ----
+
+def _baseline_build_speaker_timeline(speaker_labels: Dict[str, Any]) -> List[Tuple[float, float, str]]:
+    timeline = []
+    for seg in speaker_labels.get("segments", []):
+        spk = seg["speaker_label"]
+        start = float(seg["start_time"])
+        end = float(seg["end_time"])
+        timeline.append((start, end, spk))
+    return timeline
+
+def _baseline_find_speaker(timeline: List[Tuple[float,float,str]], t: float) -> Optional[str]:
+    for start, end, spk in timeline:
+        if start <= t <= end:
+            return spk
+    return None
+
+def _baseline_speaking_durations(timeline: List[Tuple[float,float,str]]) -> Dict[str, float]:
+    dur: Dict[str, float] = {}
+    for s, e, spk in timeline:
+        dur[spk] = dur.get(spk, 0.0) + max(0.0, e - s)
+    return dur
+
+def _baseline_assign_names_for_topN(sorted_speakers: List[str], names_csv: Optional[str], keep_top: int) -> Dict[str, str]:
+    if not keep_top or keep_top <= 0:
+        return {}
+    top = sorted_speakers[:keep_top]
+    mapping: Dict[str, str] = {}
+    if names_csv:
+        names = [n.strip() for n in names_csv.split(",") if n.strip()]
+        for i, spk in enumerate(top):
+            label = names[i] if i < len(names) else f"Speaker {i+1}"
+            mapping[spk] = label
+    else:
+        for i, spk in enumerate(top):
+            mapping[spk] = f"Speaker {i+1}"
+    return mapping
+
+def baseline_to_transcript(json_obj: Dict[str, Any],
+                explicit_map: Dict[str, str],
+                names_csv: Optional[str],
+                keep_top: Optional[int],
+                other_label: str) -> str:
+    res = json_obj["results"]
+    timeline = _baseline_build_speaker_timeline(res.get("speaker_labels", {}))
+    items = res.get("items", [])
+
+    # Rank speakers by total duration
+    durs = _baseline_speaking_durations(timeline)
+    ranked = sorted(durs.keys(), key=lambda k: durs[k], reverse=True)
+
+    # Build name map
+    name_map = dict(explicit_map) if explicit_map else {}
+    if keep_top and keep_top > 0:
+        auto = _baseline_assign_names_for_topN(ranked, names_csv, keep_top)
+        for spk, label in auto.items():
+            name_map.setdefault(spk, label)
+    for spk in durs.keys():
+        if spk not in name_map:
+            name_map[spk] = spk
+
+    allowed: Optional[set] = None
+    if keep_top and keep_top > 0:
+        allowed = set(ranked[:keep_top])
+
+    utterances: List[str] = []
+    cur_spk: Optional[str] = None
+    cur_words: List[str] = []
+    segment_start_time: Optional[float] = None
+    segment_end_time: Optional[float] = None
+
+    def flush():
+        nonlocal cur_spk, cur_words, segment_start_time, segment_end_time
+        if cur_spk is not None and cur_words:
+            label = name_map.get(cur_spk, cur_spk)
+            if allowed is not None and cur_spk not in allowed:
+                label = other_label
+            text = ''.join(cur_words).strip()
+            if text:
+                # Format timestamps
+                time_info = ""
+                if segment_start_time is not None and segment_end_time is not None:
+                    start_min = int(segment_start_time // 60)
+                    start_sec = segment_start_time % 60
+                    end_min = int(segment_end_time // 60)
+                    end_sec = segment_end_time % 60
+                    time_info = f" [{start_min:02d}:{start_sec:05.2f} - {end_min:02d}:{end_sec:05.2f}]"
+                
+                if utterances and utterances[-1].split(']')[-1].strip().startswith(f"**{label}:** "):
+                    # Continuing same speaker - merge text but update end time
+                    prev = utterances.pop()
+                    # Extract the existing time range and update end time
+                    if '[' in prev and ']' in prev:
+                        start_part = prev.split('[')[1].split(' - ')[0]
+                        end_min = int(segment_end_time // 60)
+                        end_sec = segment_end_time % 60
+                        new_time_info = f" [{start_part} - {end_min:02d}:{end_sec:05.2f}]"
+                        label_and_text = prev.split(']', 1)[1]
+                        utterances.append(f"**{label}:**{new_time_info}{label_and_text} {text}")
+                    else:
+                        utterances.append(prev + " " + text)
+                else:
+                    utterances.append(f"**{label}:**{time_info} {text}")
+        cur_spk, cur_words = None, []
+        segment_start_time, segment_end_time = None, None
+
+    last_was_word = False
+    for it in items:
+        if it["type"] == "pronunciation":
+            start_time = float(it["start_time"])
+            end_time = float(it["end_time"])
+            spk = _baseline_find_speaker(timeline, start_time) or cur_spk
+            if spk != cur_spk:
+                flush()
+                cur_spk = spk
+                segment_start_time = start_time
+                last_was_word = False
+            # Update segment end time with the latest word's end time
+            segment_end_time = end_time
+            if last_was_word:
+                cur_words.append(' ')
+            cur_words.append(it["alternatives"][0]["content"])
+            last_was_word = True
+        else:
+            cur_words.append(it["alternatives"][0]["content"])
+            last_was_word = False
+
+    flush()
+    return "\n\n".join(utterances)
+
+# ---- dict-based turn builder (bisect per word) ----
+
+class SpeakerIndex:
+    """Sorted interval index over a speaker timeline.
+
+    Resolves the same speaker as find_speaker (first segment in timeline order
+    whose closed [start, end] contains t) in O(log n) per lookup. The timeline is
+    flattened once into elementary slots: every distinct boundary point, plus the
+    open gap between each pair of consecutive points, each mapped to its winner.
+    """
+
+    def __init__(self, timeline: List[Tuple[float, float, str]]):
+        points, at_seg, after_seg = interval_slots([s for s, _, _ in timeline], [e for _, e, _ in timeline])
+        self.points = points.tolist()
+        self.at_point = [timeline[i][2] if i >= 0 else None for i in at_seg.tolist()]
+        self.after_point = [timeline[i][2] if i >= 0 else None for i in after_seg.tolist()]
+
+    def lookup(self, t: float) -> Optional[str]:
+        i = bisect.bisect_left(self.points, t)
+        if i < len(self.points) and self.points[i] == t:
+            return self.at_point[i]
+        if i == 0:
+            return None
+        return self.after_point[i - 1]
+
+def build_turns(items: Iterable[Dict[str, Any]],
+                index: SpeakerIndex,
+                name_map: Dict[str, str],
+                allowed: Optional[set],
+                other_label: str) -> List[Turn]:
+    return list(iter_turns(items, index, name_map, allowed, other_label))
+
+def iter_turns(items: Iterable[Dict[str, Any]],
+                index: SpeakerIndex,
+                name_map: Dict[str, str],
+                allowed: Optional[set],
+                other_label: str) -> Iterator[Turn]:
+    """Group items into speaker turns, one per run of words resolved to the same speaker.
+    Consecutive turns may share a display label (e.g. two speakers bucketed into "Other");
+    they stay separate paragraphs, as they always have in the rendered output.
+    Turns are yielded as soon as they close, so writers can stream them."""
+    cur_spk: Optional[str] = None
+    cur_words: List[str] = []
+    segment_start_time: Optional[float] = None
+    segment_end_time: Optional[float] = None
+
+    def flush() -> Optional[Turn]:
+        nonlocal cur_spk, cur_words, segment_start_time, segment_end_time
+        turn = None
+        if cur_spk is not None and cur_words and ''.join(cur_words).strip():
+            label = name_map.get(cur_spk, cur_spk)
+            if allowed is not None and cur_spk not in allowed:
+                label = other_label
+            turn = Turn(cur_spk, label, segment_start_time, segment_end_time, cur_words)
+        cur_spk, cur_words = None, []
+        segment_start_time, segment_end_time = None, None
+        return turn
+
+    last_was_word = False
+    for it in items:
+        if it["type"] == "pronunciation":
+            start_time = float(it["start_time"])
+            end_time = float(it["end_time"])
+            spk = index.lookup(start_time) or cur_spk
+            if spk != cur_spk:
+                turn = flush()
+                if turn:
+                    yield turn
+                cur_spk = spk
+                segment_start_time = start_time
+                last_was_word = False
+            # Update segment end time with the latest word's end time
+            segment_end_time = end_time
+            if last_was_word:
+                cur_words.append(' ')
+            cur_words.append(it["alternatives"][0]["content"])
+            last_was_word = True
+        else:
+            cur_words.append(it["alternatives"][0]["content"])
+            last_was_word = False
+
+    turn = flush()
+    if turn:
+        yield turn
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+synthetic_transcribe.py
+-----------------------
+Seeded generator of Transcribe-shaped JSON for benchmarks: results.transcripts,
+items (pronunciation with alternatives/confidence/speaker_label, punctuation),
+speaker_labels.segments (with their item times) and audio_segments, as in
+asrOutput.json. The same seed always gives the same document.
+
+- duration and speaker count are free; speech runs at ~140 words/min with pauses,
+  in turns of 1-120 s (about 4 a minute, many of them short interjections, like the
+  shows in outputs/), spk_0 (the host) holding about half of them;
+- words follow a Zipf distribution over a fixed vocabulary (common English words
+  plus seeded pseudo-words), so hot and rare tokens look like a real show;
+- synthetic_runs() gives several "runs" of one show, as different services or
+  re-runs would transcribe it: run 0 is the base, the others drift linearly in time
+  (up to `drift` seconds by the end) with jitter, and substitute, drop or insert
+  words and move turn boundaries a little.
+
+USAGE (as a library):
+    from synthetic_transcribe import synthetic_runs, synthetic_transcript
+    doc = synthetic_transcript(minutes=60, speakers=3, seed=1)
+    runs = synthetic_runs(minutes=60, speakers=3, runs=3, drift=1.5, seed=1)
+
+USAGE (write files):
+    python benchmarks/synthetic_transcribe.py --minutes 600 --speakers 4 --runs 3 --drift 2 --out-dir /tmp/synth
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+COMMON = """the of and to a in is that it for was on are as with he they be at one have this from
+or had by not but what some we can out other were all there when up use your how said an each she
+which do their time if will way about many then them write would like so these her long make thing
+see him two has look more day could go come did number sound no most people my over know water than
+call first who may down side been now find any new work part take get place made live where after
+back little only round man year came show every good me give our under name very through just form
+sentence great think say help low line differ turn cause much mean before move right boy old too same
+tell does set three want air well also play small end put home read hand port large spell add even
+land here must big high such follow act why ask men change went light kind off need house picture try
+us again animal point mother world near build self earth father government school family children
+economy market policy country president congress court law tax money business state public freedom""".split()
+SYLLABLES = "ba be bi bo bu ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su ta te ti to tu".split()
+VOCAB_SIZE = 5000
+
+Word = Tuple[float, float, str, float, Optional[str], str]  # start, end, content, confidence, punct after, speaker
+
+def vocabulary(seed: int = 0) -> Tuple[List[str], List[float]]:
+    """The word list and its cumulative Zipf weights (s = 1.1)."""
+    rng = random.Random(seed)
+    words = list(COMMON)
+    seen = set(words)
+    while len(words) < VOCAB_SIZE:
+        w = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if w not in seen:
+            seen.add(w)
+            words.append(w)
+    cum, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1.0 / rank ** 1.1
+        cum.append(total)
+    return words, cum
+
+def base_words(minutes: float, speakers: int, seed: int) -> List[Word]:
+    """The show itself: timed words with speakers, confidences and punctuation."""
+    rng = random.Random(seed)
+    vocab, cum = vocabulary()
+    out: List[Word] = []
+    t = rng.uniform(0.5, 3.0)
+    total = minutes * 60.0
+    spk = "spk_0"
+    while t < total:
+        turn = rng.uniform(1.0, 5.0) if rng.random() < 0.45 else min(120.0, 2.0 + rng.expovariate(1 / 15))
+        turn_end = min(total, t + turn)
+        sentence_start = True
+        while t < turn_end:
+            n = max(1, int(rng.expovariate(1 / 8)))  # words before the next pause
+            for _ in range(n):
+                word = rng.choices(vocab, cum_weights=cum)[0]
+                if sentence_start:
+                    word = word.capitalize()
+                dur = rng.uniform(0.12, 0.5)
+                conf = min(1.0, max(0.05, rng.betavariate(8, 1)))
+                roll = rng.random()
+                punct = "." if roll < 0.06 else "," if roll < 0.12 else "?" if roll < 0.13 else None
+                sentence_start = punct in (".", "?")
+                out.append((t, t + dur, word, conf, punct, spk))
+                t += dur + rng.uniform(0.0, 0.08)
+            t += rng.uniform(0.15, 0.9)
+        if out and out[-1][4] is None:
+            s, e, w, c, _p, sp = out[-1]
+            out[-1] = (s, e, w, c, ".", sp)
+        t += rng.uniform(0.1, 1.5)
+        if speakers > 1:
+            spk = "spk_0" if spk != "spk_0" and rng.random() < 0.5 else f"spk_{rng.randint(1, speakers - 1)}"
+    return out
+
+def drifted(words: List[Word], drift: float, seed: int, sub_rate: float = 0.05, del_rate: float = 0.03,
+            ins_rate: float = 0.02) -> List[Word]:
+    """Another service's view of the same show: time drift, word errors, shifted turn edges."""
+    rng = random.Random(seed)
+    vocab, cum = vocabulary()
+    total = words[-1][1] if words else 1.0
+    out: List[Word] = []
+    for i, (s, e, w, c, p, spk) in enumerate(words):
+        if rng.random() < del_rate:
+            continue
+        shift = drift * s / total + rng.gauss(0.0, 0.03)
+        s, e = max(0.0, s + shift), max(0.0, e + shift)
+        if rng.random() < sub_rate:
+            w, c = rng.choices(vocab, cum_weights=cum)[0], rng.uniform(0.2, 0.7)
+        # The first words of a turn are sometimes given to the previous speaker
+        if i and words[i - 1][5] != spk and out and rng.random() < 0.3:
+            spk = out[-1][5]
+        out.append((s, e, w, c, p, spk))
+        if rng.random() < ins_rate:
+            gap = e + 0.01
+            out.append((gap, gap + 0.1, rng.choices(vocab, cum_weights=cum)[0], rng.uniform(0.1, 0.5), None, spk))
+    out.sort(key=lambda x: x[0])
+    return out
+
+def transcribe_json(words: List[Word], job_name: str) -> Dict[str, Any]:
+    """Lay words out as a Transcribe result document."""
+    items: List[Dict[str, Any]] = []
+    segments: List[Dict[str, Any]] = []
+    audio_segments: List[Dict[str, Any]] = []
+    texts: List[str] = []
+    seg: Optional[Dict[str, Any]] = None
+    seg_text: List[str] = []
+    seg_ids: List[int] = []
+    for s, e, w, c, p, spk in words:
+        if seg is None or seg["speaker_label"] != spk:
+            if seg is not None:
+                audio_segments.append({"id": len(audio_segments), "transcript": " ".join(seg_text),
+                                       "start_time": seg["start_time"], "end_time": seg["end_time"],
+                                       "speaker_label": seg["speaker_label"], "items": seg_ids})
+            seg = {"start_time": f"{s:.3f}", "end_time": f"{e:.3f}", "speaker_label": spk, "items": []}
+            segments.append(seg)
+            seg_text, seg_ids = [], []
+        start, end = f"{s:.3f}", f"{e:.3f}"
+        seg["end_time"] = end
+        seg["items"].append({"speaker_label": spk, "start_time": start, "end_time": end})
+        seg_ids.append(len(items))
+        items.append({"id": len(items), "type": "pronunciation", "alternatives": [{"confidence": f"{c:.3f}", "content": w}],
+                      "start_time": start, "end_time": end, "speaker_label": spk})
+        token = w
+        if p:
+            seg_ids.append(len(items))
+            items.append({"id": len(items), "type": "punctuation", "alternatives": [{"confidence": "0.0", "content": p}],
+                          "speaker_label": spk})
+            token += p
+        seg_text.append(token)
+        texts.append(token)
+    if seg is not None:
+        audio_segments.append({"id": len(audio_segments), "transcript": " ".join(seg_text),
+                               "start_time": seg["start_time"], "end_time": seg["end_time"],
+                               "speaker_label": seg["speaker_label"], "items": seg_ids})
+    labels = sorted({w[5] for w in words})
+    return {"jobName": job_name, "accountId": "000000000000", "status": "COMPLETED",
+            "results": {"transcripts": [{"transcript": " ".join(texts)}],
+                        "speaker_labels": {"channel_label": "ch_0", "speakers": len(labels), "segments": segments},
+                        "items": items, "audio_segments": audio_segments}}
+
+def synthetic_transcript(minutes: float, speakers: int = 3, seed: int = 0) -> Dict[str, Any]:
+    return transcribe_json(base_words(minutes, speakers, seed), f"synthetic-{minutes:g}m-{speakers}spk-{seed}")
+
+def synthetic_runs(minutes: float, speakers: int = 3, runs: int = 3, drift: float = 1.0,
+                   seed: int = 0) -> List[Dict[str, Any]]:
+    """`runs` transcripts of one show; run k > 0 drifts by up to drift * k / (runs - 1) seconds."""
+    words = base_words(minutes, speakers, seed)
+    out = [transcribe_json(words, f"synthetic-{minutes:g}m-{speakers}spk-{seed}-run0")]
+    for k in range(1, runs):
+        out.append(transcribe_json(drifted(words, drift * k / max(1, runs - 1), seed * 1000 + k),
+                                   f"synthetic-{minutes:g}m-{speakers}spk-{seed}-run{k}"))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Write seeded synthetic Transcribe JSONs.")
+    ap.add_argument("--minutes", type=float, default=60)
+    ap.add_argument("--speakers", type=int, default=3)
+    ap.add_argument("--runs", type=int, default=1, help="Transcripts of the same show (run 0 plus drifted copies)")
+    ap.add_argument("--drift", type=float, default=1.0, help="Seconds the last run has drifted by the end of the show")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out-dir", default=".")
+    args = ap.parse_args()
+
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for doc in synthetic_runs(args.minutes, args.speakers, args.runs, args.drift, args.seed):
+        path = out / f"{doc['jobName']}.json"
+        path.write_text(json.dumps(doc), encoding="utf-8")
+        print(f"Wrote {path} ({len(doc['results']['items'])} items, "
+              f"{len(doc['results']['speaker_labels']['segments'])} segments, {path.stat().st_size / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,14 @@ diarization_to_markdown.py
 Convert an Amazon Transcribe JSON into a speaker-named transcript.
 
 New features:
+- --formats md,srt,vtt,jsonl : Write several formats from one parse / one pass over the turns.
+- --batch DIR|CSV --jobs N : Render many JSONs in one process pool (see batch_render).
+- --index DB               : Add what was rendered to the full-text search index (transcript_index.py).
 - --keep-top-speakers N : Keep the N speakers with the most total speaking time; bucket the rest.
 - --other-label TEXT     : Label for non-top speakers (default: "Other").
 - --names "A,B,C"        : Assign these names to the top-N speakers in order of speaking time.
 - --map mapping.json     : Explicit mapping { "spk_0": "Host", ... } (honored for top speakers).
+- --map speakers.npz --audio show.mp3|DIR : Name speakers by voice from a speaker_identity.py store.
 - If neither --map nor --names is provided, top-N are named "Speaker 1..N" by duration order.
 
 Notes:
@@ -17,13 +21,37 @@ Notes:
 """
 
 import argparse
+import csv
+import hashlib
 import json
+import os
+import shlex
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterable, Iterator
 
-def load_mapping(path: Optional[str]) -> Dict[str, str]:
+import numpy as np
+
+from metrics import absorb, add_metrics_argument, enabled, incr, span, start_metrics, worker_call
+from speaker_identity import audio_for, is_speaker_store, store_mapping
+from transcript_cache import DEFAULT_CACHE_DIR, TranscriptCache, load_transcript, open_cache
+from transcript_index import TranscriptIndex
+from word_table import SegmentTable, WordTable, table_turns
+
+def load_mapping(path: Optional[str], json_path: Optional[str] = None, audio: Optional[str] = None) -> Dict[str, str]:
+    """speaker_label -> name from a JSON/YAML file, or from a speaker store (speakers.npz,
+    see speaker_identity.py) matched against json_path's show; audio is its recording or
+    a folder holding <json stem>.mp3."""
     if not path:
         return {}
+    if is_speaker_store(path):
+        if not json_path:
+            raise SystemExit(f"{path} is a speaker store: it names speakers per show, so a transcript is needed")
+        return store_mapping(path, json_path, audio_for(json_path, audio))
     if path.endswith((".yaml",".yml")):
         try:
             import yaml
@@ -36,8 +64,11 @@ def load_mapping(path: Optional[str]) -> Dict[str, str]:
             return json.load(f)
 
 def build_speaker_timeline(speaker_labels: Dict[str, Any]) -> List[Tuple[float, float, str]]:
+    return timeline_from_segments(speaker_labels.get("segments", []))
+
+def timeline_from_segments(segments: Iterable[Dict[str, Any]]) -> List[Tuple[float, float, str]]:
     timeline = []
-    for seg in speaker_labels.get("segments", []):
+    for seg in segments:
         spk = seg["speaker_label"]
         start = float(seg["start_time"])
         end = float(seg["end_time"])
@@ -50,11 +81,21 @@ def find_speaker(timeline: List[Tuple[float,float,str]], t: float) -> Optional[s
             return spk
     return None
 
+@dataclass
+class Turn:
+    """One rendered speaker turn."""
+    speaker: str        # Transcribe label, e.g. spk_0
+    label: str          # display name after mapping / top-N bucketing
+    start: float
+    end: float
+    tokens: List[str] = field(default_factory=list)  # contents; a word right after a word carries the space
+
+    @property
+    def text(self) -> str:
+        return ''.join(self.tokens).strip()
+
 def speaking_durations(timeline: List[Tuple[float,float,str]]) -> Dict[str, float]:
-    dur: Dict[str, float] = {}
-    for s, e, spk in timeline:
-        dur[spk] = dur.get(spk, 0.0) + max(0.0, e - s)
-    return dur
+    return SegmentTable.from_timeline(timeline).speaking_durations()
 
 def assign_names_for_topN(sorted_speakers: List[str], names_csv: Optional[str], keep_top: int) -> Dict[str, str]:
     if not keep_top or keep_top <= 0:
@@ -78,8 +119,14 @@ def to_transcript(json_obj: Dict[str, Any],
                 other_label: str) -> str:
     res = json_obj["results"]
     timeline = build_speaker_timeline(res.get("speaker_labels", {}))
-    items = res.get("items", [])
+    return format_markdown(turns_from_parts(timeline, res.get("items", []), explicit_map, names_csv, keep_top,
+                                            other_label))
 
+def resolve_names(timeline: List[Tuple[float, float, str]],
+                explicit_map: Dict[str, str],
+                names_csv: Optional[str],
+                keep_top: Optional[int]) -> Tuple[Dict[str, str], Optional[set]]:
+    """Return (speaker -> display name, set of speakers kept by --keep-top-speakers or None)."""
     # Rank speakers by total duration
     durs = speaking_durations(timeline)
     ranked = sorted(durs.keys(), key=lambda k: durs[k], reverse=True)
@@ -97,95 +144,383 @@ def to_transcript(json_obj: Dict[str, Any],
     allowed: Optional[set] = None
     if keep_top and keep_top > 0:
         allowed = set(ranked[:keep_top])
+    return name_map, allowed
+
+def turns_from_parts(timeline: List[Tuple[float, float, str]],
+                items: Iterable[Dict[str, Any]],
+                explicit_map: Dict[str, str],
+                names_csv: Optional[str],
+                keep_top: Optional[int],
+                other_label: str) -> Iterator[Turn]:
+    return turns_from_tables(WordTable.from_items(items), SegmentTable.from_timeline(timeline),
+                             explicit_map, names_csv, keep_top, other_label)
+
+def turns_from_tables(table: WordTable,
+                segments: SegmentTable,
+                explicit_map: Dict[str, str],
+                names_csv: Optional[str],
+                keep_top: Optional[int],
+                other_label: str) -> Iterator[Turn]:
+    name_map, allowed = resolve_names(segments.timeline(), explicit_map, names_csv, keep_top)
+    table.assign_speakers(segments)
+    return iter_table_turns(table, segments.labels, name_map, allowed, other_label)
+
+def iter_table_turns(table: WordTable,
+                labels: List[str],
+                name_map: Dict[str, str],
+                allowed: Optional[set],
+                other_label: str) -> Iterator[Turn]:
+    """Display turns over a WordTable whose speakers are already assigned (see assign_speakers):
+    word_table.table_turns with names applied; runs without a speaker are left out. A space goes
+    before every word that directly follows another word within a turn. Consecutive turns may
+    share a display label (e.g. two speakers bucketed into "Other"); they stay separate paragraphs."""
+    turns = list(table_turns(table))
+    spaced = table.is_word.copy()
+    spaced[1:] &= table.is_word[:-1]
+    spaced[[turn.first for turn in turns]] = False  # a turn's first word follows the previous turn
+    # Every row's string, taken whole from the vocabulary and its spaced twin.
+    n = len(table.vocab)
+    strings = np.array(table.vocab + [' ' + t for t in table.vocab], dtype=object)
+    pieces = strings[table.token + n * spaced].tolist()
+    for turn in turns:
+        if turn.speaker < 0:
+            continue
+        tokens = pieces[turn.first:turn.stop]
+        if not ''.join(tokens).strip():
+            continue
+        speaker = labels[turn.speaker]
+        label = name_map.get(speaker, speaker)
+        if allowed is not None and speaker not in allowed:
+            label = other_label
+        yield Turn(speaker, label, turn.start, turn.end, tokens)
+
+def format_timestamp(t: float) -> str:
+    return f"{int(t // 60):02d}:{t % 60:05.2f}"
+
+def format_markdown(turns: Iterable[Turn]) -> str:
+    return "\n\n".join(markdown_line(t) for t in turns)
+
+def markdown_line(t: Turn) -> str:
+    return f"**{t.label}:** [{format_timestamp(t.start)} - {format_timestamp(t.end)}] {t.text}"
+
+def format_cue_time(t: float, sep: str = ",") -> str:
+    ms = int(round(max(0.0, t) * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}{sep}{ms % 1000:03d}"
+
+class MarkdownWriter:
+    ext = ".txt"
+
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+
+    def write(self, turn: Turn):
+        if not self.first:
+            self.f.write("\n\n")
+        self.f.write(markdown_line(turn))
+        self.first = False
+
+    def close(self):
+        pass
+
+class SrtWriter:
+    ext = ".srt"
+
+    def __init__(self, f):
+        self.f = f
+        self.n = 0
+
+    def write(self, turn: Turn):
+        self.n += 1
+        self.f.write(f"{self.n}\n{format_cue_time(turn.start)} --> {format_cue_time(turn.end)}\n{turn.label}: {turn.text}\n\n")
+
+    def close(self):
+        pass
+
+class VttWriter:
+    ext = ".vtt"
+
+    def __init__(self, f):
+        self.f = f
+        self.f.write("WEBVTT\n\n")
 
-    utterances: List[str] = []
-    cur_spk: Optional[str] = None
-    cur_words: List[str] = []
-    segment_start_time: Optional[float] = None
-    segment_end_time: Optional[float] = None
-
-    def flush():
-        nonlocal cur_spk, cur_words, segment_start_time, segment_end_time
-        if cur_spk is not None and cur_words:
-            label = name_map.get(cur_spk, cur_spk)
-            if allowed is not None and cur_spk not in allowed:
-                label = other_label
-            text = ''.join(cur_words).strip()
-            if text:
-                # Format timestamps
-                time_info = ""
-                if segment_start_time is not None and segment_end_time is not None:
-                    start_min = int(segment_start_time // 60)
-                    start_sec = segment_start_time % 60
-                    end_min = int(segment_end_time // 60)
-                    end_sec = segment_end_time % 60
-                    time_info = f" [{start_min:02d}:{start_sec:05.2f} - {end_min:02d}:{end_sec:05.2f}]"
-                
-                if utterances and utterances[-1].split(']')[-1].strip().startswith(f"**{label}:** "):
-                    # Continuing same speaker - merge text but update end time
-                    prev = utterances.pop()
-                    # Extract the existing time range and update end time
-                    if '[' in prev and ']' in prev:
-                        start_part = prev.split('[')[1].split(' - ')[0]
-                        end_min = int(segment_end_time // 60)
-                        end_sec = segment_end_time % 60
-                        new_time_info = f" [{start_part} - {end_min:02d}:{end_sec:05.2f}]"
-                        label_and_text = prev.split(']', 1)[1]
-                        utterances.append(f"**{label}:**{new_time_info}{label_and_text} {text}")
-                    else:
-                        utterances.append(prev + " " + text)
+    def write(self, turn: Turn):
+        self.f.write(f"{format_cue_time(turn.start, '.')} --> {format_cue_time(turn.end, '.')}\n<v {turn.label}>{turn.text}\n\n")
+
+    def close(self):
+        pass
+
+class JsonlWriter:
+    ext = ".jsonl"
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, turn: Turn):
+        rec = {"speaker": turn.speaker, "label": turn.label, "start": turn.start, "end": turn.end, "text": turn.text}
+        self.f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def close(self):
+        pass
+
+# --formats name -> writer class. A writer gets an open text file, then write(turn) per turn, then close().
+WRITERS = {"md": MarkdownWriter, "srt": SrtWriter, "vtt": VttWriter, "jsonl": JsonlWriter}
+
+def output_paths(out_path: str, formats: Iterable[str]) -> Dict[str, str]:
+    """md goes to out_path as given; every other format to out_path with that format's extension.
+    If out_path already has another requested format's extension (--out show.srt --formats md,srt),
+    md gets its own (.txt) so the two writers do not truncate one file."""
+    formats = list(formats)
+    out = Path(out_path)
+    taken = {WRITERS[fmt].ext for fmt in formats if fmt != "md"}
+    md_path = str(out.with_suffix(WRITERS["md"].ext)) if out.suffix.lower() in taken else out_path
+    return {fmt: md_path if fmt == "md" else str(out.with_suffix(WRITERS[fmt].ext)) for fmt in formats}
+
+def write_formats(turns: Iterable[Turn], out_path: str, formats: Iterable[str] = ("md",)) -> Dict[str, str]:
+    """Stream turns once through every requested writer. Returns {format: path written}."""
+    paths = output_paths(out_path, formats)
+    n = 0
+    with span("render.write"), ExitStack() as stack:
+        writers = []
+        for fmt, path in paths.items():
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            writers.append(WRITERS[fmt](stack.enter_context(open(path, "w", encoding="utf-8"))))
+        for n, turn in enumerate(turns, start=1):
+            for w in writers:
+                w.write(turn)
+        for w in writers:
+            w.close()
+    incr("render.turns", n)
+    return paths
+
+def render_file(json_path: str, out_path: str,
+                explicit_map: Dict[str, str],
+                names_csv: Optional[str],
+                keep_top: Optional[int],
+                other_label: str,
+                stream: bool = False,
+                formats: Iterable[str] = ("md",),
+                cache: Optional[TranscriptCache] = None) -> Dict[str, str]:
+    """Parse json_path once (or load it from the transcript cache) and write every
+    requested format. Returns {format: path}."""
+    with span("render"):
+        table, segments = load_transcript(json_path, stream, cache)
+        turns = turns_from_tables(table, segments, explicit_map, names_csv, keep_top, other_label)
+        return write_formats(turns, out_path, formats)
+
+def parse_formats(value: str) -> List[str]:
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"unknown format(s) {unknown}; choose from {', '.join(WRITERS)}")
+    return list(dict.fromkeys(formats))
+
+def batch_pairs(source: str, json_dir: Optional[str] = None, out_dir: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(json_path, out_path) pairs from a directory of JSONs or a CSV/TSV index.
+
+    CSV rows may give the input as a `json` column (plus optional `out`), as a
+    `To TXT command` column holding a diarization_to_markdown.py command line
+    (batch_89-93.csv), or only as an ID column (`job_name` / `Index ID`).
+    --json-dir / --out-dir re-root the file names (e.g. when the index holds
+    paths from another machine). Outputs default to <json stem>.txt next to the input.
+    """
+    src = Path(source)
+    pairs: List[Tuple[str, Optional[str]]] = []
+    if src.is_dir():
+        pairs = [(str(p), None) for p in sorted(src.glob("*.json"))]
+    else:
+        with open(src, newline="", encoding="utf-8") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            dialect = csv.Sniffer().sniff(sample, delimiters=",\t;")
+            for row in csv.DictReader(f, dialect=dialect):
+                row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+                if row.get("json"):
+                    pairs.append((row["json"], row.get("out") or None))
+                elif row.get("To TXT command"):
+                    argv = shlex.split(row["To TXT command"].replace("\\\n", " "))
+                    opts = dict(zip(argv, argv[1:]))
+                    if "--json" in opts:
+                        pairs.append((opts["--json"], opts.get("--out")))
                 else:
-                    utterances.append(f"**{label}:**{time_info} {text}")
-        cur_spk, cur_words = None, []
-        segment_start_time, segment_end_time = None, None
-
-    last_was_word = False
-    for it in items:
-        if it["type"] == "pronunciation":
-            start_time = float(it["start_time"])
-            end_time = float(it["end_time"])
-            spk = find_speaker(timeline, start_time) or cur_spk
-            if spk != cur_spk:
-                flush()
-                cur_spk = spk
-                segment_start_time = start_time
-                last_was_word = False
-            # Update segment end time with the latest word's end time
-            segment_end_time = end_time
-            if last_was_word:
-                cur_words.append(' ')
-            cur_words.append(it["alternatives"][0]["content"])
-            last_was_word = True
+                    ident = row.get("job_name") or row.get("Index ID")
+                    if ident:
+                        pairs.append((str(src.parent / f"{ident}.json"), None))
+    out: List[Tuple[str, str]] = []
+    for json_path, out_path in pairs:
+        if json_dir:
+            json_path = str(Path(json_dir) / Path(json_path).name)
+        if not out_path:
+            out_path = str(Path(json_path).with_suffix(".txt"))
+        if out_dir:
+            out_path = str(Path(out_dir) / Path(out_path).name)
+        out.append((json_path, out_path))
+    return out
+
+# Per-worker state for batch_render: the speaker map is parsed once per process, not per file.
+_WORKER_OPTS: Dict[str, Any] = {}
+
+# A speaker store is matched per show, so it is kept out of _WORKER_OPTS.
+_WORKER_STORE: Dict[str, Optional[str]] = {}
+
+# render_options() of this pool, recorded next to every output it writes.
+_WORKER_RENDER: Dict[str, str] = {}
+
+def render_options(map_path: Optional[str], names_csv: Optional[str], keep_top: Optional[int],
+                   other_label: str, formats: Iterable[str], audio: Optional[str] = None) -> str:
+    """Hash of the options that change what is rendered (the map's contents are covered by its mtime)."""
+    opts = {"map": map_path, "names": names_csv, "keep_top": keep_top, "other_label": other_label,
+            "formats": sorted(formats), "audio": audio}
+    return hashlib.sha1(json.dumps(opts, sort_keys=True).encode()).hexdigest()
+
+def options_path(out_path: str) -> Path:
+    """Hidden file next to the output holding the render_options() it was written with."""
+    out = Path(out_path)
+    return out.with_name(f".{out.name}.opts")
+
+def record_render_options(out_path: str, options: str):
+    options_path(out_path).write_text(options + "\n", encoding="utf-8")
+
+def _init_worker(map_path: Optional[str], names_csv: Optional[str], keep_top: Optional[int],
+                 other_label: str, stream: bool, formats: List[str],
+                 cache_dir: Optional[str] = None, cache_max_mb: float = 2048, audio: Optional[str] = None):
+    store = map_path if map_path and is_speaker_store(map_path) else None
+    _WORKER_STORE.update(path=store, audio=audio)
+    _WORKER_RENDER.update(options=render_options(map_path, names_csv, keep_top, other_label, formats, audio))
+    _WORKER_OPTS.update(explicit_map={} if store else load_mapping(map_path), names_csv=names_csv,
+                        keep_top=keep_top, other_label=other_label, stream=stream, formats=formats,
+                        cache=open_cache(cache_dir, cache_max_mb))
+
+def _render_job(pair: Tuple[str, str]) -> Tuple[str, str, str, float, int]:
+    json_path, out_path = pair
+    t0 = time.perf_counter()
+    try:
+        opts = _WORKER_OPTS
+        if _WORKER_STORE.get("path"):
+            opts = dict(opts, explicit_map=load_mapping(_WORKER_STORE["path"], json_path, _WORKER_STORE["audio"]))
+        render_file(json_path, out_path, **opts)
+        record_render_options(out_path, _WORKER_RENDER["options"])
+    except Exception as e:
+        return "failed", json_path, f"{type(e).__name__}: {e}", time.perf_counter() - t0, 0
+    return "rendered", json_path, out_path, time.perf_counter() - t0, os.path.getsize(json_path)
+
+def is_up_to_date(json_path: str, out_path: str, map_path: Optional[str] = None,
+                  formats: Iterable[str] = ("md",), options: Optional[str] = None) -> bool:
+    """True if every output for out_path is newer than its input (and the speaker map, if any)
+    and, given `options` (render_options()), was written with those options."""
+    try:
+        out_mtime = min(os.path.getmtime(p) for p in output_paths(out_path, formats).values())
+        if options is not None and options_path(out_path).read_text(encoding="utf-8").strip() != options:
+            return False
+    except OSError:
+        return False
+    newest = os.path.getmtime(json_path)
+    if map_path:
+        newest = max(newest, os.path.getmtime(map_path))
+    return out_mtime >= newest
+
+def batch_render(pairs: List[Tuple[str, str]], jobs: int, map_path: Optional[str], names_csv: Optional[str],
+                 keep_top: Optional[int], other_label: str, stream: bool = False,
+                 force: bool = False, formats: Iterable[str] = ("md",),
+                 cache_dir: Optional[str] = None, cache_max_mb: float = 2048,
+                 audio: Optional[str] = None) -> Dict[str, int]:
+    formats = list(formats)
+    t0 = time.perf_counter()
+    todo: List[Tuple[str, str]] = []
+    counts = {"rendered": 0, "skipped": 0, "missing": 0, "failed": 0}
+    options = render_options(map_path, names_csv, keep_top, other_label, formats, audio)
+    for json_path, out_path in pairs:
+        if not os.path.exists(json_path) or os.path.getsize(json_path) == 0:
+            print(f"MISSING  {json_path}")
+            counts["missing"] += 1
+        elif not force and is_up_to_date(json_path, out_path, map_path, formats, options):
+            counts["skipped"] += 1
         else:
-            cur_words.append(it["alternatives"][0]["content"])
-            last_was_word = False
+            todo.append((json_path, out_path))
 
-    flush()
-    return "\n\n".join(utterances)
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(1, jobs), initializer=_init_worker,
+                             initargs=(map_path, names_csv, keep_top, other_label, stream, formats,
+                                       cache_dir, cache_max_mb, audio)) as pool:
+        results = map(absorb, pool.map(worker_call, repeat(enabled()), repeat(_render_job), todo))
+        for i, (outcome, json_path, detail, secs, nbytes) in enumerate(results, start=1):
+            counts[outcome] += 1
+            total_bytes += nbytes
+            if outcome == "rendered":
+                print(f"[{i}/{len(todo)}] {json_path} -> {detail} ({secs:.2f}s)")
+            else:
+                print(f"[{i}/{len(todo)}] FAILED {json_path}: {detail}")
+
+    elapsed = time.perf_counter() - t0
+    print(f"Rendered {counts['rendered']}, skipped {counts['skipped']} up-to-date, "
+          f"{counts['missing']} missing, {counts['failed']} failed in {elapsed:.2f}s "
+          f"({counts['rendered'] / max(elapsed, 1e-9):.1f} files/s, {total_bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s of JSON)")
+    return counts
+
+def index_outputs(db: str, paths: List[str]):
+    """Bring the search index up to date with the transcripts rendered (or skipped as current) in this run."""
+    index = TranscriptIndex(db)
+    try:
+        c = index.update([p for p in paths if os.path.exists(p)], verbose=False)
+    finally:
+        index.close()
+    print(f"Indexed into {db}: {c['added']} added, {c['updated']} updated, {c['unchanged']} unchanged")
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--json", required=True, help="Transcribe JSON path")
+    ap.add_argument("--json", help="Transcribe JSON path")
     ap.add_argument("--out", default="transcript.txt", help="Output transcript path")
-    ap.add_argument("--map", help="JSON or YAML mapping file of speaker_label -> real name")
+    ap.add_argument("--map", help="JSON or YAML mapping file of speaker_label -> real name, or a speaker store (speakers.npz)")
+    ap.add_argument("--audio", help="With a speaker store: the show's recording, or a folder of <json stem>.mp3 files (default: next to the JSON)")
     ap.add_argument("--names", help="Comma-separated names for top-N speakers (duration order)")
     ap.add_argument("--keep-top-speakers", type=int, default=None, help="Keep the N speakers with the most speaking time")
     ap.add_argument("--other-label", default="Other", help="Label for non-top speakers")
+    ap.add_argument("--stream", action="store_true", help="Read the JSON incrementally (flat memory on very long recordings)")
+    ap.add_argument("--formats", type=parse_formats, default=["md"],
+                    help="Comma-separated outputs from one parse: md,srt,vtt,jsonl (md goes to --out, others alongside it; "
+                         "md falls back to .txt if --out has another format's extension)")
+    ap.add_argument("--batch", help="Directory of JSONs, or CSV/TSV index (e.g. batch_89-93.csv), to render in one run")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes for --batch")
+    ap.add_argument("--json-dir", help="With --batch: look for input JSONs (by file name) in this folder")
+    ap.add_argument("--out-dir", help="With --batch: write transcripts (by file name) to this folder")
+    ap.add_argument("--force", action="store_true",
+                    help="With --batch: re-render even if the output is newer than the input and was written with these options")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                    help="Parsed-transcript cache (see transcript_cache.py; env TRANSCRIPT_CACHE_DIR)")
+    ap.add_argument("--cache-max-mb", type=float, default=2048, help="Evict least recently used cache entries beyond this size")
+    ap.add_argument("--no-cache", action="store_true", help="Always parse the JSON; do not read or write the cache")
+    ap.add_argument("--index", metavar="DB", help="Add the rendered transcripts to this search index (see transcript_index.py)")
+    add_metrics_argument(ap)
     args = ap.parse_args()
+    start_metrics(args.metrics_out)
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    if args.batch:
+        pairs = batch_pairs(args.batch, json_dir=args.json_dir, out_dir=args.out_dir)
+        counts = batch_render(pairs, args.jobs, args.map, args.names, args.keep_top_speakers,
+                              args.other_label, stream=args.stream, force=args.force, formats=args.formats,
+                              cache_dir=cache_dir, cache_max_mb=args.cache_max_mb, audio=args.audio)
+        if args.index:
+            index_outputs(args.index, [p for _, out in pairs for p in output_paths(out, args.formats).values()])
+        if counts["failed"]:
+            raise SystemExit(1)
+        return
+    if not args.json:
+        ap.error("one of --json or --batch is required")
 
-    obj = json.loads(Path(args.json).read_text(encoding="utf-8"))
-    explicit_map = load_mapping(args.map) if args.map else {}
-
-    transcript = to_transcript(
-        obj,
-        explicit_map=explicit_map,
-        names_csv=args.names,
-        keep_top=args.keep_top_speakers,
-        other_label=args.other_label
-    )
-    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
-    Path(args.out).write_text(transcript, encoding="utf-8")
-    print(f"Wrote {args.out}")
+    try:
+        explicit_map = load_mapping(args.map, args.json, args.audio) if args.map else {}
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+    paths = render_file(args.json, args.out, explicit_map, args.names, args.keep_top_speakers,
+                        args.other_label, stream=args.stream, formats=args.formats,
+                        cache=open_cache(cache_dir, args.cache_max_mb))
+    record_render_options(args.out, render_options(args.map, args.names, args.keep_top_speakers,
+                                                   args.other_label, args.formats, args.audio))
+    for path in paths.values():
+        print(f"Wrote {path}")
+    if args.index:
+        index_outputs(args.index, list(paths.values()))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+error_rates.py
+--------------
+Word and character error rates with exact edit-distance alignments, for scoring
+transcripts against a reference (replaces the comparison notebook's difflib
+approximation and its pure-Python Levenshtein fallback).
+
+Texts are tokenized and interned into int32 id arrays once; everything after
+that works on the arrays.
+- edit_distance: Myers/Hyyro bit-parallel Levenshtein. The whole reference is one
+  Python big int per bit-vector, so each hypothesis token costs a handful of
+  word-parallel integer ops instead of a row of cell updates. Used for CER and for
+  plain WER numbers.
+- align: minimum-edit alignment with substitution/insertion/deletion counts and the
+  aligned (ref, hyp) index pairs. Hirschberg's divide and conquer keeps memory
+  linear: long inputs are split where the optimal path crosses the middle row
+  (both half rows come from the bit-parallel pass, read off its last column)
+  until the pieces fit a full matrix, whose rows are computed with NumPy in one
+  shot (the insertion recurrence becomes a running minimum,
+  np.minimum.accumulate) and traced back.
+
+USAGE (as a library):
+    from error_rates import align, word_error_rate, char_error_rate
+    a = align(ref_text.split(), hyp_text.split())
+    a.substitutions, a.insertions, a.deletions, a.wer
+    a.common_substitutions(ref_words, hyp_words, 10)
+
+USAGE (score the 2011 comparison transcripts):
+    python error_rates.py
+    python error_rates.py --ref control.txt --hyp a.txt b.srt c.json --pairs-dir aligned/
+"""
+
+import argparse
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from text_normalizer import normalize_text
+from transcript_cache import parse_transcript
+from transcript_ingest import table_text
+
+ROOT = Path(__file__).resolve().parent
+SOWELL = ROOT / "Transcription Options"
+CONTROL = SOWELL / "Original MP3 and Control Transcript" / "control.txt"
+OTHER = SOWELL / "Other Transcripts"
+
+# Op codes in Alignment.ops
+MATCH, SUB, INS, DEL = 0, 1, 2, 3
+OP_NAMES = {MATCH: "=", SUB: "S", INS: "I", DEL: "D"}
+
+# align() solves pieces up to this many DP cells with a stored matrix (int32: 4 MB)
+FULL_MATRIX_CELLS = 1_000_000
+
+def encode(*sequences: Sequence[str]) -> List[np.ndarray]:
+    """Intern tokens across all sequences; returns one int32 id array per sequence."""
+    ids: Dict[str, int] = {}
+    return [np.fromiter((ids.setdefault(t, len(ids)) for t in seq), dtype=np.int32, count=len(seq))
+            for seq in sequences]
+
+def char_ids(text: str) -> np.ndarray:
+    """Code points of text as an int32 array."""
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int32)
+
+def _match_masks(pattern: np.ndarray) -> Dict[int, int]:
+    """For each symbol of pattern, a big int with bit i set where pattern[i] is that symbol."""
+    masks: Dict[int, int] = {}
+    if not len(pattern):
+        return masks
+    order = np.argsort(pattern, kind="stable")
+    symbols, starts = np.unique(pattern[order], return_index=True)
+    nbytes = (len(pattern) + 7) // 8
+    for sym, pos in zip(symbols.tolist(), np.split(order, starts[1:])):
+        if len(pos) < 64:  # rare symbols (most words): a few shifts beat building a byte buffer
+            mask = 0
+            for p in pos.tolist():
+                mask |= 1 << p
+        else:
+            buf = np.zeros(nbytes, dtype=np.uint8)
+            np.bitwise_or.at(buf, pos >> 3, (1 << (pos & 7)).astype(np.uint8))
+            mask = int.from_bytes(buf.tobytes(), "little")
+        masks[sym] = mask
+    return masks
+
+def _myers(peq: Dict[int, int], m: int, text: np.ndarray) -> Tuple[int, int, int]:
+    """Run text against a pattern of length m (peq from _match_masks). Returns the vertical
+    delta bit-vectors (+1 bits, -1 bits) of the last DP column and the distance."""
+    full = (1 << m) - 1
+    top = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    for c in text.tolist():
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & top:
+            score += 1
+        elif mh & top:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return pv, mv, score
+
+def edit_distance(ref: np.ndarray, hyp: np.ndarray) -> int:
+    """Levenshtein distance between two id arrays (bit-parallel, Hyyro's formulation of Myers)."""
+    if len(ref) == 0:
+        return len(hyp)
+    return _myers(_match_masks(ref), len(ref), hyp)[2]
+
+def _bits(x: int, m: int) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(x.to_bytes((m + 7) // 8, "little"), dtype=np.uint8), bitorder="little")[:m]
+
+def _last_row(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Final row of the edit-distance DP of a against b: run a as the text against b as
+    the pattern and sum up the vertical deltas of the last column."""
+    row = np.full(len(b) + 1, len(a), dtype=np.int32)
+    if len(b):
+        pv, mv, _ = _myers(_match_masks(b), len(b), a)
+        row[1:] += np.cumsum(_bits(pv, len(b)).astype(np.int32) - _bits(mv, len(b)))
+    return row
+
+def _full_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    j = np.arange(len(b) + 1, dtype=np.int32)
+    d = np.empty((len(a) + 1, len(b) + 1), dtype=np.int32)
+    d[0] = j
+    t = np.empty(len(b) + 1, dtype=np.int32)
+    for i, x in enumerate(a.tolist(), 1):
+        t[0] = i
+        np.minimum(d[i - 1, 1:] + 1, d[i - 1, :-1] + (b != x), out=t[1:])
+        d[i] = np.minimum.accumulate(t - j) + j
+    return d
+
+def _trace(a: np.ndarray, b: np.ndarray, ai: int, bj: int, out: List[Tuple[int, int, int]]) -> None:
+    """Append (op, ref index, hyp index) for an optimal alignment of a and b (offset by ai, bj)."""
+    d = _full_matrix(a, b)
+    i, j = len(a), len(b)
+    steps = []
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and d[i, j] == d[i - 1, j - 1] + (a[i - 1] != b[j - 1]):
+            i -= 1
+            j -= 1
+            steps.append((MATCH if a[i] == b[j] else SUB, ai + i, bj + j))
+        elif i > 0 and d[i, j] == d[i - 1, j] + 1:
+            i -= 1
+            steps.append((DEL, ai + i, -1))
+        else:
+            j -= 1
+            steps.append((INS, -1, bj + j))
+    out.extend(reversed(steps))
+
+def _hirschberg(a: np.ndarray, b: np.ndarray, ai: int, bj: int, out: List[Tuple[int, int, int]]) -> None:
+    if (len(a) + 1) * (len(b) + 1) <= FULL_MATRIX_CELLS or len(a) < 2 or len(b) == 0:
+        _trace(a, b, ai, bj, out)
+        return
+    mid = len(a) // 2
+    forward = _last_row(a[:mid], b)
+    backward = _last_row(a[mid:][::-1], b[::-1])[::-1]
+    k = int(np.argmin(forward + backward))
+    _hirschberg(a[:mid], b[:k], ai, bj, out)
+    _hirschberg(a[mid:], b[k:], ai + mid, bj + k, out)
+
+@dataclass
+class Alignment:
+    ops: np.ndarray      # int8 MATCH/SUB/INS/DEL per aligned pair
+    ref_idx: np.ndarray  # int32 index into the reference, -1 for insertions
+    hyp_idx: np.ndarray  # int32 index into the hypothesis, -1 for deletions
+    ref_len: int
+
+    @property
+    def hits(self) -> int:
+        return int(np.count_nonzero(self.ops == MATCH))
+
+    @property
+    def substitutions(self) -> int:
+        return int(np.count_nonzero(self.ops == SUB))
+
+    @property
+    def insertions(self) -> int:
+        return int(np.count_nonzero(self.ops == INS))
+
+    @property
+    def deletions(self) -> int:
+        return int(np.count_nonzero(self.ops == DEL))
+
+    @property
+    def errors(self) -> int:
+        return int(np.count_nonzero(self.ops != MATCH))
+
+    @property
+    def wer(self) -> float:
+        return self.errors / self.ref_len if self.ref_len else (float("inf") if self.errors else 0.0)
+
+    def counts(self) -> Dict[str, int]:
+        return {"hits": self.hits, "substitutions": self.substitutions, "insertions": self.insertions,
+                "deletions": self.deletions, "total_errors": self.errors}
+
+    def pairs(self, ref: Sequence[str], hyp: Sequence[str]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+        """(op, ref token, hyp token) for every aligned position; None on the missing side."""
+        return [(OP_NAMES[op], ref[i] if i >= 0 else None, hyp[j] if j >= 0 else None)
+                for op, i, j in zip(self.ops.tolist(), self.ref_idx.tolist(), self.hyp_idx.tolist())]
+
+    def common_substitutions(self, ref: Sequence[str], hyp: Sequence[str], n: int = 10) -> List[Tuple[Tuple[str, str], int]]:
+        subs = np.flatnonzero(self.ops == SUB)
+        return Counter((ref[i], hyp[j]) for i, j in zip(self.ref_idx[subs].tolist(), self.hyp_idx[subs].tolist())).most_common(n)
+
+def align_ids(ref: np.ndarray, hyp: np.ndarray) -> Alignment:
+    """Minimum-edit alignment of two id arrays."""
+    steps: List[Tuple[int, int, int]] = []
+    _hirschberg(np.asarray(ref), np.asarray(hyp), 0, 0, steps)
+    arr = np.array(steps, dtype=np.int32).reshape(-1, 3)
+    return Alignment(arr[:, 0].astype(np.int8), arr[:, 1], arr[:, 2], len(ref))
+
+def align(ref: Sequence[str], hyp: Sequence[str]) -> Alignment:
+    """Minimum-edit alignment of two token sequences (e.g. text.split())."""
+    r, h = encode(ref, hyp)
+    return align_ids(r, h)
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    r, h = encode(reference.split(), hypothesis.split())
+    if not len(r):
+        return float("inf") if len(h) else 0.0
+    return edit_distance(r, h) / len(r)
+
+def char_error_rate(reference: str, hypothesis: str) -> float:
+    if not reference:
+        return float("inf") if hypothesis else 0.0
+    return edit_distance(char_ids(reference), char_ids(hypothesis)) / len(reference)
+
+# ---- Comparison notebook text handling (transcription_comparison_analysis.ipynb) ----
+
+_SPEAKER_PATTERNS = [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in (
+    r"\b(phyllis schlafly|thomas sowell|bill hayes|commercial)\b:?\s*",
+    r"\b(phyllis|thomas|bill)\b:?\s*",
+    r"^[A-Z][a-z]+ [A-Z][a-z]+:?\s*",
+    r"^[A-Z][a-z]+:?\s*",
+)]
+def read_transcript(path: Path) -> str:
+    """Plain running text of a transcript in any format transcript_ingest reads
+    (Transcribe JSON, SRT/VTT cues, text and Word exports without their speaker label lines)."""
+    return table_text(parse_transcript(str(path))[0])
+
+def remove_speaker_labels(text: str) -> str:
+    for pattern in _SPEAKER_PATTERNS:
+        text = pattern.sub("", text)
+    return text.strip()
+
+def clean_transcript_text(text: str) -> str:
+    """The notebook's clean_transcript_text: remove_speaker_labels then normalize_text
+    (text_normalizer.py), with the patterns compiled once."""
+    return normalize_text(remove_speaker_labels(text))
+
+def score_pair(ref_words: List[str], hyp_words: List[str], ref_text: str, hyp_text: str,
+               cer: bool = True) -> Tuple[Dict, Alignment]:
+    t0 = time.perf_counter()
+    a = align(ref_words, hyp_words)
+    row = {"ref_words": len(ref_words), "hyp_words": len(hyp_words), "wer": a.wer, **a.counts()}
+    row["cer"] = char_error_rate(ref_text, hyp_text) if cer else float("nan")
+    row["seconds"] = time.perf_counter() - t0
+    return row, a
+
+def main():
+    ap = argparse.ArgumentParser(description="WER/CER of transcripts against a reference, with exact alignments.")
+    ap.add_argument("--ref", default=str(CONTROL), help="Reference transcript (default: the 2011 control.txt)")
+    ap.add_argument("--hyp", nargs="+", default=None,
+                    help="Hypothesis transcripts (.txt/.srt/.vtt/.json; default: everything in 'Other Transcripts')")
+    ap.add_argument("--no-cer", action="store_true", help="Skip character error rate")
+    ap.add_argument("--top-subs", type=int, default=5, help="Most common substitutions to print per file")
+    ap.add_argument("--pairs-dir", default=None, help="Write each alignment as <hyp>.aligned.tsv here")
+    args = ap.parse_args()
+
+    hyps = [Path(p) for p in args.hyp] if args.hyp else sorted(
+        p for p in OTHER.iterdir() if p.suffix in (".txt", ".srt", ".vtt", ".json"))
+    ref_text = clean_transcript_text(read_transcript(Path(args.ref)))
+    ref_words = ref_text.split()
+    print(f"Reference {args.ref}: {len(ref_words)} words")
+
+    print(f"{'file':28s} {'words':>6s} {'WER':>7s} {'sub':>5s} {'ins':>5s} {'del':>5s} {'CER':>7s} {'secs':>6s}")
+    for path in hyps:
+        hyp_text = clean_transcript_text(read_transcript(path))
+        hyp_words = hyp_text.split()
+        row, a = score_pair(ref_words, hyp_words, ref_text, hyp_text, cer=not args.no_cer)
+        print(f"{path.name:28s} {row['hyp_words']:6d} {row['wer']:7.3f} {row['substitutions']:5d} "
+              f"{row['insertions']:5d} {row['deletions']:5d} {row['cer']:7.3f} {row['seconds']:6.2f}")
+        if args.top_subs:
+            subs = ", ".join(f"{r}->{h} x{n}" for (r, h), n in a.common_substitutions(ref_words, hyp_words, args.top_subs))
+            print(f"    {subs}")
+        if args.pairs_dir:
+            out = Path(args.pairs_dir) / f"{path.stem}.aligned.tsv"
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with out.open("w", encoding="utf-8") as f:
+                f.write("op\tref\thyp\n")
+                for op, r, h in a.pairs(ref_words, hyp_words):
+                    f.write(f"{op}\t{r or ''}\t{h or ''}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+evaluate_corpus.py
+------------------
+Score every service's transcript of every show that has a reference (control)
+transcript, in a process pool, into one tidy results table.
+
+Pairs come from a corpus directory or a CSV:
+- --corpus DIR: every control.txt / reference.* under DIR is a show's reference.
+  The show folder is the nearest ancestor of it that holds other transcripts
+  (.txt/.srt/.vtt/.json); each of those is a hypothesis, named after its file stem.
+  The default is the 2011 comparison set in "Transcription Options".
+- --pairs CSV: columns show, service, reference, hypothesis.
+Every file is read through transcript_ingest, so a --pairs CSV may also list Word
+(.docx) exports.
+
+Each row holds WER with the S/I/D breakdown (error_rates.align, after the
+comparison notebook's speaker-label and normalize_text rules), WER over the part
+of the reference the hypothesis covers (for truncated transcripts such as the free
+Otter export), CER, and speaker-attribution accuracy when both sides carry speaker
+turns: aligned words whose hypothesis speaker, mapped to the reference speaker it
+most often lines up with, matches the reference speaker.
+
+Results are cached per pair in --cache-dir, keyed by the SHA-1 of both files, so
+adding one service's transcripts only scores the new pairs.
+
+USAGE:
+    python evaluate_corpus.py
+    python evaluate_corpus.py --corpus shows/ --out results.parquet --jobs 8
+    python evaluate_corpus.py --pairs pairs.csv --out results.csv --no-cer
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from error_rates import MATCH, SUB, SOWELL, align, clean_transcript_text, score_pair
+from metrics import absorb, add_metrics_argument, enabled, observe, start_metrics, worker_call
+from text_normalizer import normalize_tokens
+from transcript_cache import file_sha1, parse_transcript
+from transcript_ingest import table_text, turn_records
+from word_table import SegmentTable, WordTable
+
+SCORER_VERSION = 2  # bump when scoring or normalization changes; old cache entries stop matching
+DEFAULT_CACHE_DIR = os.environ.get("EVAL_CACHE_DIR", ".eval_cache")
+TRANSCRIPT_SUFFIXES = {".txt", ".srt", ".vtt", ".json"}
+REFERENCE_NAMES = re.compile(r"^(control|reference)\.(txt|srt|vtt|json)$", re.IGNORECASE)
+
+COLUMNS = ["show", "service", "reference", "hypothesis", "ref_sha1", "hyp_sha1",
+           "ref_words", "hyp_words", "hits", "substitutions", "insertions", "deletions", "total_errors",
+           "wer", "wer_covered", "ref_coverage", "cer", "speaker_accuracy", "speaker_words", "seconds", "cached"]
+
+@dataclass
+class EvalPair:
+    show: str
+    service: str
+    reference: str
+    hypothesis: str
+
+def is_transcript(path: Path) -> bool:
+    return path.is_file() and path.suffix.lower() in TRANSCRIPT_SUFFIXES
+
+def discover_pairs(corpus: str) -> List[EvalPair]:
+    root = Path(corpus)
+    pairs: List[EvalPair] = []
+    for ref in sorted(p for p in root.rglob("*") if p.is_file() and REFERENCE_NAMES.match(p.name)):
+        show_dir = ref.parent
+        while True:
+            hyps = sorted(p for p in show_dir.rglob("*") if is_transcript(p) and p != ref and not REFERENCE_NAMES.match(p.name))
+            if hyps or show_dir == root or root not in show_dir.parents:
+                break
+            show_dir = show_dir.parent
+        show = show_dir.name or root.resolve().name
+        pairs.extend(EvalPair(show, h.stem, str(ref), str(h)) for h in hyps)
+    return pairs
+
+def read_pairs_csv(path: str) -> List[EvalPair]:
+    base = Path(path).parent
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [{k.strip(): (v or "").strip() for k, v in row.items()} for row in csv.DictReader(f)]
+    return [EvalPair(r.get("show") or Path(r["reference"]).parent.name,
+                     r.get("service") or Path(r["hypothesis"]).stem,
+                     str(base / r["reference"]), str(base / r["hypothesis"])) for r in rows]
+
+# ---- Speaker turns ----
+
+def speaker_turns(table: WordTable, segments: SegmentTable) -> Optional[List[Tuple[str, str]]]:
+    """(speaker, text) turns of a transcript that carries speakers, else None. Every
+    format comes through transcript_ingest: label lines in text and Word exports,
+    speaker_labels in Transcribe JSON, diarized prefixes or voice tags in SRT/VTT cues."""
+    turns = [(label, text) for label, _s, _e, text in turn_records(table, segments) if label is not None]
+    return turns or None
+
+def load_for_scoring(path: str) -> Tuple[str, Optional[List[Tuple[str, str]]]]:
+    """Normalized text and speaker turns of a transcript, from one parse."""
+    table, segments = parse_transcript(path)
+    return clean_transcript_text(table_text(table)), speaker_turns(table, segments)
+
+def turn_words(turns: List[Tuple[str, str]]) -> Tuple[List[str], List[str]]:
+    words: List[str] = []
+    speakers: List[str] = []
+    for spk, text in turns:
+        w = list(normalize_tokens((text,)))
+        words.extend(w)
+        speakers.extend([spk] * len(w))
+    return words, speakers
+
+def speaker_accuracy(ref_turns, hyp_turns) -> Tuple[float, int]:
+    """Share of aligned (ref, hyp) word pairs whose hypothesis speaker, mapped to the
+    reference speaker it most often lines up with, is the reference speaker."""
+    ref_words, ref_spk = turn_words(ref_turns)
+    hyp_words, hyp_spk = turn_words(hyp_turns)
+    a = align(ref_words, hyp_words)
+    paired = np.flatnonzero((a.ops == MATCH) | (a.ops == SUB))
+    if not len(paired):
+        return float("nan"), 0
+    votes: Dict[str, Counter] = defaultdict(Counter)
+    for i, j in zip(a.ref_idx[paired].tolist(), a.hyp_idx[paired].tolist()):
+        votes[hyp_spk[j]][ref_spk[i]] += 1
+    correct = sum(c.most_common(1)[0][1] for c in votes.values())
+    return correct / len(paired), len(paired)
+
+# ---- Scoring ----
+
+@lru_cache(maxsize=8)
+def _reference(path: str, sha1: str) -> Tuple[str, List[str], Optional[List[Tuple[str, str]]]]:
+    """Normalized reference text, words and speaker turns (once per worker per reference)."""
+    text, turns = load_for_scoring(path)
+    return text, text.split(), turns
+
+def covered_wer(a, max_gap: int = 50, min_share: float = 0.01) -> Tuple[float, float]:
+    """WER over the reference span the hypothesis covers, and the share of the reference
+    in that span. Matched words are split into clusters wherever more than max_gap
+    reference words separate them; clusters at either end holding under min_share of
+    all matches are left out (aligning a truncated transcript still scatters a few
+    common words over the part it is missing)."""
+    pos = np.flatnonzero(a.ops == MATCH)
+    if not len(pos) or not a.ref_len:
+        return float("nan"), 0.0
+    ref_pos = a.ref_idx[pos]
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(ref_pos) > max_gap) + 1, [len(pos)]])
+    sizes = np.diff(bounds)
+    min_hits = max(2, min_share * len(pos))
+    first, last = 0, len(sizes) - 1
+    while last > first and sizes[last] < min_hits:
+        last -= 1
+    while first < last and sizes[first] < min_hits:
+        first += 1
+    lo, hi = bounds[first], bounds[last + 1] - 1
+    ref_in_span = int(ref_pos[hi] - ref_pos[lo] + 1)
+    errors = int(np.count_nonzero(a.ops[pos[lo]:pos[hi] + 1] != MATCH))
+    return errors / ref_in_span, ref_in_span / a.ref_len
+
+def score(pair: EvalPair, ref_sha1: str, cer: bool = True) -> Dict[str, Any]:
+    ref_text, ref_words, ref_turns = _reference(pair.reference, ref_sha1)
+    t0 = time.perf_counter()
+    hyp_text, hyp_turns = load_for_scoring(pair.hypothesis)
+    row, a = score_pair(ref_words, hyp_text.split(), ref_text, hyp_text, cer=cer)
+    row["wer_covered"], row["ref_coverage"] = covered_wer(a)
+    row["speaker_accuracy"], row["speaker_words"] = speaker_accuracy(ref_turns, hyp_turns) if ref_turns and hyp_turns else (float("nan"), 0)
+    row["seconds"] = time.perf_counter() - t0
+    observe("evaluate.score", row["seconds"])
+    return row
+
+class ResultCache:
+    """One small JSON file per scored (reference, hypothesis) content pair."""
+
+    def __init__(self, directory: str):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, ref_sha1: str, hyp_sha1: str, cer: bool) -> Path:
+        return self.dir / f"{ref_sha1[:20]}-{hyp_sha1[:20]}-v{SCORER_VERSION}{'' if cer else '-nocer'}.json"
+
+    def get(self, ref_sha1: str, hyp_sha1: str, cer: bool) -> Optional[Dict[str, Any]]:
+        try:
+            with self.path(ref_sha1, hyp_sha1, cer).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, ref_sha1: str, hyp_sha1: str, cer: bool, row: Dict[str, Any]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(row, f)
+        os.replace(tmp, self.path(ref_sha1, hyp_sha1, cer))
+
+def _score_job(job: Tuple[EvalPair, str, bool]) -> Tuple[EvalPair, Optional[Dict[str, Any]], str]:
+    pair, ref_sha1, cer = job
+    try:
+        return pair, score(pair, ref_sha1, cer), ""
+    except Exception as e:
+        return pair, None, f"{type(e).__name__}: {e}"
+
+def evaluate(pairs: List[EvalPair], jobs: int = os.cpu_count() or 1, cer: bool = True,
+             cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> List[Dict[str, Any]]:
+    """Score all pairs (cached ones are read back); returns one row per pair, in input order."""
+    t0 = time.perf_counter()
+    cache = ResultCache(cache_dir) if cache_dir else None
+    shas = {p: file_sha1(p) for p in {x for pair in pairs for x in (pair.reference, pair.hypothesis)}}
+    rows: Dict[int, Dict[str, Any]] = {}
+    todo: List[Tuple[int, Tuple[EvalPair, str, bool]]] = []
+    for k, pair in enumerate(pairs):
+        hit = cache.get(shas[pair.reference], shas[pair.hypothesis], cer) if cache else None
+        if hit is not None:
+            rows[k] = dict(hit, cached=True)
+        else:
+            todo.append((k, (pair, shas[pair.reference], cer)))
+
+    # Grouped by reference, so a worker picking up several hypotheses of one show
+    # normalizes its reference once (_reference's lru_cache).
+    todo.sort(key=lambda kj: kj[1][0].reference)
+    failed = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(todo)))) as pool:
+            results = pool.map(worker_call, repeat(enabled()), repeat(_score_job), [j for _, j in todo])
+            for (k, _), (pair, row, error) in zip(todo, map(absorb, results)):
+                if row is None:
+                    failed += 1
+                    print(f"FAILED {pair.show} / {pair.service}: {error}")
+                    continue
+                if cache:
+                    cache.put(shas[pair.reference], shas[pair.hypothesis], cer, row)
+                rows[k] = dict(row, cached=False)
+                print(f"  {pair.show} / {pair.service}: WER {row['wer']:.3f} ({row['seconds']:.2f}s)")
+
+    out = []
+    for k, pair in enumerate(pairs):
+        if k in rows:
+            out.append({"show": pair.show, "service": pair.service, "reference": pair.reference,
+                        "hypothesis": pair.hypothesis, "ref_sha1": shas[pair.reference],
+                        "hyp_sha1": shas[pair.hypothesis], **rows[k]})
+    scored = sum(not r["cached"] for r in out)
+    print(f"Scored {scored}, reused {len(out) - scored} cached, {failed} failed "
+          f"of {len(pairs)} pairs in {time.perf_counter() - t0:.2f}s")
+    return out
+
+def write_results(rows: List[Dict[str, Any]], out_path: str) -> None:
+    if out_path.endswith(".parquet"):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise SystemExit("Writing Parquet needs pandas and pyarrow (pip install pandas pyarrow); use a .csv --out")
+        pd.DataFrame(rows, columns=COLUMNS).to_parquet(out_path, index=False)
+        return
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    ap = argparse.ArgumentParser(description="Score every service's transcript of every show against its reference.")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--corpus", default=str(SOWELL), help="Directory to search for control.txt / reference.* files")
+    src.add_argument("--pairs", default=None, help="CSV with show, service, reference, hypothesis columns")
+    ap.add_argument("--out", default="eval_results.csv", help="Results table (.csv or .parquet)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    ap.add_argument("--no-cer", action="store_true", help="Skip character error rate (the slowest metric)")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Per-pair result cache (env EVAL_CACHE_DIR)")
+    ap.add_argument("--no-cache", action="store_true", help="Score every pair and do not write the cache")
+    add_metrics_argument(ap)
+    args = ap.parse_args()
+    start_metrics(args.metrics_out)
+
+    pairs = read_pairs_csv(args.pairs) if args.pairs else discover_pairs(args.corpus)
+    if not pairs:
+        print("No reference/hypothesis pairs found.")
+        return
+    rows = evaluate(pairs, args.jobs, cer=not args.no_cer, cache_dir=None if args.no_cache else args.cache_dir)
+    write_results(rows, args.out)
+
+    print(f"\n{'show':24s} {'service':22s} {'WER':>6s} {'covered':>8s} {'CER':>6s} {'speaker':>8s}")
+    for r in sorted(rows, key=lambda r: (r["show"], r["wer"])):
+        print(f"{r['show'][:24]:24s} {r['service'][:22]:22s} {r['wer']:6.3f} {r['wer_covered']:8.3f} "
+              f"{r['cer']:6.3f} {r['speaker_accuracy']:8.3f}")
+    print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+fetch_results.py
+----------------
+Download completed Transcribe result JSONs from S3 into a local folder.
+
+Targets come from the transcribe_batch.py job ledger (COMPLETED jobs with an output URI)
+and/or from a CSV index plus the --output-bucket/--output-prefix used when submitting.
+
+- Downloads run on a bounded thread pool sharing one boto3 S3 client.
+- Files already present locally are skipped when their size and ETag (MD5 for
+  single-part uploads, size only for multipart ETags) match the S3 object. Object
+  metadata is taken from one ListObjectsV2 pass per prefix, not one HEAD per file.
+- Each download is written to a temp file in the destination folder, checked to be a
+  Transcribe JSON (parses, has "results"), then renamed into place, so a partial or
+  corrupt file never shows up under the final name.
+- Files are saved under the object's file name; objects from different prefixes that
+  share a file name are reported as failed rather than overwriting each other.
+
+USAGE:
+    python fetch_results.py --ledger transcribe_ledger.db --out-dir outputs/
+    python fetch_results.py --csv index.csv --output-bucket pse-audio-files --output-prefix outputs/ --out-dir outputs/ --concurrency 16
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from job_ledger import JobLedger
+from metrics import add_metrics_argument, incr, span, start_metrics
+from transcribe_batch import row_job_name
+
+def parse_s3_uri(uri: str) -> Tuple[str, str]:
+    if not uri.startswith("s3://"):
+        raise ValueError(f"Not an s3:// URI: {uri}")
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+def targets_from_ledger(path: str) -> List[str]:
+    ledger = JobLedger(path)
+    try:
+        return [job["output_uri"] for job in ledger.all("COMPLETED") if job["output_uri"]]
+    finally:
+        ledger.close()
+
+def targets_from_csv(path: str, output_bucket: str, output_prefix: str) -> List[str]:
+    uris = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if not (row.get("s3_uri") or "").strip():
+                continue
+            name = row_job_name(row)
+            key = (output_prefix.rstrip("/") + "/" if output_prefix else "") + f"{name}.json"
+            uris.append(f"s3://{output_bucket}/{key}")
+    return uris
+
+def list_remote_objects(client, bucket: str, prefix: str) -> Dict[str, Tuple[str, int]]:
+    """{key: (etag, size)} for every object under prefix, via paginated ListObjectsV2."""
+    out: Dict[str, Tuple[str, int]] = {}
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        r = client.list_objects_v2(**kwargs)
+        incr("s3.api_calls.list")
+        for obj in r.get("Contents", []):
+            out[obj["Key"]] = (obj["ETag"].strip('"'), int(obj["Size"]))
+        if not r.get("IsTruncated"):
+            return out
+        kwargs["ContinuationToken"] = r["NextContinuationToken"]
+
+def file_md5(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def local_matches(path: Path, etag: str, size: int) -> bool:
+    if not path.exists() or path.stat().st_size != size or size == 0:
+        return False
+    if "-" in etag:  # multipart upload: ETag is not an MD5 of the content
+        return True
+    return file_md5(path) == etag
+
+def verify_transcribe_json(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        obj = json.load(f)
+    if not isinstance(obj, dict) or "results" not in obj:
+        raise ValueError("not a Transcribe result (no 'results' key)")
+
+def fetch_one(client, uri: str, out_dir: Path, remote: Optional[Tuple[str, int]]) -> Tuple[str, str, str]:
+    """Returns (outcome, uri, detail) with outcome one of downloaded/skipped/failed."""
+    with span("download"):
+        outcome, uri, detail = _fetch_one(client, uri, out_dir, remote)
+    incr(f"download.files.{outcome}")
+    return outcome, uri, detail
+
+def _fetch_one(client, uri: str, out_dir: Path, remote: Optional[Tuple[str, int]]) -> Tuple[str, str, str]:
+    bucket, key = parse_s3_uri(uri)
+    dest = out_dir / Path(key).name
+    try:
+        if remote is None:
+            incr("s3.api_calls.head")
+            head = client.head_object(Bucket=bucket, Key=key)
+            remote = (head["ETag"].strip('"'), int(head["ContentLength"]))
+        etag, size = remote
+        if local_matches(dest, etag, size):
+            return "skipped", uri, "up to date"
+        fd, tmp = tempfile.mkstemp(prefix=f".{dest.name}.", suffix=".part", dir=out_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                incr("s3.api_calls.get")
+                body = client.get_object(Bucket=bucket, Key=key)["Body"]
+                for chunk in iter(lambda: body.read(1 << 20), b""):
+                    f.write(chunk)
+            if os.path.getsize(tmp) != size:
+                raise ValueError(f"size mismatch: got {os.path.getsize(tmp)} bytes, expected {size}")
+            verify_transcribe_json(Path(tmp))
+            os.replace(tmp, dest)
+            incr("download.bytes", size)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return "downloaded", uri, f"{size} bytes"
+    except Exception as e:
+        return "failed", uri, str(e)
+
+def name_clashes(uris: List[str]) -> Dict[str, List[str]]:
+    """{uri: other uris} for objects that would land on the same local file name."""
+    by_name: Dict[str, List[str]] = {}
+    for uri in uris:
+        by_name.setdefault(Path(parse_s3_uri(uri)[1]).name, []).append(uri)
+    return {u: [o for o in group if o != u] for group in by_name.values() if len(group) > 1 for u in group}
+
+def fetch_all(client, uris: List[str], out_dir: str, concurrency: int = 8) -> Dict[str, List[str]]:
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    uris = list(dict.fromkeys(uris))
+
+    # Files are saved flat under their object's file name, so two prefixes holding the same
+    # name would overwrite each other: fetch neither and report both.
+    summary: Dict[str, List[str]] = {"downloaded": [], "skipped": [], "failed": []}
+    clashes = name_clashes(uris)
+    for uri, others in clashes.items():
+        summary["failed"].append(uri)
+        incr("download.files.failed")
+        print(f"Failed: {uri} (same file name as {', '.join(others)})")
+    uris = [u for u in uris if u not in clashes]
+
+    # One listing per (bucket, folder) instead of a HEAD per object; keys not listed fall back to HEAD.
+    remote: Dict[str, Tuple[str, int]] = {}
+    for bucket, prefix in sorted({(parse_s3_uri(u)[0], parse_s3_uri(u)[1].rpartition("/")[0]) for u in uris}):
+        try:
+            for key, meta in list_remote_objects(client, bucket, prefix + "/" if prefix else "").items():
+                remote[f"s3://{bucket}/{key}"] = meta
+        except Exception as e:
+            print(f"WARNING: could not list s3://{bucket}/{prefix}: {e}", file=sys.stderr)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for outcome, uri, detail in pool.map(lambda u: fetch_one(client, u, out, remote.get(u)), uris):
+            summary[outcome].append(uri)
+            if outcome != "skipped":
+                print(f"{outcome.capitalize()}: {uri} ({detail})")
+    return summary
+
+def main():
+    ap = argparse.ArgumentParser(description="Download completed Transcribe JSONs from S3.")
+    ap.add_argument("--ledger", default=None, help="transcribe_batch.py job ledger (COMPLETED jobs are fetched)")
+    ap.add_argument("--csv", default=None, help="CSV index (job names -> <output-prefix>/<job_name>.json)")
+    ap.add_argument("--output-bucket", default=None, help="Bucket the jobs wrote to (with --csv)")
+    ap.add_argument("--output-prefix", default="", help="Prefix the jobs wrote to (with --csv)")
+    ap.add_argument("--out-dir", default="outputs", help="Local destination folder")
+    ap.add_argument("--concurrency", type=int, default=8, help="Parallel downloads")
+    ap.add_argument("--region", default=os.environ.get("AWS_REGION","us-east-2"))
+    ap.add_argument("--profile", default="my-transcribe", help="AWS CLI profile name")
+    add_metrics_argument(ap)
+    args = ap.parse_args()
+    start_metrics(args.metrics_out)
+
+    uris: List[str] = []
+    if args.ledger:
+        uris += targets_from_ledger(args.ledger)
+    if args.csv:
+        if not args.output_bucket:
+            raise SystemExit("--output-bucket is required with --csv")
+        uris += targets_from_csv(args.csv, args.output_bucket, args.output_prefix)
+    if not uris:
+        raise SystemExit("Nothing to fetch: pass --ledger and/or --csv.")
+
+    import boto3
+    from dotenv import load_dotenv
+    load_dotenv()
+    session = boto3.Session(region_name=args.region, profile_name=args.profile)
+    client = session.client("s3")
+
+    summary = fetch_all(client, uris, args.out_dir, concurrency=args.concurrency)
+    print(f"Downloaded: {len(summary['downloaded'])}, skipped: {len(summary['skipped'])}, failed: {len(summary['failed'])}")
+    if summary["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
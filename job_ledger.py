@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+job_ledger.py
+-------------
+Local SQLite record of every Transcribe job transcribe_batch.py has started, so
+reruns over the same CSV are incremental instead of starting every job again.
+
+One row per job_name:
+- s3_uri        : source audio
+- settings_hash : hash of the job request (minus tags); a changed hash means the row's settings changed
+- status        : SUBMITTED, QUEUED, IN_PROGRESS, COMPLETED, FAILED
+- output_uri    : where Transcribe writes the result JSON
+- error         : last error message, if any
+- submitted_at / updated_at : unix timestamps
+
+USAGE (inspect a ledger):
+    python job_ledger.py transcribe_ledger.db
+    python job_ledger.py transcribe_ledger.db --status FAILED
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+ACTIVE_STATUSES = ("SUBMITTED", "QUEUED", "IN_PROGRESS")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_name      TEXT PRIMARY KEY,
+    s3_uri        TEXT,
+    settings_hash TEXT,
+    status        TEXT NOT NULL,
+    output_uri    TEXT,
+    error         TEXT,
+    submitted_at  REAL,
+    updated_at    REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status);
+"""
+
+def settings_hash(request: Dict[str, Any]) -> str:
+    """Stable hash of a start_*_job request. Tags are ignored (they carry the CSV file name)."""
+    body = {k: v for k, v in request.items() if k != "Tags"}
+    return hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+
+class JobLedger:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, job_name: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT * FROM jobs WHERE job_name = ?", (job_name,)).fetchone()
+        return dict(row) if row else None
+
+    def all(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        if status:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY job_name", (status,))
+        else:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY job_name")
+        return [dict(r) for r in rows]
+
+    def record_submitted(self, job_name: str, s3_uri: str, settings_hash: str, output_uri: Optional[str],
+                         status: str = "SUBMITTED"):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO jobs (job_name, s3_uri, settings_hash, status, output_uri, error, submitted_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, NULL, ?, ?)
+                   ON CONFLICT(job_name) DO UPDATE SET
+                       s3_uri = excluded.s3_uri, settings_hash = excluded.settings_hash,
+                       status = excluded.status, output_uri = excluded.output_uri, error = NULL,
+                       submitted_at = excluded.submitted_at, updated_at = excluded.updated_at""",
+                (job_name, s3_uri, settings_hash, status, output_uri, now, now))
+
+    def update_status(self, job_name: str, status: str, output_uri: Optional[str] = None,
+                      error: Optional[str] = None):
+        with self.conn:
+            self.conn.execute(
+                """UPDATE jobs SET status = ?, output_uri = COALESCE(?, output_uri), error = ?, updated_at = ?
+                   WHERE job_name = ?""",
+                (status, output_uri, error, time.time(), job_name))
+
+    def counts(self) -> Dict[str, int]:
+        return {r[0]: r[1] for r in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")}
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="List jobs recorded in a transcribe_batch ledger.")
+    ap.add_argument("ledger", help="SQLite ledger path")
+    ap.add_argument("--status", default=None, help="Only show jobs with this status")
+    args = ap.parse_args()
+
+    ledger = JobLedger(args.ledger)
+    for job in ledger.all(args.status):
+        print(f"{job['job_name']}\t{job['status']}\t{job['output_uri'] or ''}\t{job['error'] or ''}")
+    print(", ".join(f"{k}: {v}" for k, v in sorted(ledger.counts().items())))
+    ledger.close()
+
+if __name__ == "__main__":
+    main()
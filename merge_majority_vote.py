@@ -2,60 +2,315 @@
 """
 merge_majority_vote.py
 ----------------------
-Merge 2 to 5 Amazon Transcribe JSON outputs for the *same* audio into a single transcript
-via a simple majority-vote alignment. This can reduce random mis-hearings. Designed
-to work with JSONs produced by Amazon Transcribe (standard jobs).
+Merge 2 to 5 transcripts of the *same* audio into a single transcript via a simple
+majority-vote alignment. This can reduce random mis-hearings. Inputs may be any
+format transcript_ingest.py reads: Transcribe JSON, SRT/VTT (Whisper), Otter,
+Word and plain-text exports.
 
-Approach (simple, robust, not perfect):
-- Extract word tokens with (start_time, content) from each JSON.
+Approach (default, --align rover):
+- Extract each run's words in order with (start_time, word, confidence, trailing punctuation);
+  hyphenated vocabulary phrases ("Eagle-Forum-Live") are split into words.
+- Progressively align the runs into a word transition network (ROVER-style): each run is
+  aligned to the network with an edit distance restricted to words within --window-sec of
+  each other, so cost stays close to linear on hour-long inputs and clock drift between
+  runs does not break alignment.
+- In each network slot, score every candidate word by alpha * (votes / runs) + (1 - alpha) *
+  mean confidence; a missing word (null arc) scores with --null-conf. Null wins drop the slot.
+- Punctuation follows the majority of the runs that produced the winning word.
+
+Legacy approach (--align bucket):
 - Round start_time to a fixed resolution bucket (default 0.2s) to align words across runs.
 - For each bucket, compute the most frequent normalized token (casefolded) with a tie-breaker by highest average confidence.
 - Re-inject punctuation by the most common punctuation token that appeared *after* the last word in that bucket window.
-- Output a plain-text transcript (or JSON with confidences if --json-out).
+- All runs are stacked into one WordTable (word_table.py) and voted with array operations (majority_vote_tables).
+
+Output a plain-text transcript (or JSON with confidences if --json-out).
+
+Inputs without per-word times:
+- SRT/VTT cue and Otter turn times are interpolated over their words when read.
+- Untimed inputs (plain text, Word) borrow times from the first timed input: their words
+  are aligned to its words (error_rates.align), hits take their partner's times and the
+  rest are interpolated between hits. At least one input must be timed.
+- Words from formats without confidences vote with --text-conf.
 
 Ambiguities / caveats:
-- If two services drift in timing significantly, bucket-based alignment may misalign. Tune --bucket-sec accordingly.
+- If two services drift in timing by more than --window-sec, widen it (rover) or tune --bucket-sec (bucket).
 - This ignores speaker attribution. After merging, you can run diarization_to_markdown.py against a single best JSON to get speaker turns.
-- If your three inputs were different *services* (e.g., Transcribe + Whisper), ensure they all have per-word timestamps; otherwise this script will skip ones without them.
 """
 
 import argparse
+import bisect
 import json
 from pathlib import Path
 from collections import defaultdict, Counter
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Iterable, Optional
+
+import numpy as np
+
+from error_rates import MATCH, align
+from metrics import add_metrics_argument, incr, span, start_metrics
+from transcript_cache import DEFAULT_CACHE_DIR, TranscriptCache, load_transcript, open_cache
+from word_table import WordTable, bucket_keys
 
 def extract_words(obj: Dict[str, Any]) -> List[Tuple[float, str, float]]:
     """Return list of (start_time, word, confidence)."""
-    out = []
-    for it in obj.get("results", {}).get("items", []):
+    return extract_tokens(obj.get("results", {}).get("items", []))[0]
+
+def extract_tokens(items: Iterable[Dict[str, Any]]) -> Tuple[List[Tuple[float, str, float]], List[Tuple[float, str]]]:
+    """Single pass over items returning (words, puncts) as extract_words/extract_punct would.
+    Works on a streamed item iterator, so the full JSON never has to be loaded."""
+    words = []
+    puncts = []
+    last_word_time = None
+    for it in items:
         if it.get("type") == "pronunciation":
+            try:
+                last_word_time = float(it["start_time"])
+            except Exception:
+                pass
             try:
                 start = float(it["start_time"])
                 word = it["alternatives"][0]["content"]
                 conf = float(it["alternatives"][0].get("confidence", "0.0"))
-                out.append((start, word, conf))
+                words.append((start, word, conf))
             except Exception:
                 continue
-    return out
+        else:
+            if last_word_time is not None:
+                puncts.append((last_word_time, it["alternatives"][0]["content"]))
+    return words, puncts
 
 def extract_punct(obj: Dict[str, Any]) -> List[Tuple[float, str]]:
     """Heuristic: associate punctuation with the *end_time* of the previous word when available.
     Amazon Transcribe punctuation items do not have timestamps; we attach them to the previous word's time
     during pass-through collection.
     """
-    puncts = []
-    last_word_time = None
-    for it in obj.get("results", {}).get("items", []):
+    return extract_tokens(obj.get("results", {}).get("items", []))[1]
+
+def extract_sequence(items: Iterable[Dict[str, Any]]) -> List[Tuple[float, float, str, float, Optional[str]]]:
+    """Words in order as (start, end, word, confidence, trailing punctuation or None)."""
+    seq: List[Tuple[float, float, str, float, Optional[str]]] = []
+    for it in items:
         if it.get("type") == "pronunciation":
             try:
-                last_word_time = float(it["start_time"])
+                start = float(it["start_time"])
+                end = float(it.get("end_time", start))
+                alt = it["alternatives"][0]
+                seq.append((start, end, alt["content"], float(alt.get("confidence", "0.0")), None))
             except Exception:
-                pass
+                continue
+        elif seq and seq[-1][4] is None:
+            s, e, w, c, _ = seq[-1]
+            seq[-1] = (s, e, w, c, it["alternatives"][0]["content"])
+    return seq
+
+def table_sequence(table: WordTable) -> List[Tuple[float, float, str, float, Optional[str]]]:
+    """extract_sequence over a WordTable: a punctuation row directly after a word becomes its punctuation."""
+    rows = np.flatnonzero(table.is_word)
+    punct = np.full(len(table), -1, dtype=np.int64)
+    follows_word = np.flatnonzero(~table.is_word[1:] & table.is_word[:-1])
+    punct[follows_word] = table.token[follows_word + 1]
+    texts = table.vocab
+    return [(s, e, texts[t], c, texts[p] if p >= 0 else None)
+            for s, e, t, c, p in zip(table.start[rows].tolist(), table.end[rows].tolist(), table.token[rows].tolist(),
+                                     table.conf[rows].tolist(), punct[rows].tolist())]
+
+def borrow_times(table: WordTable, timed: WordTable) -> WordTable:
+    """Copy of an untimed table with word times from a timed run of the same audio: words
+    aligned as hits to the timed run's words take their times, the others are
+    interpolated between hits by position (and clamped before the first / after the last)."""
+    rows, timed_rows = np.flatnonzero(table.is_word), np.flatnonzero(timed.is_word)
+    a = align([w.casefold() for w in timed.text(timed_rows)], [w.casefold() for w in table.text(rows)])
+    hits = np.flatnonzero(a.ops == MATCH)
+    if not len(hits):
+        raise SystemExit("An untimed input shares no words with the timed input it borrows times from.")
+    pos, partner = a.hyp_idx[hits], timed_rows[a.ref_idx[hits]]
+    start, end = table.start.copy(), table.end.copy()
+    start[rows] = np.interp(np.arange(len(rows)), pos, timed.start[partner])
+    end[rows] = np.interp(np.arange(len(rows)), pos, timed.end[partner])
+    out = WordTable(start, end, table.conf, table.token, table.is_word, table.vocab)
+    out.speaker = table.speaker
+    return out
+
+def prepare_tables(tables: List[WordTable], text_conf: float) -> List[WordTable]:
+    """Give untimed tables borrowed times and words without confidences text_conf."""
+    timed = [t for t in tables if np.any(t.is_word & ~np.isnan(t.start))]
+    if not timed:
+        raise SystemExit("None of the inputs has word times (Transcribe JSON, SRT/VTT or an Otter export with stamps).")
+    out = []
+    for table in tables:
+        if not np.any(table.is_word & ~np.isnan(table.start)):
+            table = borrow_times(table, timed[0])
+        missing = np.isnan(table.conf)
+        if missing.any():
+            speaker = table.speaker
+            table = WordTable(table.start, table.end, np.where(missing, text_conf, table.conf), table.token,
+                              table.is_word, table.vocab)
+            table.speaker = speaker
+        out.append(table)
+    return out
+
+def split_hyphenated(seq: List[Tuple[float, float, str, float, Optional[str]]]) -> List[Tuple[float, float, str, float, Optional[str]]]:
+    """Split custom-vocabulary phrases Transcribe emits as one hyphenated token
+    (e.g. "Eagle-Forum-Live") into words with interpolated times, so they align
+    word-for-word against runs without that vocabulary."""
+    out = []
+    for start, end, word, conf, punct in seq:
+        parts = [p for p in word.split("-") if p]
+        if len(parts) < 2 or not all(p[:1].isalpha() for p in parts):
+            out.append((start, end, word, conf, punct))
+            continue
+        step = (end - start) / len(parts)
+        for k, part in enumerate(parts):
+            out.append((start + k * step, start + (k + 1) * step, part, conf,
+                        punct if k == len(parts) - 1 else None))
+    return out
+
+# ---------------------------------------------------------------------------
+# ROVER-style alignment: progressive multiple alignment into a word transition
+# network (WTN), one slot per aligned position, then confidence-weighted voting.
+# ---------------------------------------------------------------------------
+
+class Slot:
+    """One WTN column: per-run entry (word, conf, punct, start) or None for a null arc."""
+    __slots__ = ("entries", "time", "norms")
+
+    def __init__(self, n_runs: int):
+        self.entries: List[Optional[Tuple[str, float, Optional[str], float]]] = [None] * n_runs
+        self.time = 0.0
+        self.norms: set = set()
+
+    def add(self, run: int, entry: Tuple[str, float, Optional[str], float]):
+        self.entries[run] = entry
+        self.norms.add(entry[0].casefold())
+        present = [e[3] for e in self.entries if e is not None]
+        self.time = sum(present) / len(present)
+
+def _bands(slot_times: List[float], word_times: List[float], window: float) -> List[Tuple[int, int]]:
+    """Per DP row j (j words consumed), the range of slot-prefix lengths i to evaluate.
+    Rows follow the words' times +/- window; ranges are made monotone and overlapping so a
+    path always exists (slots in a long one-sided gap are simply deleted along a wider row)."""
+    n, m = len(slot_times), len(word_times)
+    bands = [(0, 0)] * (m + 1)
+    lo_prev, hi_prev = 0, 0
+    for j in range(1, m + 1):
+        t = word_times[j - 1]
+        lo = max(lo_prev, bisect.bisect_left(slot_times, t - window))
+        hi = max(hi_prev, min(n, bisect.bisect_right(slot_times, t + window) + 1))
+        lo = min(lo, hi_prev + 1, n)
+        bands[j] = (lo, hi)
+        lo_prev, hi_prev = lo, hi
+    first_lo = bands[1][0] if m else n
+    bands[0] = (0, max(first_lo, 0) if m else n)
+    lo, _ = bands[m]
+    bands[m] = (lo, n)
+    return bands
+
+def align_run(slots: List[Slot], seq: List[Tuple[float, float, str, float, Optional[str]]], run: int,
+              n_runs: int, window: float = 2.0) -> List[Slot]:
+    """Align one run's word sequence against the WTN with a time-banded edit distance
+    (match 0, substitution/insertion/deletion 1) and return the extended WTN."""
+    n, m = len(slots), len(seq)
+    slot_times = [sl.time for sl in slots]
+    bands = _bands(slot_times, [w[0] for w in seq], window)
+    INF = float("inf")
+    # cost[j] / back[j] hold row j for i in bands[j]; back: 0 diag, 1 up (delete slot), 2 left (insert word)
+    cost: List[List[float]] = []
+    back: List[List[int]] = []
+    for j in range(m + 1):
+        lo, hi = bands[j]
+        row = [INF] * (hi - lo + 1)
+        brow = [0] * (hi - lo + 1)
+        if j > 0:
+            plo, phi = bands[j - 1]
+            prow = cost[j - 1]
+            norm = seq[j - 1][2].casefold()
+        for i in range(lo, hi + 1):
+            k = i - lo
+            if j == 0:
+                row[k], brow[k] = float(i), 1
+                continue
+            best, b = INF, 0
+            if plo <= i - 1 <= phi and i >= 1:
+                c = prow[i - 1 - plo] + (0 if norm in slots[i - 1].norms else 1)
+                if c < best:
+                    best, b = c, 0
+            if plo <= i <= phi:
+                c = prow[i - plo] + 1
+                if c < best:
+                    best, b = c, 2
+            if k > 0 and row[k - 1] + 1 < best:
+                best, b = row[k - 1] + 1, 1
+            row[k], brow[k] = best, b
+        cost.append(row)
+        back.append(brow)
+
+    # Trace back from (n, m)
+    ops = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        lo, _ = bands[j]
+        b = back[j][i - lo] if j > 0 else 1
+        if b == 0:
+            ops.append(("match", i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif b == 1:
+            ops.append(("delete", i - 1, None))
+            i -= 1
         else:
-            if last_word_time is not None:
-                puncts.append((last_word_time, it["alternatives"][0]["content"]))
-    return puncts
+            ops.append(("insert", None, j - 1))
+            j -= 1
+    ops.reverse()
+
+    out: List[Slot] = []
+    for op, si, wj in ops:
+        if op == "insert":
+            sl = Slot(n_runs)
+        else:
+            sl = slots[si]
+        if wj is not None:
+            start, _end, word, conf, punct = seq[wj]
+            sl.add(run, (word, conf, punct, start))
+        out.append(sl)
+    return out
+
+def build_wtn(runs: List[List[Tuple[float, float, str, float, Optional[str]]]], window: float = 2.0) -> List[Slot]:
+    """Progressively align every run into one WTN (run 0 seeds the network)."""
+    slots: List[Slot] = []
+    for r, seq in enumerate(runs):
+        slots = align_run(slots, seq, r, len(runs), window)
+    return slots
+
+def rover_vote(slots: List[Slot], alpha: float = 0.5, null_conf: float = 0.7) -> List[Tuple[float, str, float, Optional[str]]]:
+    """Pick one word per slot: score(w) = alpha * N(w)/N + (1 - alpha) * mean confidence of w.
+    The null arc scores alpha * N(null)/N + (1 - alpha) * null_conf; slots won by null are dropped.
+    Returns [(time, word, avg_conf, punct)]."""
+    merged = []
+    for sl in slots:
+        n = len(sl.entries)
+        groups: Dict[str, List[Tuple[str, float, Optional[str], float]]] = defaultdict(list)
+        nulls = 0
+        for e in sl.entries:
+            if e is None:
+                nulls += 1
+            else:
+                groups[e[0].casefold()].append(e)
+        best_score = alpha * nulls / n + (1 - alpha) * null_conf if nulls else -1.0
+        best = None
+        for norm, es in groups.items():
+            avg = sum(e[1] for e in es) / len(es)
+            score = alpha * len(es) / n + (1 - alpha) * avg
+            if score > best_score:
+                best_score, best = score, (es, avg)
+        if best is None:
+            continue
+        es, avg = best
+        punct = Counter(e[2] for e in es).most_common(1)[0][0]
+        merged.append((sl.time, es[0][0], avg, punct))
+    return merged
+
+def compose_rover_text(words: List[Tuple[float, str, float, Optional[str]]]) -> str:
+    return " ".join(w + (p or "") for (_t, w, _c, p) in words)
 
 def bucketize(t: float, bucket: float) -> float:
     return round(t / bucket) * bucket
@@ -84,6 +339,41 @@ def majority_vote_punct(punct_buckets: Dict[float, List[str]]) -> Dict[float, st
             out[b] = counts.most_common(1)[0][0]
     return out
 
+def majority_vote_tables(tables: List[WordTable], bucket: float) -> Tuple[List[Tuple[float, str, float]], Dict[float, str]]:
+    """Vectorized majority_vote_word + majority_vote_punct over all runs at once.
+    Same winners, casing, confidences and tie-breaks (first appearance) as the dict version."""
+    table = WordTable.concat(tables)
+    norm, _ = table.normalized_ids()
+    anchors = table.anchor_times()
+
+    w = np.flatnonzero(table.is_word)
+    keys = bucket_keys(table.start[w], bucket)
+    best = _vote_groups(keys, norm[w], table.conf[w])
+    words = [(k, table.vocab[t], c) for k, t, c in zip(keys[best["first"]].tolist(),
+                                                        table.token[w][best["first"]].tolist(),
+                                                        (best["conf_sum"] / best["count"]).tolist())]
+
+    p = np.flatnonzero(~table.is_word & ~np.isnan(anchors))
+    pkeys = bucket_keys(anchors[p], bucket)
+    best = _vote_groups(pkeys, table.token[p], table.conf[p])
+    punct_at = {k: table.vocab[t] for k, t in zip(pkeys[best["first"]].tolist(), table.token[p][best["first"]].tolist())}
+    return words, punct_at
+
+def _vote_groups(keys: np.ndarray, values: np.ndarray, conf: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per distinct key (ascending), the most frequent value; ties go to the value seen first.
+    Returns row index of its first occurrence, its count and its summed confidence."""
+    if not len(keys):
+        empty = np.zeros(0, dtype=np.int64)
+        return {"first": empty, "count": empty, "conf_sum": empty.astype(np.float64)}
+    _, key_id = np.unique(keys, return_inverse=True)
+    _, first, group, count = np.unique(key_id.astype(np.int64) * (int(values.max()) + 1) + values,
+                                       return_inverse=True, return_index=True, return_counts=True)
+    conf_sum = np.bincount(group, weights=conf)
+    group_key = key_id[first]
+    order = np.lexsort((first, -count, group_key))
+    winners = order[np.flatnonzero(np.diff(group_key[order], prepend=-1) != 0)]
+    return {"first": first[winners], "count": count[winners], "conf_sum": conf_sum[winners]}
+
 def compose_text(words: List[Tuple[float, str, float]], punct_at: Dict[float, str]) -> str:
     pieces = []
     last_added_bucket = None
@@ -96,42 +386,75 @@ def compose_text(words: List[Tuple[float, str, float]], punct_at: Dict[float, st
             pieces.append(punct_at[b])
     return "".join(pieces)
 
+def merge_files(inputs: List[str], out_path: str, align: str = "rover", window: float = 2.0, alpha: float = 0.5,
+                null_conf: float = 0.7, text_conf: float = 0.9, keep_hyphens: bool = False, bucket_sec: float = 0.2,
+                json_out: bool = False, stream: bool = False, cache: Optional[TranscriptCache] = None) -> int:
+    """Merge the transcripts in inputs into out_path (text, or JSON with json_out). Returns the word count."""
+    with span("merge"):
+        words = _merge_files(inputs, out_path, align, window, alpha, null_conf, text_conf, keep_hyphens,
+                             bucket_sec, json_out, stream, cache)
+    incr("merge.inputs", len(inputs))
+    incr("merge.words", words)
+    return words
+
+def _merge_files(inputs: List[str], out_path: str, align: str, window: float, alpha: float, null_conf: float,
+                 text_conf: float, keep_hyphens: bool, bucket_sec: float, json_out: bool, stream: bool,
+                 cache: Optional[TranscriptCache]) -> int:
+    tables = prepare_tables([load_transcript(path, stream, cache)[0] for path in inputs], text_conf)
+
+    if align == "rover":
+        runs = [table_sequence(table) for table in tables]
+        if not keep_hyphens:
+            runs = [split_hyphenated(seq) for seq in runs]
+        merged = rover_vote(build_wtn(runs, window), alpha, null_conf)
+        if json_out:
+            data = [{"time": t, "word": w, "avg_conf": c, "punct": p} for (t, w, c, p) in merged]
+            Path(out_path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        else:
+            Path(out_path).write_text(compose_rover_text(merged), encoding="utf-8")
+        return len(merged)
+
+    merged_words, merged_punct = majority_vote_tables(tables, bucket_sec)
+
+    if json_out:
+        data = [{"time": t, "word": w, "avg_conf": c, "punct": merged_punct.get(t)} for (t, w, c) in merged_words]
+        Path(out_path).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    else:
+        text = compose_text(merged_words, merged_punct)
+        Path(out_path).write_text(text, encoding="utf-8")
+    return len(merged_words)
+
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--inputs", nargs="+", required=True, help="2–5 Transcribe JSONs for the same audio")
+    ap.add_argument("--inputs", nargs="+", required=True,
+                    help="2–5 transcripts of the same audio (Transcribe JSON, SRT/VTT, Otter/Word/plain text)")
     ap.add_argument("--out", default="merged_transcript.txt", help="Output text file")
-    ap.add_argument("--bucket-sec", type=float, default=0.2, help="Time bucket size in seconds")
+    ap.add_argument("--align", choices=["rover", "bucket"], default="rover",
+                    help="rover: time-banded multiple alignment + confidence-weighted vote; bucket: legacy rounded-time buckets")
+    ap.add_argument("--window-sec", type=float, default=2.0, help="rover: max time distance between aligned words")
+    ap.add_argument("--alpha", type=float, default=0.5, help="rover: weight of vote count vs confidence")
+    ap.add_argument("--null-conf", type=float, default=0.7, help="rover: confidence assigned to a missing word")
+    ap.add_argument("--text-conf", type=float, default=0.9,
+                    help="Confidence of words from inputs that carry none (SRT/VTT, text exports)")
+    ap.add_argument("--keep-hyphens", action="store_true", help="rover: do not split hyphenated vocabulary phrases before aligning")
+    ap.add_argument("--bucket-sec", type=float, default=0.2, help="bucket: time bucket size in seconds")
     ap.add_argument("--json-out", action="store_true", help="Write JSON with per-word confidence instead of text")
+    ap.add_argument("--stream", action="store_true", help="Read each JSON incrementally instead of loading it whole (other formats always stream)")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                    help="Parsed-transcript cache (see transcript_cache.py; env TRANSCRIPT_CACHE_DIR)")
+    ap.add_argument("--cache-max-mb", type=float, default=2048, help="Evict least recently used cache entries beyond this size")
+    ap.add_argument("--no-cache", action="store_true", help="Always parse the JSONs; do not read or write the cache")
+    add_metrics_argument(ap)
     args = ap.parse_args()
+    start_metrics(args.metrics_out)
 
     if not (2 <= len(args.inputs) <= 5):
         raise SystemExit("Please provide 2–5 inputs.")
 
-    word_buckets: Dict[float, List[Tuple[str, float]]] = defaultdict(list)
-    punct_buckets: Dict[float, List[str]] = defaultdict(list)
-
-    for path in args.inputs:
-        with open(path, "r", encoding="utf-8") as f:
-            obj = json.load(f)
-        words = extract_words(obj)
-        puncts = extract_punct(obj)
-        for (t, w, c) in words:
-            b = bucketize(t, args.bucket_sec)
-            word_buckets[b].append((w, c))
-        for (t, p) in puncts:
-            b = bucketize(t, args.bucket_sec)
-            punct_buckets[b].append(p)
-
-    merged_words = majority_vote_word(word_buckets)
-    merged_punct = majority_vote_punct(punct_buckets)
-
-    if args.json_out:
-        data = [{"time": t, "word": w, "avg_conf": c, "punct": merged_punct.get(t)} for (t, w, c) in merged_words]
-        Path(args.out).write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    else:
-        text = compose_text(merged_words, merged_punct)
-        Path(args.out).write_text(text, encoding="utf-8")
-
+    cache = None if args.no_cache else open_cache(args.cache_dir, args.cache_max_mb)
+    merge_files(args.inputs, args.out, align=args.align, window=args.window_sec, alpha=args.alpha,
+                null_conf=args.null_conf, text_conf=args.text_conf, keep_hyphens=args.keep_hyphens,
+                bucket_sec=args.bucket_sec, json_out=args.json_out, stream=args.stream, cache=cache)
     print(f"Wrote {args.out}")
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+----------
+Span timers and counters shared by the scripts, written out with --metrics-out.
+
+    from metrics import incr, span
+
+    with span("render"):                 # count, total and max seconds per span name
+        ...
+    incr("transcribe.api_calls.start")   # counters: API calls, retries, words, bytes, ...
+
+Recording is off until a script's main() calls start_metrics(args.metrics_out) with
+a path; until then span() hands back one shared no-op context manager and incr()
+returns at its first line, so instrumented code costs a few hundred nanoseconds per
+call (the calls sit around whole files and API requests, never per word).
+
+At exit the totals are written to the path:
+- *.prom : Prometheus textfile-collector format (node_exporter --collector.textfile),
+           written to a temp file and renamed, as the collector expects;
+- else   : JSON {"script", "argv", "started_at", "wall_seconds", "counters", "spans"}.
+
+Worker processes keep their own totals: submit worker_call(enabled(), fn, *args) to
+the pool instead of fn(*args), and pass its result through absorb() in the parent.
+
+Span and counter names (dotted, stage first):
+    transcribe.submit / .poll, transcribe.api_calls.{start,list,get,delete},
+    transcribe.throttle_retries, transcribe.backoff_seconds, transcribe.rate_limit_wait_seconds
+    download, download.bytes, download.files.{downloaded,skipped,failed}, s3.api_calls.{list,head,get}
+    parse, parse.bytes, parse.items, cache.get, cache.hits, cache.misses, assign_speakers
+    render, render.write, render.turns, merge, merge.inputs, merge.words
+    pipeline.<stage> (stage run times), index.update, index.turns, evaluate.score,
+    speaker_id.decode, speaker_id.prints
+
+USAGE:
+    python diarization_to_markdown.py --batch outputs/ --metrics-out render_metrics.json
+    python pipeline.py --csv index_full.csv ... --metrics-out /var/lib/node_exporter/textfile/transcripts.prom
+    python metrics.py render_metrics.json        # print a saved JSON as a table
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+PROM_PREFIX = "transcripts"
+
+class Metrics:
+    """Counters and span totals for one process. Thread-safe once enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.counters: Counter = Counter()
+        self.spans: Dict[str, list] = {}  # name -> [count, total seconds, max seconds]
+
+    def incr(self, name: str, n: float = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] += n
+
+    def observe(self, name: str, secs: float):
+        if not self.enabled:
+            return
+        with self.lock:
+            s = self.spans.get(name)
+            if s is None:
+                self.spans[name] = [1, secs, secs]
+            else:
+                s[0] += 1
+                s[1] += secs
+                s[2] = max(s[2], secs)
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"counters": dict(self.counters), "spans": {k: list(v) for k, v in self.spans.items()}}
+
+    def merge(self, snap: Dict[str, Any]):
+        with self.lock:
+            self.counters.update(snap["counters"])
+            for name, (count, total, peak) in snap["spans"].items():
+                s = self.spans.setdefault(name, [0, 0.0, 0.0])
+                s[0] += count
+                s[1] += total
+                s[2] = max(s[2], peak)
+
+class _Span:
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+_NO_SPAN = contextlib.nullcontext()
+
+METRICS = Metrics()
+
+def enabled() -> bool:
+    return METRICS.enabled
+
+def span(name: str):
+    """Context manager timing its block under `name` (a shared no-op while disabled)."""
+    return _Span(METRICS, name) if METRICS.enabled else _NO_SPAN
+
+def incr(name: str, n: float = 1):
+    METRICS.incr(name, n)
+
+def observe(name: str, secs: float):
+    """Record a duration measured elsewhere (e.g. a job that ran in another thread) as a span."""
+    METRICS.observe(name, secs)
+
+# ---- worker processes ----
+
+def worker_call(on: bool, fn: Callable, *args) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """Run fn(*args) in a pool worker; returns (result, what it recorded) for absorb()."""
+    if not on:
+        return fn(*args), None
+    METRICS.enabled = True
+    METRICS.reset()  # forked workers start with a copy of the parent's totals
+    result = fn(*args)
+    return result, METRICS.snapshot()
+
+def absorb(out: Tuple[Any, Optional[Dict[str, Any]]]) -> Any:
+    """Fold a worker_call() result's metrics into this process and return fn's result."""
+    result, snap = out
+    if snap is not None:
+        METRICS.merge(snap)
+    return result
+
+# ---- output ----
+
+def add_metrics_argument(ap):
+    ap.add_argument("--metrics-out", default=os.environ.get("METRICS_OUT"), metavar="PATH",
+                    help="Write span timings and counters here at exit: .prom for a Prometheus textfile, "
+                         "else JSON (env METRICS_OUT)")
+
+_RUN: Dict[str, Any] = {}
+
+def start_metrics(path: Optional[str]):
+    """Turn recording on and write the totals to path when the process exits. No-op without a path."""
+    if not path:
+        return
+    METRICS.enabled = True
+    _RUN.update(path=path, script=Path(sys.argv[0]).stem, argv=sys.argv[1:], started_at=time.time(),
+                t0=time.perf_counter())
+    atexit.register(_write_at_exit)
+
+def _write_at_exit():
+    try:
+        write(_RUN["path"])
+    except OSError as e:
+        print(f"WARNING: could not write metrics to {_RUN['path']}: {e}", file=sys.stderr)
+
+def report() -> Dict[str, Any]:
+    snap = METRICS.snapshot()
+    return {
+        "script": _RUN.get("script", Path(sys.argv[0]).stem),
+        "argv": _RUN.get("argv", sys.argv[1:]),
+        "started_at": _RUN.get("started_at"),
+        "wall_seconds": time.perf_counter() - _RUN["t0"] if "t0" in _RUN else None,
+        "counters": dict(sorted(snap["counters"].items())),
+        "spans": {name: {"count": c, "seconds": total, "max_seconds": peak}
+                  for name, (c, total, peak) in sorted(snap["spans"].items())},
+    }
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else f"{v:.6f}"
+
+def prometheus_text(rep: Dict[str, Any]) -> str:
+    script = _label(rep["script"])
+    p = PROM_PREFIX
+    lines = [f"# HELP {p}_run_seconds Wall time of the last run.", f"# TYPE {p}_run_seconds gauge",
+             f'{p}_run_seconds{{script="{script}"}} {rep["wall_seconds"] or 0:.6f}',
+             f"# HELP {p}_run_timestamp_seconds Start of the last run, Unix time.", f"# TYPE {p}_run_timestamp_seconds gauge",
+             f'{p}_run_timestamp_seconds{{script="{script}"}} {rep["started_at"] or 0:.3f}']
+    lines += [f"# HELP {p}_events_total Counters (API calls, retries, words, bytes, ...) of the last run.",
+              f"# TYPE {p}_events_total counter"]
+    lines += [f'{p}_events_total{{script="{script}",name="{_label(k)}"}} {_num(v)}' for k, v in rep["counters"].items()]
+    for suffix, key, kind, help_text in (("count", "count", "counter", "Times each span ran."),
+                                         ("sum", "seconds", "counter", "Total seconds in each span."),
+                                         ("max", "max_seconds", "gauge", "Longest single run of each span.")):
+        lines += [f"# HELP {p}_span_seconds_{suffix} {help_text}", f"# TYPE {p}_span_seconds_{suffix} {kind}"]
+        lines += [f'{p}_span_seconds_{suffix}{{script="{script}",span="{_label(k)}"}} {s[key]:.6g}'
+                  for k, s in rep["spans"].items()]
+    return "\n".join(lines) + "\n"
+
+def write(path: str):
+    rep = report()
+    text = prometheus_text(rep) if path.endswith(".prom") else json.dumps(rep, indent=2) + "\n"
+    dest = Path(path)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, dest)
+
+def format_report(rep: Dict[str, Any]) -> str:
+    wall = rep.get("wall_seconds") or 0.0
+    lines = [f"{rep['script']} {' '.join(rep.get('argv') or [])}".rstrip(), f"wall {wall:.2f}s",
+             f"{'span':28s} {'count':>7s} {'total s':>9s} {'mean ms':>9s} {'max ms':>9s} {'% wall':>7s}"]
+    for name, s in sorted(rep["spans"].items(), key=lambda kv: -kv[1]["seconds"]):
+        lines.append(f"{name:28s} {s['count']:7d} {s['seconds']:9.2f} {s['seconds'] / s['count'] * 1000:9.2f} "
+                     f"{s['max_seconds'] * 1000:9.2f} {100 * s['seconds'] / wall if wall else 0:6.1f}%")
+    lines.append(f"{'counter':28s} {'value':>7s}")
+    lines += [f"{name:28s} {_num(value):>7s}" for name, value in rep["counters"].items()]
+    return "\n".join(lines)
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Print a --metrics-out JSON file as a table.")
+    ap.add_argument("path")
+    args = ap.parse_args()
+    print(format_report(json.loads(Path(args.path).read_text(encoding="utf-8"))))
+
+if __name__ == "__main__":
+    main()
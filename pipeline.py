@@ -0,0 +1,553 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+-----------
+Run the whole workflow (transcribe -> download -> merge -> render -> index) for every
+show in a CSV index from one command. Stages of different shows overlap: show 1 is
+rendered while show 200 is still transcribing.
+
+Each show is a small DAG over the existing tools:
+
+    transcribe -> download -+-> render -> index
+                            +-> merge
+
+- transcribe : start the Transcribe job (transcribe_batch.py's request, --submit-rate
+               limit and throttling backoff; recorded in its job ledger). At most
+               --transcribe-concurrency jobs are in flight, and one batched poll
+               (poll_job_statuses) per cycle tracks all of them. Skipped when the
+               JSON is already in --out-dir and the ledger has never seen the job.
+- download   : fetch the result JSON into --out-dir (fetch_results.fetch_one: ETag
+               check, atomic rename). Threads, --download-concurrency.
+- merge      : when --merge-dir holds other transcripts of the show (<job>.srt,
+               <job>.txt, ...), merge them with the JSON into <job>.merged.txt
+               (merge_majority_vote.merge_files). Skipped otherwise. Processes, --merge-jobs.
+- render     : diarization_to_markdown.py's batch worker, so --map may be a map file
+               or a speakers.npz store. Processes, --render-jobs.
+- index      : add the rendered show to --index (transcript_index.py), one at a time.
+
+Every stage transition is committed to a SQLite state file (--state) as it happens,
+so the run can be killed at any point and restarted with the same command: finished
+stages are not redone, submitted Transcribe jobs are polled again instead of being
+resubmitted, and stages that were running or had failed start over. Stages after a
+failed one wait for the next run.
+
+USAGE:
+    python pipeline.py --csv index_full.csv --output-bucket pse-audio-files --output-prefix outputs/ --out-dir outputs/
+    python pipeline.py --csv index_full.csv --output-bucket pse-audio-files --output-prefix outputs/ --out-dir outputs/ \\
+        --map speakers.npz --audio audio/ --formats md,jsonl --index transcript_index.db --merge-dir whisper/
+    python pipeline.py --status
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import botocore
+
+from diarization_to_markdown import _init_worker, _render_job, is_up_to_date, output_paths, parse_formats, render_options
+from fetch_results import fetch_one, parse_s3_uri
+from job_ledger import ACTIVE_STATUSES, JobLedger, settings_hash
+from merge_majority_vote import merge_files
+from metrics import absorb, add_metrics_argument, enabled, observe, start_metrics, worker_call
+from transcribe_batch import (TokenBucket, call_with_backoff, delete_with_backoff, error_code, expected_output_uri,
+                              poll_job_statuses, row_job_name, standard_job_request)
+from transcript_cache import DEFAULT_CACHE_DIR, open_cache
+from transcript_index import TranscriptIndex
+from transcript_ingest import SUFFIXES
+
+PENDING, RUNNING, DONE, SKIPPED, FAILED = "PENDING", "RUNNING", "DONE", "SKIPPED", "FAILED"
+FINISHED = (DONE, SKIPPED)
+MAX_MERGE_INPUTS = 5  # merge_majority_vote's limit, the JSON included
+NOT_FOUND_POLLS = 3   # polls in a row Transcribe must not know a job before it counts as never submitted
+
+@dataclass
+class Stage:
+    name: str
+    deps: Tuple[str, ...]
+    limit: int
+
+@dataclass
+class Show:
+    name: str  # Transcribe job name, also the file stem of everything written for the show
+    row: Dict[str, str]
+    json_path: str
+    out_path: str
+    merge_inputs: List[str] = field(default_factory=list)
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stages (
+    show        TEXT NOT NULL,
+    stage       TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    detail      TEXT,
+    started_at  REAL,
+    finished_at REAL,
+    PRIMARY KEY (show, stage)
+);
+"""
+
+class PipelineState:
+    """Status of every (show, stage), committed on each change."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL survives a killed process
+        self.conn.executescript(STATE_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def load(self) -> Dict[Tuple[str, str], str]:
+        return {(show, stage): status for show, stage, status in self.conn.execute("SELECT show, stage, status FROM stages")}
+
+    def set(self, show: str, stage: str, status: str, detail: Optional[str] = None):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                """INSERT INTO stages (show, stage, status, attempts, detail, started_at, finished_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(show, stage) DO UPDATE SET
+                       status = excluded.status, detail = excluded.detail,
+                       attempts = attempts + CASE WHEN status = 'RUNNING' THEN 0 ELSE excluded.attempts END,
+                       started_at = COALESCE(excluded.started_at, started_at),
+                       finished_at = excluded.finished_at""",
+                (show, stage, status, int(status == RUNNING), detail,
+                 now if status == RUNNING else None, now if status in FINISHED + (FAILED,) else None))
+
+    def rows(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT show, stage, status, attempts, detail FROM stages"
+        rows = self.conn.execute(sql + " WHERE status = ? ORDER BY show" if status else sql + " ORDER BY show", (status,) if status else ())
+        return [dict(zip(("show", "stage", "status", "attempts", "detail"), r)) for r in rows]
+
+def load_shows(csv_path: str, out_dir: str, merge_dir: Optional[str] = None) -> List[Show]:
+    """One Show per CSV row with an s3_uri (transcribe_batch.py's CSV format)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f) if (r.get("s3_uri") or "").strip()]
+    others: Dict[str, List[str]] = {}
+    if merge_dir:
+        for p in sorted(Path(merge_dir).iterdir()):
+            if p.suffix.lower() in SUFFIXES:
+                others.setdefault(p.stem, []).append(str(p))
+    shows = []
+    for row in rows:
+        name = row_job_name(row)
+        shows.append(Show(name, row, str(Path(out_dir) / f"{name}.json"), str(Path(out_dir) / f"{name}.txt"),
+                          others.get(name, [])[:MAX_MERGE_INPUTS - 1]))
+    return shows
+
+def merged_path(show: Show) -> str:
+    return str(Path(show.out_path).with_name(f"{show.name}.merged.txt"))
+
+def _merge_show(inputs: List[str], out_path: str, cache_dir: Optional[str], cache_max_mb: float) -> str:
+    words = merge_files(inputs, out_path, cache=open_cache(cache_dir, cache_max_mb))
+    return f"{out_path} ({words} words from {len(inputs)} transcripts)"
+
+def _render_show(json_path: str, out_path: str) -> str:
+    outcome, _json, detail, _secs, _nbytes = _render_job((json_path, out_path))
+    if outcome != "rendered":
+        raise RuntimeError(detail)
+    return detail
+
+class Pipeline:
+    def __init__(self, shows: List[Show], args, state: PipelineState, ledger: JobLedger,
+                 transcribe_client=None, s3_client=None, clock: Callable[[], float] = time.monotonic):
+        self.shows = shows
+        self.args = args
+        self.state = state
+        self.ledger = ledger
+        self._clients = {"transcribe": transcribe_client, "s3": s3_client}
+        self.clock = clock
+        self.stages = {s.name: s for s in (
+            Stage("transcribe", (), args.transcribe_concurrency),
+            Stage("download", ("transcribe",), args.download_concurrency),
+            Stage("merge", ("download",), args.merge_jobs),
+            Stage("render", ("download",), args.render_jobs),
+            Stage("index", ("render",), 1),
+        )}
+        self.dependents = {name: [s for s in self.stages.values() if name in s.deps] for name in self.stages}
+        self.status: Dict[Tuple[str, str], str] = {}
+        self.running = Counter()
+        self.ready: Dict[str, Deque[Show]] = {name: deque() for name in self.stages}
+        self.polling: Dict[str, Show] = {}
+        self.polled_since: Dict[str, float] = {}
+        self.not_found: Counter = Counter()
+        self.interval = args.poll_seconds
+        self.next_poll = 0.0
+        self.retrying: set = set()
+        self.bucket = TokenBucket(rate=args.submit_rate, burst=args.submit_concurrency)
+        self.render_options = render_options(args.map, args.names, args.keep_top_speakers, args.other_label,
+                                             args.formats, args.audio)
+        self.t0 = clock()
+
+    # ---- clients and pools ----
+
+    def client(self, kind: str):
+        if self._clients[kind] is None:
+            import boto3
+            from dotenv import load_dotenv
+            load_dotenv()
+            self._clients[kind] = boto3.Session(region_name=self.args.region, profile_name=self.args.profile).client(kind)
+        return self._clients[kind]
+
+    def open_pools(self):
+        a = self.args
+        self.pools = {
+            "submit": ThreadPoolExecutor(max_workers=max(1, a.submit_concurrency)),
+            "download": ThreadPoolExecutor(max_workers=max(1, a.download_concurrency)),
+            "merge": ProcessPoolExecutor(max_workers=max(1, a.merge_jobs)),
+            "render": ProcessPoolExecutor(max_workers=max(1, a.render_jobs), initializer=_init_worker,
+                                          initargs=(a.map, a.names, a.keep_top_speakers, a.other_label, False,
+                                                    a.formats, a.cache_dir, a.cache_max_mb, a.audio)),
+            "index": ThreadPoolExecutor(max_workers=1),
+        }
+
+    def close_pools(self, wait_for_running: bool = True):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait_for_running, cancel_futures=True)
+
+    # ---- state ----
+
+    def set(self, show: Show, stage: str, status: str, detail: Optional[str] = None):
+        self.status[(show.name, stage)] = status
+        self.state.set(show.name, stage, status, detail)
+        if status in FINISHED:
+            for dep in self.dependents[stage]:
+                self.queue_if_ready(show, dep.name)
+
+    def queue_if_ready(self, show: Show, stage: str):
+        if self.status[(show.name, stage)] == PENDING and all(
+                self.status[(show.name, d)] in FINISHED for d in self.stages[stage].deps):
+            self.ready[stage].append(show)
+
+    def restore(self):
+        """Statuses from the state file: finished stages stay finished, a Transcribe job the
+        ledger records as in flight is polled again, everything else (running, failed, skipped,
+        a submission that died before its job was recorded) is tried again."""
+        saved = self.state.load()
+        for show in self.shows:
+            for stage in self.stages:
+                status = saved.get((show.name, stage), PENDING)
+                known = self.ledger.get(show.name) if stage == "transcribe" else None
+                if status == RUNNING and known and known["status"] in ACTIVE_STATUSES:
+                    self.polling[show.name] = show
+                    self.polled_since[show.name] = self.clock()
+                elif status not in (DONE, PENDING):
+                    if status in (RUNNING, FAILED):
+                        self.retrying.add((show.name, stage))
+                    status = PENDING
+                self.status[(show.name, stage)] = status
+                if status != saved.get((show.name, stage)):
+                    self.state.set(show.name, stage, status)
+        self.running["transcribe"] = len(self.polling)
+        for show in self.shows:
+            for stage in self.stages:
+                self.queue_if_ready(show, stage)
+
+    # ---- launching ----
+
+    def launch_ready(self, futures: Dict[Future, Tuple[Show, str, float]]):
+        # Downstream stages first, so finished transcripts move on before new jobs start.
+        # Stages settled on the spot can make later ones ready, hence the repeat.
+        progress = True
+        while progress:
+            progress = False
+            for stage in reversed(list(self.stages)):
+                queue = self.ready[stage]
+                while queue and self.running[stage] < self.stages[stage].limit:
+                    progress = True
+                    show = queue.popleft()
+                    self.set(show, stage, RUNNING)
+                    fut = self.start(show, stage)
+                    if fut is not None:
+                        self.running[stage] += 1
+                        futures[fut] = (show, stage, self.clock())
+
+    def start(self, show: Show, stage: str) -> Optional[Future]:
+        """Submit one stage to its pool, or settle it on the spot (None)."""
+        a = self.args
+        if stage == "transcribe":
+            known = self.ledger.get(show.name)
+            if known and known["status"] == "COMPLETED":
+                self.set(show, stage, DONE, "completed in an earlier run")
+                return None
+            if known and known["status"] in ACTIVE_STATUSES:
+                self.poll_later(show)
+                return None
+            if known is None and os.path.exists(show.json_path):
+                self.set(show, stage, SKIPPED, f"{show.json_path} already present")
+                return None
+            return self.pools["submit"].submit(self.submit_job, show, known is not None)
+        if stage == "download":
+            if self.status[(show.name, "transcribe")] == SKIPPED:
+                self.set(show, stage, SKIPPED, "not transcribed in this pipeline")
+                return None
+            uri = (self.ledger.get(show.name) or {}).get("output_uri") or expected_output_uri(standard_job_request(show.row, a))
+            return self.pools["download"].submit(self.download, uri)
+        if stage == "merge":
+            if not show.merge_inputs:
+                self.set(show, stage, SKIPPED, "no other transcripts")
+                return None
+            return self.pools["merge"].submit(worker_call, enabled(), _merge_show, [show.json_path] + show.merge_inputs,
+                                              merged_path(show), a.cache_dir, a.cache_max_mb)
+        if stage == "render":
+            # Outputs of a render that was cut short can look newer than their JSON
+            if (not a.force and (show.name, stage) not in self.retrying
+                    and is_up_to_date(show.json_path, show.out_path, a.map, a.formats, self.render_options)):
+                self.set(show, stage, DONE, f"{show.out_path} up to date")
+                return None
+            return self.pools["render"].submit(worker_call, enabled(), _render_show, show.json_path, show.out_path)
+        if not a.index:
+            self.set(show, stage, SKIPPED, "no --index")
+            return None
+        return self.pools["index"].submit(self.index, show)
+
+    def poll_later(self, show: Show):
+        self.polling[show.name] = show
+        self.polled_since.setdefault(show.name, self.clock())
+        self.running["transcribe"] += 1
+        if len(self.polling) == 1:  # first job in flight: start the poll clock
+            self.interval = self.args.poll_seconds
+            self.next_poll = self.clock() + self.interval
+
+    # ---- stage bodies (worker threads; no state or ledger writes here) ----
+
+    def submit_job(self, show: Show, resubmit: bool) -> Dict[str, Any]:
+        request = standard_job_request(show.row, self.args)
+        client = self.client("transcribe")
+        if resubmit:
+            try:
+                delete_with_backoff(client, show.name, self.bucket, retries=self.args.max_retries)
+            except botocore.exceptions.ClientError as e:  # fails this show's stage, not the run
+                raise RuntimeError(f"could not delete the earlier job: {e}") from e
+
+        def attempt():
+            self.bucket.acquire()
+            return client.start_transcription_job(**request)
+        try:
+            call_with_backoff(attempt, retries=self.args.max_retries)
+        except botocore.exceptions.ClientError as e:
+            if error_code(e) != "ConflictException":  # started by a run that died before recording it
+                raise
+        return request
+
+    def download(self, uri: str) -> str:
+        outcome, _uri, detail = fetch_one(self.client("s3"), uri, Path(self.args.out_dir), None)
+        if outcome == "failed":
+            raise RuntimeError(f"{uri}: {detail}")
+        return f"{outcome} {Path(parse_s3_uri(uri)[1]).name} ({detail})"
+
+    def index(self, show: Show) -> str:
+        paths = [p for p in output_paths(show.out_path, self.args.formats).values() if os.path.exists(p)]
+        index = TranscriptIndex(self.args.index)
+        try:
+            c = index.update(paths, verbose=False)
+        finally:
+            index.close()
+        return f"{c['turns']} turns" if c["added"] + c["updated"] else "unchanged"
+
+    # ---- completion ----
+
+    def finish(self, fut: Future, show: Show, stage: str, started: float):
+        secs = self.clock() - started
+        self.running[stage] -= 1
+        try:
+            result = fut.result()
+            if stage in ("merge", "render"):  # worker processes: bring their metrics back
+                result = absorb(result)
+        except Exception as e:
+            self.set(show, stage, FAILED, f"{type(e).__name__}: {e}")
+            self.report(show, stage, FAILED, f"{type(e).__name__}: {e}", secs)
+            return
+        if stage == "transcribe":
+            self.ledger.record_submitted(show.name, show.row["s3_uri"].strip(), settings_hash(result), expected_output_uri(result))
+            self.set(show, stage, RUNNING, "submitted")
+            self.poll_later(show)
+            return
+        observe(f"pipeline.{stage}", secs)
+        self.set(show, stage, DONE, result)
+        self.report(show, stage, DONE, result, secs)
+
+    def poll(self):
+        # Only Transcribe's own COMPLETED/FAILED end a job. A lookup that failed ("ERROR",
+        # or the whole poll raising) says nothing about the job: marking it FAILED would
+        # make the next run delete and restart a job that may still be running. A job
+        # Transcribe reports as not found NOT_FOUND_POLLS times in a row is submitted again.
+        try:
+            statuses = poll_job_statuses(self.client("transcribe"), sorted(self.polling))
+        except Exception as e:
+            print(f"[poll] failed ({type(e).__name__}: {e}); retrying next cycle")
+            statuses = {}
+        finished = 0
+        errors = sum(1 for name, status in statuses.items() if status == "ERROR" and name in self.polling)
+        for name, status in statuses.items():
+            show = self.polling.get(name)
+            if show is None:
+                continue
+            # A job Transcribe keeps not knowing was never started (or has expired): submit it again.
+            self.not_found[name] = self.not_found[name] + 1 if status == "NOT_FOUND" else 0
+            if status == "NOT_FOUND" and self.not_found[name] >= NOT_FOUND_POLLS:
+                del self.polling[name], self.not_found[name], self.polled_since[name]
+                self.running["transcribe"] -= 1
+                self.ledger.update_status(name, "FAILED", error="not found at Transcribe")
+                self.set(show, "transcribe", PENDING, "not found at Transcribe; submitting again")
+                self.report(show, "transcribe", PENDING, "not found at Transcribe; submitting again", None)
+                self.queue_if_ready(show, "transcribe")
+                continue
+            if status not in ("COMPLETED", "FAILED"):
+                continue
+            del self.polling[name], self.not_found[name]
+            observe("pipeline.transcribe", self.clock() - self.polled_since.pop(name))
+            self.running["transcribe"] -= 1
+            finished += 1
+            if status == "COMPLETED":
+                self.ledger.update_status(name, "COMPLETED")
+                self.set(show, "transcribe", DONE, "completed")
+                self.report(show, "transcribe", DONE, "completed", None)
+            else:
+                self.ledger.update_status(name, "FAILED", error=f"Transcribe status {status}")
+                self.set(show, "transcribe", FAILED, f"Transcribe status {status}")
+                self.report(show, "transcribe", FAILED, f"Transcribe status {status}", None)
+        self.interval = self.args.poll_seconds if finished else min(self.args.max_poll_seconds, self.interval * 2)
+        self.next_poll = self.clock() + self.interval
+        print(f"[poll] {finished} jobs finished, {len(self.polling)} in flight"
+              + (f", {errors} status lookups failed (retrying)" if errors else ""))
+
+    def report(self, show: Show, stage: str, status: str, detail: str, secs: Optional[float]):
+        took = f" ({secs:.1f}s)" if secs is not None else ""
+        print(f"[{self.clock() - self.t0:7.1f}s] {show.name} {stage}: {status.lower()} {detail}{took}")
+
+    # ---- main loop ----
+
+    def run(self) -> Dict[str, Counter]:
+        self.restore()
+        self.open_pools()
+        futures: Dict[Future, Tuple[Show, str, float]] = {}
+        completed = False
+        try:
+            while True:
+                self.launch_ready(futures)
+                if not futures and not self.polling:
+                    break
+                timeout = max(0.0, self.next_poll - self.clock()) if self.polling else None
+                if futures:
+                    done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(timeout)
+                    done = set()
+                for fut in done:
+                    self.finish(fut, *futures.pop(fut))
+                if self.polling and self.clock() >= self.next_poll:
+                    self.poll()
+            completed = True
+        finally:
+            self.close_pools(wait_for_running=completed)
+        return self.summary()
+
+    def summary(self) -> Dict[str, Counter]:
+        counts: Dict[str, Counter] = {stage: Counter() for stage in self.stages}
+        for (_show, stage), status in self.status.items():
+            counts[stage][status] += 1
+        return counts
+
+def print_status(state: PipelineState):
+    by_stage: Dict[str, Counter] = {}
+    for row in state.rows():
+        by_stage.setdefault(row["stage"], Counter())[row["status"]] += 1
+    for stage, counts in by_stage.items():
+        print(f"{stage:10s} " + ", ".join(f"{k.lower()}: {v}" for k, v in sorted(counts.items())))
+    for row in state.rows(FAILED):
+        print(f"FAILED {row['show']} {row['stage']} (attempt {row['attempts']}): {row['detail']}")
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Transcribe, download, merge, render and index every show in a CSV, resumably.")
+    ap.add_argument("--csv", help="CSV index with s3_uri (and job_name, ...) columns, as for transcribe_batch.py")
+    ap.add_argument("--state", default="pipeline_state.db", help="SQLite file with every show's stage status")
+    ap.add_argument("--status", action="store_true", help="Print the stage table from --state and exit")
+    ap.add_argument("--out-dir", default="outputs", help="Where JSONs are downloaded and transcripts rendered")
+    # transcribe (see transcribe_batch.py)
+    ap.add_argument("--output-bucket", help="S3 bucket Transcribe writes to")
+    ap.add_argument("--output-prefix", default="", help="S3 prefix for Transcribe outputs")
+    ap.add_argument("--region", default=os.environ.get("AWS_REGION", "us-east-2"))
+    ap.add_argument("--profile", default="my-transcribe", help="AWS CLI profile name")
+    ap.add_argument("--language-code", default="en-US")
+    ap.add_argument("--max-speakers", type=int, default=2, help="Max speaker labels when the CSV row gives none")
+    ap.add_argument("--force-channel", action="store_true", help="ChannelIdentification instead of diarization")
+    ap.add_argument("--redact-pii", action="store_true")
+    ap.add_argument("--ledger", default="transcribe_ledger.db", help="transcribe_batch.py job ledger")
+    ap.add_argument("--transcribe-concurrency", type=int, default=50, help="Transcribe jobs in flight at once")
+    ap.add_argument("--submit-concurrency", type=int, default=4, help="Parallel job submissions")
+    ap.add_argument("--submit-rate", type=float, default=5.0, help="Max job submissions per second (0 = unlimited)")
+    ap.add_argument("--max-retries", type=int, default=6, help="Retries per submission on throttling")
+    ap.add_argument("--poll-seconds", type=float, default=30, help="First poll interval for in-flight jobs")
+    ap.add_argument("--max-poll-seconds", type=float, default=300, help="Upper bound for the adaptive poll interval")
+    ap.add_argument("--download-concurrency", type=int, default=8)
+    # merge
+    ap.add_argument("--merge-dir", help="Folder of other transcripts named <job>.srt/.vtt/.txt/... to merge with each JSON")
+    ap.add_argument("--merge-jobs", type=int, default=1, help="Merge worker processes")
+    # render (see diarization_to_markdown.py)
+    ap.add_argument("--map", help="Speaker map (JSON/YAML) or speaker store (speakers.npz)")
+    ap.add_argument("--audio", help="With a speaker store: folder of <job>.mp3 recordings")
+    ap.add_argument("--names", help="Comma-separated names for top-N speakers (duration order)")
+    ap.add_argument("--keep-top-speakers", type=int, default=None)
+    ap.add_argument("--other-label", default="Other")
+    ap.add_argument("--formats", type=parse_formats, default=["md"], help="md,srt,vtt,jsonl")
+    ap.add_argument("--render-jobs", type=int, default=os.cpu_count() or 1, help="Render worker processes")
+    ap.add_argument("--force", action="store_true", help="Re-render even when outputs are newer than their inputs")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Parsed-transcript cache shared by merge and render")
+    ap.add_argument("--cache-max-mb", type=float, default=2048)
+    # index
+    ap.add_argument("--index", metavar="DB", help="Search index to add rendered shows to (transcript_index.py)")
+    add_metrics_argument(ap)
+    return ap
+
+def main():
+    ap = build_parser()
+    args = ap.parse_args()
+    start_metrics(args.metrics_out)
+
+    state = PipelineState(args.state)
+    if args.status:
+        print_status(state)
+        state.close()
+        return
+    if not args.csv:
+        ap.error("--csv is required")
+    shows = load_shows(args.csv, args.out_dir, args.merge_dir)
+    Path(args.out_dir).mkdir(parents=True, exist_ok=True)
+    ledger = JobLedger(args.ledger)
+    needs_aws = any(not os.path.exists(s.json_path) or ledger.get(s.name) for s in shows)
+    if needs_aws and not args.output_bucket:
+        raise SystemExit("--output-bucket is required while some shows still need transcribing or downloading")
+
+    pipeline = Pipeline(shows, args, state, ledger)
+    try:
+        counts = pipeline.run()
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume.")
+        raise SystemExit(130)
+    finally:
+        ledger.close()
+        state.close()
+    elapsed = pipeline.clock() - pipeline.t0
+    print(f"{len(shows)} shows in {elapsed:.1f}s")
+    for stage, c in counts.items():
+        print(f"  {stage:10s} " + ", ".join(f"{k.lower()}: {v}" for k, v in sorted(c.items())))
+    blocked = sum(c[PENDING] for c in counts.values())
+    failed = sum(c[FAILED] for c in counts.values())
+    if failed or blocked:
+        print(f"{failed} stages failed, {blocked} waiting on them; see python pipeline.py --status")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+speaker_identity.py
+-------------------
+Name a show's diarized speakers (spk_0, spk_1, ...) from their voices, so the 239
+shows in index_full.csv do not each need a hand-made map.json.
+
+The store (speakers.npz) holds compact voice prints: one 57-dim float32 vector
+per (name, enrolled show), 228 bytes each.
+- A print summarizes one speaker's speech in one show: the mean and log standard
+  deviation of 19 MFCCs, and the log standard deviation of their deltas (NumPy
+  only: 16 kHz mono via ffmpeg, 25 ms frames, 40 mel bands). Only each label's
+  longest segments are analysed (MAX_SPEECH_SEC), and MFCCs are normalized over
+  those frames per show first, which removes most of the recording channel (1989
+  tape vs 2015 digital). The vector is L2-normalized so similarity is a dot product.
+- enroll: compute prints for a show whose labels are known (a map.json) and add them.
+  Several prints per name (different years, studios) are kept side by side.
+- identify: compute a print per label of a new show and look all of them up at
+  once (labels x prints matrix product, best print per name). Names are handed out
+  most-similar pair first, each name to one label, down to --threshold; the other
+  labels keep their spk_N label.
+
+diarization_to_markdown.py accepts the store wherever it takes a mapping file:
+--map speakers.npz --audio show.mp3 (or --audio DIR with <job>.mp3 files for --batch).
+
+USAGE:
+    python speaker_identity.py enroll --json outputs/EFRL-1989-10-07-1.json --audio audio/ --map map.json
+    python speaker_identity.py identify outputs/EFRL-1990-*.json --audio audio/ --jobs 4 --write-maps maps/
+    python speaker_identity.py list
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import absorb, add_metrics_argument, enabled, span, start_metrics, worker_call
+from transcript_ingest import ingest
+from word_table import SegmentTable
+
+DEFAULT_STORE = os.environ.get("SPEAKER_STORE", "speakers.npz")
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+AUDIO_SUFFIXES = [".mp3", ".m4a", ".wav", ".flac", ".ogg"]
+STORE_VERSION = 1
+
+SAMPLE_RATE = 16000
+FRAME = 400           # 25 ms
+HOP = 160             # 10 ms
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20           # c0 (loudness) is dropped, leaving 19
+BLOCK_FRAMES = 6000   # frames per FFT block (one minute; bounds memory on long shows)
+MIN_SPEECH_SEC = 10.0  # labels with less speech than this get no print
+MAX_SPEECH_SEC = 300.0  # longest segments first, up to this much speech per label
+DEFAULT_THRESHOLD = 0.6
+DIM = 3 * (N_MFCC - 1)
+
+def _mel_filters(sr: int = SAMPLE_RATE, n_fft: int = N_FFT, n_mels: int = N_MELS,
+                 fmin: float = 60.0, fmax: float = 7600.0) -> np.ndarray:
+    mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    hz = lambda m: 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+    edges = hz(np.linspace(mel(fmin), mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    lo, mid, hi = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    fb = np.maximum(0.0, np.minimum((bins - lo) / (mid - lo), (hi - bins) / (hi - mid)))
+    return fb.astype(np.float32)
+
+def _dct_matrix(n_in: int = N_MELS, n_out: int = N_MFCC) -> np.ndarray:
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+MEL_FILTERS = _mel_filters()
+DCT = _dct_matrix()
+WINDOW = np.hamming(FRAME).astype(np.float32)
+
+def decode_audio(path: str, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Mono float32 samples of an audio file, decoded by ffmpeg."""
+    proc = subprocess.run([FFMPEG, "-nostdin", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(sr), "-"],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {path}: {proc.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+def mfcc(samples: np.ndarray, frames: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(MFCCs without c0 [frames x 19], log energy [frames]) at HOP spacing, for every
+    frame or only the given frame indices."""
+    x = np.append(samples[:1], samples[1:] - 0.97 * samples[:-1])
+    if len(x) < FRAME:
+        return np.zeros((0, N_MFCC - 1), np.float32), np.zeros(0, np.float32)
+    view = np.lib.stride_tricks.sliding_window_view(x, FRAME)[::HOP]
+    if frames is None:
+        frames = np.arange(len(view))
+    coeffs, energy = [np.zeros((0, N_MFCC - 1), np.float32)], [np.zeros(0, np.float32)]
+    for i in range(0, len(frames), BLOCK_FRAMES):
+        block = view[frames[i:i + BLOCK_FRAMES]] * WINDOW
+        power = np.abs(np.fft.rfft(block, N_FFT)) ** 2
+        logmel = np.log(power.astype(np.float32) @ MEL_FILTERS.T + 1e-10)
+        coeffs.append(logmel @ DCT[1:].T)
+        energy.append(np.log((block * block).sum(axis=1) + 1e-10))
+    return np.concatenate(coeffs), np.concatenate(energy)
+
+def deltas(c: np.ndarray, width: int = 2) -> np.ndarray:
+    """Regression deltas over +-width frames."""
+    padded = np.pad(c, ((width, width), (0, 0)), mode="edge")
+    num = sum(k * (padded[width + k:len(c) + width + k] - padded[width - k:len(c) + width - k]) for k in range(1, width + 1))
+    return num / (2 * sum(k * k for k in range(1, width + 1)))
+
+def speaker_frames(segments: SegmentTable, n_frames: int) -> Dict[str, np.ndarray]:
+    """{label: frame indices} over each label's longest segments, up to MAX_SPEECH_SEC."""
+    out: Dict[str, np.ndarray] = {}
+    length = segments.end - segments.start
+    for k, label in enumerate(segments.labels):
+        rows = np.flatnonzero(segments.speaker == k)
+        rows = rows[np.argsort(-length[rows], kind="stable")]
+        keep = rows[:np.searchsorted(np.cumsum(length[rows]), MAX_SPEECH_SEC) + 1]
+        idx = [np.arange(int(segments.start[r] * SAMPLE_RATE / HOP), int(segments.end[r] * SAMPLE_RATE / HOP)) for r in keep]
+        idx = np.concatenate(idx) if idx else np.zeros(0, np.int64)
+        out[label] = idx[idx < n_frames]
+    return out
+
+def show_prints(segments: SegmentTable, samples: np.ndarray) -> Dict[str, Tuple[np.ndarray, float]]:
+    """{label: (L2-normalized print, seconds of speech behind it)} for one show.
+
+    Only the frames of the segments speaker_frames picks are analysed; they are
+    also what the per-show normalization is computed over."""
+    n_frames = max(0, (len(samples) - FRAME) // HOP + 1)
+    chosen = speaker_frames(segments, n_frames)
+    frames = np.unique(np.concatenate([np.zeros(0, np.int64)] + list(chosen.values())))
+    c, energy = mfcc(samples, frames)
+    if not len(c):
+        return {}
+    speech = energy > np.percentile(energy, 20)  # drop pauses and breaths inside segments
+    voiced = c[speech]
+    c = (c - voiced.mean(axis=0)) / (voiced.std(axis=0) + 1e-6)
+    d = deltas(c)
+    d_std = d[speech].std(axis=0)
+    prints: Dict[str, Tuple[np.ndarray, float]] = {}
+    for label, idx in chosen.items():
+        rows = np.searchsorted(frames, idx)
+        rows = rows[speech[rows]]
+        seconds = len(rows) * HOP / SAMPLE_RATE
+        if seconds < MIN_SPEECH_SEC:
+            continue
+        v = np.concatenate([c[rows].mean(axis=0), np.log(c[rows].std(axis=0)), np.log(d[rows].std(axis=0) / d_std)])
+        prints[label] = ((v / np.linalg.norm(v)).astype(np.float32), seconds)
+    return prints
+
+def audio_for(json_path: str, audio: Optional[str] = None) -> str:
+    """The recording for a transcript: audio itself if it is a file, else <json stem>.<ext>
+    in the audio folder (or next to the JSON)."""
+    if audio and not os.path.isdir(audio):
+        return audio
+    folder = Path(audio) if audio else Path(json_path).parent
+    for suffix in AUDIO_SUFFIXES:
+        p = folder / (Path(json_path).stem + suffix)
+        if p.exists():
+            return str(p)
+    raise FileNotFoundError(f"no audio for {json_path} in {folder} ({', '.join(AUDIO_SUFFIXES)})")
+
+def transcript_prints(json_path: str, audio: Optional[str] = None) -> Dict[str, Tuple[np.ndarray, float]]:
+    _table, segments = ingest(json_path)
+    if not len(segments):
+        raise ValueError(f"{json_path} has no speaker segments (run Transcribe with speaker labels)")
+    with span("speaker_id.decode"):
+        samples = decode_audio(audio_for(json_path, audio))
+    with span("speaker_id.prints"):
+        return show_prints(segments, samples)
+
+def is_speaker_store(path: str) -> bool:
+    return path.endswith(".npz")
+
+class SpeakerStore:
+    """Named voice prints: names[i] / shows[i] / seconds[i] describe vectors[i]."""
+
+    def __init__(self, names: List[str], shows: List[str], vectors: np.ndarray, seconds: np.ndarray):
+        # Rows are kept grouped by name so scores() can take each name's best with one reduceat
+        order = np.argsort(np.array(names, dtype=str), kind="stable") if names else np.zeros(0, np.int64)
+        self.names = [names[i] for i in order]
+        self.shows = [shows[i] for i in order]
+        self.vectors = vectors[order]
+        self.seconds = seconds[order]
+        self._starts = np.flatnonzero([i == 0 or self.names[i] != self.names[i - 1] for i in range(len(self.names))])
+
+    @classmethod
+    def load(cls, path: str) -> "SpeakerStore":
+        if not os.path.exists(path):
+            return cls([], [], np.zeros((0, DIM), np.float32), np.zeros(0, np.float32))
+        with np.load(path) as z:
+            if int(z["version"]) != STORE_VERSION:
+                raise SystemExit(f"{path} was built by another version of speaker_identity.py; re-enroll")
+            return cls(z["names"].tolist(), z["shows"].tolist(), z["vectors"], z["seconds"])
+
+    def save(self, path: str):
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, version=STORE_VERSION, names=np.array(self.names, dtype=str), shows=np.array(self.shows, dtype=str),
+                 vectors=self.vectors.astype(np.float32), seconds=self.seconds.astype(np.float32))
+        os.replace(tmp, path)
+
+    def enroll(self, show: str, prints: Dict[str, Tuple[np.ndarray, float]], mapping: Dict[str, str]) -> List[str]:
+        """Add the prints of mapped labels (replacing earlier prints from the same show). Returns the names added."""
+        keep = [i for i, s in enumerate(self.shows) if s != show]
+        names = [self.names[i] for i in keep]
+        shows = [self.shows[i] for i in keep]
+        vectors, seconds = [self.vectors[keep]], [self.seconds[keep]]
+        added = []
+        for label, name in mapping.items():
+            if label in prints and name:
+                v, secs = prints[label]
+                names.append(name)
+                shows.append(show)
+                vectors.append(v[None, :])
+                seconds.append(np.array([secs], np.float32))
+                added.append(name)
+        self.__init__(names, shows, np.concatenate(vectors), np.concatenate(seconds))
+        return added
+
+    def scores(self, prints: Dict[str, Tuple[np.ndarray, float]]) -> Tuple[List[str], List[str], np.ndarray]:
+        """(labels, names, similarity [labels x names]): each name's best print per label."""
+        labels = list(prints)
+        names = [self.names[i] for i in self._starts]
+        if not labels or not names:
+            return labels, names, np.zeros((len(labels), len(names)), np.float32)
+        sim = np.stack([prints[l][0] for l in labels]) @ self.vectors.T
+        return labels, names, np.maximum.reduceat(sim, self._starts, axis=1)
+
+    def identify(self, prints: Dict[str, Tuple[np.ndarray, float]],
+                 threshold: float = DEFAULT_THRESHOLD) -> Dict[str, Tuple[str, float]]:
+        """{label: (name, similarity)}: the most similar (label, name) pairs first, each
+        label and each name used once, down to threshold."""
+        labels, names, best = self.scores(prints)
+        out: Dict[str, Tuple[str, float]] = {}
+        taken = set()
+        for flat in np.argsort(-best, axis=None, kind="stable"):
+            i, j = divmod(int(flat), len(names))
+            if best[i, j] < threshold:
+                break
+            if labels[i] not in out and j not in taken:
+                out[labels[i]] = (names[j], float(best[i, j]))
+                taken.add(j)
+        return out
+
+_OPEN_STORES: Dict[str, Tuple[float, SpeakerStore]] = {}
+
+def open_store(path: str) -> SpeakerStore:
+    """SpeakerStore.load, cached per process until the file changes (batch workers label many shows)."""
+    mtime = os.path.getmtime(path)
+    cached = _OPEN_STORES.get(path)
+    if cached is None or cached[0] != mtime:
+        _OPEN_STORES[path] = (mtime, SpeakerStore.load(path))
+    return _OPEN_STORES[path][1]
+
+def store_mapping(store_path: str, json_path: str, audio: Optional[str] = None,
+                  threshold: float = DEFAULT_THRESHOLD) -> Dict[str, str]:
+    """{spk_N: name} for one show from a speaker store (the diarization_to_markdown --map hook)."""
+    matches = open_store(store_path).identify(transcript_prints(json_path, audio), threshold)
+    return {label: name for label, (name, _sim) in matches.items()}
+
+_WORKER: Dict[str, object] = {}
+
+def _init_worker(store_path: str, audio: Optional[str], threshold: float):
+    _WORKER.update(store=SpeakerStore.load(store_path), audio=audio, threshold=threshold)
+
+def _identify_job(json_path: str):
+    t0 = time.perf_counter()
+    try:
+        prints = transcript_prints(json_path, _WORKER["audio"])
+    except Exception as e:
+        return json_path, None, f"{type(e).__name__}: {e}", time.perf_counter() - t0
+    store = _WORKER["store"]
+    matches = store.identify(prints, _WORKER["threshold"])
+    labels, names, best = store.scores(prints)
+    rows = []
+    for label, row in zip(labels, best):
+        j = int(np.argmax(row)) if names else -1
+        name, sim = matches.get(label, ("", float(row[j]) if names else float("nan")))
+        rows.append((label, prints[label][1], name, sim, names[j] if names else ""))
+    return json_path, rows, "", time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Voice-print store that names diarized speakers across shows.")
+    ap.add_argument("--store", default=DEFAULT_STORE, help="Speaker store (.npz; env SPEAKER_STORE)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    en = sub.add_parser("enroll", help="Add the voices of a show whose speaker labels are known")
+    en.add_argument("--json", required=True, help="Transcribe JSON with speaker labels")
+    en.add_argument("--audio", help="The show's recording, or a folder holding <json stem>.mp3 (default: next to the JSON)")
+    en.add_argument("--map", required=True, help="JSON/YAML mapping of spk_N -> name for this show (as for diarization_to_markdown.py)")
+    idf = sub.add_parser("identify", help="Name the speakers of new shows")
+    idf.add_argument("json", nargs="+", help="Transcribe JSONs")
+    idf.add_argument("--audio", help="Recording (one JSON) or folder of <job>.mp3 files")
+    idf.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Minimum cosine similarity to assign a name")
+    idf.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    idf.add_argument("--write-maps", metavar="DIR", help="Write each show's mapping to DIR/<json stem>.json (a --map file for review/editing)")
+    sub.add_parser("list", help="Enrolled names")
+    add_metrics_argument(ap)
+    args = ap.parse_args()
+    start_metrics(args.metrics_out)
+
+    if args.command == "enroll":
+        from diarization_to_markdown import load_mapping
+        store = SpeakerStore.load(args.store)
+        prints = transcript_prints(args.json, args.audio)
+        mapping = load_mapping(args.map)
+        added = store.enroll(Path(args.json).stem, prints, mapping)
+        skipped = sorted(set(mapping) - set(prints))
+        store.save(args.store)
+        print(f"Enrolled {', '.join(added) or 'nobody'} from {Path(args.json).stem} into {args.store} ({len(store.names)} prints)")
+        if skipped:
+            print(f"  no print for {', '.join(skipped)} (not in the segments, or under {MIN_SPEECH_SEC:.0f}s of speech)")
+    elif args.command == "identify":
+        if not os.path.exists(args.store):
+            raise SystemExit(f"{args.store} does not exist; enroll some shows first")
+        t0 = time.perf_counter()
+        failed = 0
+        print("show\tlabel\tspeech_sec\tname\tsimilarity\tnearest")
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=_init_worker,
+                                 initargs=(args.store, args.audio, args.threshold)) as pool:
+            results = pool.map(worker_call, repeat(enabled()), repeat(_identify_job), args.json)
+            for json_path, rows, error, secs in map(absorb, results):
+                show = Path(json_path).stem
+                if rows is None:
+                    print(f"{show}\tFAILED: {error}")
+                    failed += 1
+                    continue
+                for label, speech, name, sim, nearest in rows:
+                    print(f"{show}\t{label}\t{speech:.0f}\t{name}\t{sim:.3f}\t{nearest}")
+                if args.write_maps:
+                    out = Path(args.write_maps) / f"{show}.json"
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    out.write_text(json.dumps({label: name for label, _s, name, _sim, _n in rows if name}, indent=4), encoding="utf-8")
+        elapsed = time.perf_counter() - t0
+        print(f"Identified {len(args.json) - failed} shows ({failed} failed) in {elapsed:.1f}s")
+        if failed:
+            raise SystemExit(1)
+    else:
+        store = SpeakerStore.load(args.store)
+        bounds = list(store._starts) + [len(store.names)]
+        names = [store.names[i] for i in store._starts]
+        for name, lo, hi in zip(names, bounds, bounds[1:]):
+            print(f"{name}\t{hi - lo} prints\t{float(store.seconds[lo:hi].sum()) / 60:.1f} min of speech")
+        print(f"{len(names)} speakers, {len(store.names)} prints, {store.vectors.nbytes / 1024:.1f} KiB of vectors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+text_normalizer.py
+------------------
+The comparison notebook's normalize_text with one regex pass instead of nine. The
+notebook lowercases and then runs nine re.sub passes over the whole transcript,
+each building a new string. Here:
+- the character mappings (curly quotes, backtick, en/em dashes) are one table,
+  applied after str.lower() with one str.replace per entry (str.translate falls
+  back to a per-character lookup on non-ASCII text and is ~200x slower here);
+- the removals (filler words, [bracketed] and (parenthetical) spans) are one
+  compiled alternation, applied once;
+- the whitespace collapse is str.split(), which yields tokens directly.
+The notebook's "'s\\b" -> "'s" rule is an identity and is dropped.
+
+Output is identical to the notebook's function (benchmarks/bench_normalizer.py
+checks this on random strings and on every file in 'Other Transcripts'). The one
+ordering subtlety: the notebook removes brackets before parentheses, so a bracket
+span may hide a ")" -- "(a [b) c] d)" is removed whole. The parenthesis
+alternative therefore steps over bracket spans instead of stopping at their ")".
+
+The rules never cross a newline ('.' in the notebook's patterns excludes it), so
+normalize_tokens can take a transcript as a stream of lines.
+
+USAGE (as a library):
+    from text_normalizer import normalize_text, normalize_tokens
+    normalize_text("Um, it’s [laughs] (inaudible) — fine")   # ", it's - fine"
+    for word in normalize_tokens(open("control.txt", encoding="utf-8", newline="\\n")): ...
+
+USAGE (normalize files to stdout):
+    python text_normalizer.py "Transcription Options/Other Transcripts/otterai.txt"
+"""
+
+import argparse
+import re
+import sys
+from typing import Iterable, Iterator
+
+_CHAR_MAP = {"’": "'", "‘": "'", "`": "'", "“": '"', "”": '"', "—": "-", "–": "-"}
+
+_REMOVE = re.compile(
+    r"\b(?:um|uh|ah|er)\b"                                # filler words
+    r"|\[[^\n]*?\]"                                       # [bracketed]
+    r"|\((?:[^\n)\[]|\[[^\n\]]*\]|\[(?![^\n]*\]))*?\)"   # (parenthetical), stepping over [..]
+)
+
+def normalize_tokens(pieces: Iterable[str]) -> Iterator[str]:
+    """Normalized words of a text given as pieces (lines, or the whole text as one
+    piece). Pieces are normalized independently, so split only at newlines."""
+    for piece in pieces:
+        piece = piece.lower()
+        for char, repl in _CHAR_MAP.items():
+            piece = piece.replace(char, repl)
+        yield from _REMOVE.sub("", piece).split()
+
+def normalize_text(text: str) -> str:
+    """The notebook's normalize_text (lowercase, quotes/dashes, fillers, brackets, whitespace)."""
+    if not text:
+        return ""
+    return " ".join(normalize_tokens((text,)))
+
+def main():
+    ap = argparse.ArgumentParser(description="Print the normalized text of each file")
+    ap.add_argument("files", nargs="+")
+    args = ap.parse_args()
+    for path in args.files:
+        with open(path, encoding="utf-8", newline="\n") as f:
+            sys.stdout.write(" ".join(normalize_tokens(f)) + "\n")
+
+if __name__ == "__main__":
+    main()
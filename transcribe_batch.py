@@ -20,6 +20,12 @@ Optional columns (if present, they will be used):
 USAGE (standard transcription with diarization):
     python transcribe_batch.py --csv index.csv --output-bucket my-output-bucket --output-prefix transcripts/
 
+USAGE (parallel submission, rate-limited, throttling retried with backoff):
+    python transcribe_batch.py --csv index_full.csv --output-bucket my-output-bucket --submit-concurrency 8 --submit-rate 5
+
+USAGE (troubleshooting: identity and raw requests/responses, API call and retry counts):
+    python transcribe_batch.py --csv index.csv --output-bucket my-output-bucket --debug --wait --metrics-out submit_metrics.json
+
 USAGE (Call Analytics):
     python transcribe_batch.py --csv index.csv --output-bucket my-output-bucket --output-prefix analytics/ --call-analytics
 
@@ -34,15 +40,22 @@ import argparse
 import csv
 import hashlib
 import os
+import random
+import re
 import sys
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Callable, Iterable, Tuple
 
 import boto3
 from dotenv import load_dotenv
 
 import botocore
 
+from job_ledger import JobLedger, settings_hash
+from metrics import add_metrics_argument, incr, span, start_metrics
+
 def slugify_jobname(name: str) -> str:
     out = ''.join(ch if ch.isalnum() or ch in '-_' else '-' for ch in name)
     return out[:200]  # Transcribe has a max length; keep it safe
@@ -57,11 +70,16 @@ def boolish(val: Optional[str], default: bool=False) -> bool:
     if val is None: return default
     return str(val).strip().lower() in ("1","true","yes","y")
 
-def start_standard_job(client, row: Dict[str, str], args) -> str:
+def row_job_name(row: Dict[str, str]) -> str:
     s3_uri = row["s3_uri"].strip()
     guest = row.get("guest_name","").strip()
     job_name = row.get("job_name") or default_job_name(s3_uri, guest)
-    job_name = slugify_jobname(job_name)
+    return slugify_jobname(job_name)
+
+def standard_job_request(row: Dict[str, str], args) -> Dict[str, Any]:
+    s3_uri = row["s3_uri"].strip()
+    guest = row.get("guest_name","").strip()
+    job_name = row_job_name(row)
 
     language_code = row.get("language_code") or args.language_code
     vocab_name = row.get("vocab_name") or None
@@ -98,15 +116,15 @@ def start_standard_job(client, row: Dict[str, str], args) -> str:
 
     if channel_ident:
         kwargs["ChannelIdentification"] = True
+    return kwargs
 
-    resp = client.start_transcription_job(**kwargs)
+def start_standard_job(client, row: Dict[str, str], args) -> str:
+    resp = client.start_transcription_job(**standard_job_request(row, args))
     return resp["TranscriptionJob"]["TranscriptionJobName"]
 
-def start_analytics_job(client, row: Dict[str, str], args) -> str:
+def analytics_job_request(row: Dict[str, str], args) -> Dict[str, Any]:
     s3_uri = row["s3_uri"].strip()
-    guest = row.get("guest_name","").strip()
-    job_name = row.get("job_name") or default_job_name(s3_uri, guest)
-    job_name = slugify_jobname(job_name)
+    job_name = row_job_name(row)
 
     # Ambiguity: If you need categories per-file, put them in "categories" column (comma-separated).
     categories = [c.strip() for c in (row.get("categories") or "").split(",") if c.strip()]
@@ -126,32 +144,352 @@ def start_analytics_job(client, row: Dict[str, str], args) -> str:
         kwargs["CallAnalyticsJobSettings"]["VocabularyName"] = vocab_name
     if categories:
         kwargs["CallAnalyticsJobSettings"]["CallAnalyticsCategoryNames"] = categories
+    return kwargs
 
-    resp = client.start_call_analytics_job(**kwargs)
+def start_analytics_job(client, row: Dict[str, str], args) -> str:
+    resp = client.start_call_analytics_job(**analytics_job_request(row, args))
     return resp["CallAnalyticsJob"]["CallAnalyticsJobName"]
 
-def wait_for_jobs(client, job_names: List[str], analytics: bool=False, show_transcript: bool=False, poll_sec: int=15):
-    get_fn = (client.get_call_analytics_job if analytics else client.get_transcription_job)
-    status_key = ("CallAnalyticsJob" if analytics else "TranscriptionJob")
-    while job_names:
-        remaining = []
-        for name in job_names:
+def expected_output_uri(request: Dict[str, Any]) -> Optional[str]:
+    """Where the job's result JSON will land, derived from the request (no API call needed)."""
+    if "OutputBucketName" in request:
+        key = request.get("OutputKey") or f"{request['TranscriptionJobName']}.json"
+        return f"s3://{request['OutputBucketName']}/{key}"
+    if "OutputLocation" in request:
+        return request["OutputLocation"].rstrip("/") + f"/{request['CallAnalyticsJobName']}.json"
+    return None
+
+def plan_with_ledger(rows: List[Dict[str, str]], ledger: JobLedger, request_fn,
+                     args, resubmit_changed: bool=False) -> Dict[str, List]:
+    """Split CSV rows by what the ledger already knows.
+
+    Returns {"submit": rows never started, "resubmit": rows whose job FAILED (or whose
+    settings changed, with resubmit_changed), "in_flight": job names still running,
+    "completed": job names already done}. Nothing here touches the network.
+    """
+    plan: Dict[str, List] = {"submit": [], "resubmit": [], "in_flight": [], "completed": []}
+    for row in rows:
+        if not (row.get("s3_uri") or "").strip():
+            plan["submit"].append(row)  # submit_jobs reports it as skipped
+            continue
+        name = row_job_name(row)
+        known = ledger.get(name)
+        if known is None:
+            plan["submit"].append(row)
+        elif known["status"] == "FAILED":
+            plan["resubmit"].append(row)
+        elif resubmit_changed and known["settings_hash"] != settings_hash(request_fn(row, args)):
+            plan["resubmit"].append(row)
+        elif known["status"] == "COMPLETED":
+            plan["completed"].append(name)
+        else:
+            plan["in_flight"].append(name)
+    return plan
+
+def delete_job(client, name: str, analytics: bool=False):
+    """Free a job name so it can be started again (a FAILED job keeps its name reserved)."""
+    incr("transcribe.api_calls.delete")
+    try:
+        if analytics:
+            client.delete_call_analytics_job(CallAnalyticsJobName=name)
+        else:
+            client.delete_transcription_job(TranscriptionJobName=name)
+    except botocore.exceptions.ClientError as e:
+        if error_code(e) not in ("NotFoundException", "BadRequestException"):
+            raise
+
+# Error codes Transcribe returns when we exceed the request rate or the concurrent-job quota.
+RETRYABLE_ERROR_CODES = {"ThrottlingException", "LimitExceededException", "TooManyRequestsException"}
+
+def error_code(exc: Exception) -> Optional[str]:
+    if isinstance(exc, botocore.exceptions.ClientError):
+        return exc.response.get("Error", {}).get("Code")
+    return None
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1.0 - 1e-9:  # a sleep of exactly `wait` can land a rounding error short
+                    self.tokens = max(0.0, self.tokens - 1.0)
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            incr("transcribe.rate_limit_wait_seconds", wait)
+            self.sleep(wait)
+
+def call_with_backoff(fn: Callable[[], Any], retries: int = 6, base_delay: float = 0.5, max_delay: float = 30.0,
+                      sleep: Callable[[float], None] = time.sleep) -> Any:
+    """Call fn(), retrying throttling/limit errors with exponential backoff and full jitter."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except botocore.exceptions.ClientError as e:
+            if error_code(e) not in RETRYABLE_ERROR_CODES or attempt >= retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            incr("transcribe.throttle_retries")
+            incr("transcribe.backoff_seconds", delay)
+            sleep(delay)
+            attempt += 1
+
+def delete_with_backoff(client, name: str, bucket: TokenBucket, retries: int = 6, analytics: bool = False,
+                        sleep: Callable[[float], None] = time.sleep):
+    """delete_job behind the rate limit, retrying throttling like the start calls."""
+    def attempt():
+        bucket.acquire()
+        delete_job(client, name, analytics=analytics)
+    call_with_backoff(attempt, retries=retries, sleep=sleep)
+
+def submit_jobs(client, rows: List[Dict[str, str]], args, start_fn, concurrency: int = 1,
+                bucket: Optional[TokenBucket] = None, retries: int = 6,
+                sleep: Callable[[float], None] = time.sleep, delete_first: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """Start one job per row from a bounded thread pool.
+
+    Returns {"submitted": [...], "skipped": [...], "failed": [...]} of job names in CSV order.
+    Rows whose job name already exists (ConflictException) or that have no s3_uri are skipped;
+    the former are also listed under "existing" so --wait can still report on them.
+    Jobs named in `delete_first` (resubmissions) are deleted before they are started; a
+    delete that still fails after the retries fails that row only.
+    `sleep` is used for the backoff between retries (and by the default, unlimited bucket).
+    """
+    bucket = bucket or TokenBucket(rate=0, sleep=sleep)
+    delete_first = set(delete_first)
+    analytics = getattr(args, "call_analytics", False)
+
+    def submit(row: Dict[str, str]):
+        if not (row.get("s3_uri") or "").strip():
+            return "skipped", row.get("job_name") or "(no s3_uri)", "missing s3_uri"
+        job_name = row_job_name(row)
+        if job_name in delete_first:
             try:
-                r = get_fn(**({"CallAnalyticsJobName": name} if analytics else {"TranscriptionJobName": name}))
-                job = r[status_key]
-                status = job["CallAnalyticsJobStatus" if analytics else "TranscriptionJobStatus"]
+                delete_with_backoff(client, job_name, bucket, retries=retries, analytics=analytics, sleep=sleep)
+            except Exception as e:
+                return "failed", job_name, f"could not delete the earlier job: {e}"
+
+        def attempt():
+            bucket.acquire()
+            incr("transcribe.api_calls.start")
+            return start_fn(client, row, args)
+        try:
+            with span("transcribe.submit"):
+                name = call_with_backoff(attempt, retries=retries, sleep=sleep)
+        except botocore.exceptions.ClientError as e:
+            if error_code(e) == "ConflictException":
+                return "skipped", job_name, "already exists"
+            return "failed", job_name, str(e)
+        except Exception as e:
+            return "failed", job_name, str(e)
+        return "submitted", name, ""
+
+    summary: Dict[str, List[str]] = {"submitted": [], "skipped": [], "failed": [], "existing": []}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for outcome, name, detail in pool.map(submit, rows):
+            summary[outcome].append(name)
+            if detail == "already exists":
+                summary["existing"].append(name)
+            if outcome == "submitted":
+                print(f"Started job: {name}")
+            else:
+                print(f"{outcome.capitalize()} job: {name} ({detail})")
+    return summary
+
+def debug_start_fn(request_fn, method: str):
+    """A start_fn that prints each job's request and the service's response (--debug)."""
+    def start(client, row: Dict[str, str], args) -> str:
+        request = request_fn(row, args)
+        print(f"[DEBUG] {method}: {request}")
+        resp = getattr(client, method)(**request)
+        print(f"[DEBUG] response: {resp}")
+        job = resp.get("TranscriptionJob") or resp["CallAnalyticsJob"]
+        return job.get("TranscriptionJobName") or job["CallAnalyticsJobName"]
+    return start
+
+def job_api(client, analytics: bool) -> Dict[str, Any]:
+    """Method and key names for standard vs Call Analytics jobs."""
+    if analytics:
+        return {"list": client.list_call_analytics_jobs, "get": client.get_call_analytics_job,
+                "summaries": "CallAnalyticsJobSummaries", "job": "CallAnalyticsJob",
+                "name": "CallAnalyticsJobName", "status": "CallAnalyticsJobStatus"}
+    return {"list": client.list_transcription_jobs, "get": client.get_transcription_job,
+            "summaries": "TranscriptionJobSummaries", "job": "TranscriptionJob",
+            "name": "TranscriptionJobName", "status": "TranscriptionJobStatus"}
+
+def get_job(client, name: str, analytics: bool=False) -> Dict[str, Any]:
+    api = job_api(client, analytics)
+    return api["get"](**{api["name"]: name})[api["job"]]
+
+def list_jobs_by_status(client, status: str, name_contains: str="", analytics: bool=False,
+                        wanted: Optional[set]=None, max_pages: Optional[int]=None,
+                        counter: Optional[Dict[str, int]]=None) -> Dict[str, str]:
+    """Page through ListTranscriptionJobs/ListCallAnalyticsJobs for one status.
+    Stops early once every name in `wanted` has been seen or after `max_pages` pages."""
+    api = job_api(client, analytics)
+    kwargs: Dict[str, Any] = {"Status": status, "MaxResults": 100}
+    if name_contains:
+        kwargs["JobNameContains"] = name_contains[:200]
+    found: Dict[str, str] = {}
+    pages = 0
+    while True:
+        r = api["list"](**kwargs)
+        pages += 1
+        incr("transcribe.api_calls.list")
+        if counter is not None:
+            counter["api_calls"] = counter.get("api_calls", 0) + 1
+        for summary in r.get(api["summaries"], []):
+            found[summary[api["name"]]] = summary[api["status"]]
+        token = r.get("NextToken")
+        if not token:
+            break
+        if wanted is not None and wanted <= found.keys():
+            break
+        if max_pages and pages >= max_pages:
+            break
+        kwargs["NextToken"] = token
+    return found
+
+# A list call per status costs at least as much as this many per-job gets.
+LIST_MIN_GROUP = 4
+MIN_FILTER_LEN = 3
+STEM_RE = re.compile(r"[A-Za-z]+(?=[-_]|$)(?:[-_][A-Za-z]+(?=[-_]|$))*")
+
+def job_name_stem(name: str) -> str:
+    """The leading all-letter words of a job name, before any date or number:
+    "EFRL-1989-10-07-1" -> "EFRL", "job-Thomas-Sowell-1a2b3c4d" -> "job-Thomas-Sowell"."""
+    m = STEM_RE.match(name)
+    return m.group(0) if m else ""
+
+def list_filters(job_names) -> Tuple[Dict[str, set], set]:
+    """Group job names by stem for JobNameContains-filtered listing.
+
+    Returns ({filter: names}, names to look up one by one). Each group's filter is the
+    longest prefix its names share (at least the stem, e.g. "EFRL-1989-1"); groups
+    without a stem of MIN_FILTER_LEN letters, or smaller than LIST_MIN_GROUP, are
+    cheaper to resolve with per-job gets than by paging through the account's jobs.
+    """
+    by_stem: Dict[str, set] = {}
+    for name in job_names:
+        by_stem.setdefault(job_name_stem(name), set()).add(name)
+    groups: Dict[str, set] = {}
+    singles: set = set()
+    for stem, names in by_stem.items():
+        if len(stem) < MIN_FILTER_LEN or len(names) < LIST_MIN_GROUP:
+            singles |= names
+        else:
+            groups[os.path.commonprefix(sorted(names))] = names
+    return groups, singles
+
+def poll_job_statuses(client, job_names: List[str], analytics: bool=False, max_list_pages: int=10,
+                      counter: Optional[Dict[str, int]]=None) -> Dict[str, str]:
+    """Resolve the status of every job in a few paginated list calls.
+
+    Job names are grouped by their shared stem (list_filters). For each group, active
+    jobs (QUEUED/IN_PROGRESS) are listed first, filtered by the group's common prefix;
+    jobs not among them are looked up in the COMPLETED/FAILED lists. Names outside any
+    group, and stragglers missing from every listing, fall back to a per-job get. Jobs
+    Transcribe does not know (NotFoundException) are reported with status "NOT_FOUND",
+    jobs whose get fails otherwise with status "ERROR".
+    """
+    with span("transcribe.poll"):
+        return _poll_job_statuses(client, job_names, analytics, max_list_pages,
+                                  counter if counter is not None else {})
+
+def _list_group(client, names: set, prefix: str, analytics: bool, max_list_pages: int,
+                counter: Dict[str, int]) -> Dict[str, str]:
+    statuses: Dict[str, str] = {}
+    for status in ("IN_PROGRESS", "QUEUED"):
+        found = list_jobs_by_status(client, status, prefix, analytics, counter=counter)
+        statuses.update((n, st) for n, st in found.items() if n in names)
+    missing = names - statuses.keys()
+    for status in ("COMPLETED", "FAILED"):
+        if not missing:
+            break
+        found = list_jobs_by_status(client, status, prefix, analytics, wanted=missing,
+                                    max_pages=max_list_pages, counter=counter)
+        statuses.update((n, st) for n, st in found.items() if n in missing)
+        missing -= statuses.keys()
+    return statuses
+
+def _poll_job_statuses(client, job_names: List[str], analytics: bool, max_list_pages: int,
+                       counter: Dict[str, int]) -> Dict[str, str]:
+    pending = set(job_names)
+    groups, _singles = list_filters(pending)
+    statuses: Dict[str, str] = {}
+    for prefix, names in sorted(groups.items()):
+        statuses.update(_list_group(client, names, prefix, analytics, max_list_pages, counter))
+    missing = pending - statuses.keys()
+    api = job_api(client, analytics)
+    for name in sorted(missing):
+        counter["api_calls"] = counter.get("api_calls", 0) + 1
+        incr("transcribe.api_calls.get")
+        try:
+            statuses[name] = get_job(client, name, analytics)[api["status"]]
+        except Exception as e:
+            if error_code(e) == "NotFoundException":
+                statuses[name] = "NOT_FOUND"
+                continue
+            print(f"[{name}] ERROR: {e}")
+            statuses[name] = "ERROR"
+    return statuses
+
+def wait_for_jobs(client, job_names: List[str], analytics: bool=False, show_transcript: bool=False, poll_sec: int=15,
+                  max_poll_sec: int=120, sleep: Callable[[float], None]=time.sleep,
+                  on_status: Optional[Callable[[str, str], None]]=None):
+    """Poll until every job is COMPLETED/FAILED. Status lines are printed on change only, plus one
+    summary line per cycle with its API call count. The interval doubles (up to max_poll_sec)
+    while nothing finishes and drops back to poll_sec as soon as something does.
+    on_status(name, status) is called on every status change."""
+    pending = list(job_names)
+    last: Dict[str, str] = {}
+    interval = poll_sec
+    cycle = 0
+    while pending:
+        cycle += 1
+        counter = {"api_calls": 0}
+        statuses = poll_job_statuses(client, pending, analytics=analytics, counter=counter)
+        remaining = []
+        for name in pending:
+            status = statuses.get(name, "UNKNOWN")
+            if status != last.get(name):
                 print(f"[{name}] status: {status}")
-                if status in ("COMPLETED","FAILED"):
-                    if status == "COMPLETED" and show_transcript and not analytics:
-                        # Print a small snippet of the transcript JSON URL for debugging.
+                last[name] = status
+                if on_status:
+                    on_status(name, status)
+            if status in ("COMPLETED", "FAILED", "ERROR", "NOT_FOUND"):
+                if status == "COMPLETED" and show_transcript and not analytics:
+                    # Print a small snippet of the transcript JSON URL for debugging.
+                    counter["api_calls"] += 1
+                    incr("transcribe.api_calls.get")
+                    try:
+                        job = get_job(client, name)
                         print(f"  TranscriptFileUri: {job.get('Transcript',{}).get('TranscriptFileUri')}")
-                else:
-                    remaining.append(name)
-            except Exception as e:
-                print(f"[{name}] ERROR: {e}")
-        job_names = remaining
-        if job_names:
-            time.sleep(poll_sec)
+                    except Exception as e:
+                        print(f"[{name}] ERROR: {e}")
+            else:
+                remaining.append(name)
+        finished = len(pending) - len(remaining)
+        print(f"[poll {cycle}] {counter['api_calls']} API calls, {finished} finished, {len(remaining)} outstanding")
+        pending = remaining
+        if pending:
+            interval = poll_sec if finished else min(max_poll_sec, interval * 2)
+            sleep(interval)
 
 def main():
     # Load environment variables from .env file
@@ -169,16 +507,33 @@ def main():
     ap.add_argument("--redact-pii", action="store_true", help="Enable PII content redaction (basic settings)")
     ap.add_argument("--wait", action="store_true", help="Poll for completion (simple)")
     ap.add_argument("--poll-seconds", type=int, default=15)
+    ap.add_argument("--max-poll-seconds", type=int, default=120, help="Upper bound for the adaptive poll interval")
     ap.add_argument("--show-transcript", action="store_true", help="In --wait mode, print TranscriptFileUri for completed jobs")
     ap.add_argument("--call-analytics", action="store_true", help="Use Call Analytics instead of standard Transcribe")
     ap.add_argument("--role-arn", default=None, help="IAM role ARN (REQUIRED for Call Analytics)")
+    ap.add_argument("--submit-concurrency", type=int, default=1, help="Number of parallel job submissions")
+    ap.add_argument("--submit-rate", type=float, default=5.0, help="Max job submissions per second across all threads (0 = unlimited)")
+    ap.add_argument("--max-retries", type=int, default=6, help="Retries per job on ThrottlingException/LimitExceededException")
+    ap.add_argument("--ledger", default="transcribe_ledger.db", help="SQLite job ledger for incremental reruns ('' to disable)")
+    ap.add_argument("--resubmit-changed", action="store_true", help="Resubmit jobs whose per-row settings changed since the ledger recorded them")
+    ap.add_argument("--debug", action="store_true",
+                    help="Print the AWS account/identity in use, the CSV header and every job request and response")
+    add_metrics_argument(ap)
 
     args = ap.parse_args()
+    start_metrics(args.metrics_out)
 
     session = boto3.Session(region_name=args.region, profile_name=args.profile)
     client = session.client("transcribe")
+    if args.debug:
+        print(f"[DEBUG] region = {session.region_name}, profile = {args.profile}")
+        try:
+            ident = session.client("sts").get_caller_identity()
+        except Exception as e:
+            print(f"ERROR: STS get-caller-identity failed: {e}", file=sys.stderr)
+            sys.exit(2)
+        print(f"[DEBUG] Using AWS account {ident['Account']} as {ident['Arn']}")
 
-    started = []
     with open(args.csv, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f, delimiter=',')
         required = {"s3_uri","guest_name"}
@@ -186,20 +541,58 @@ def main():
         if missing:
             print(f"ERROR: CSV is missing required columns: {missing}", file=sys.stderr)
             sys.exit(2)
+        rows = list(reader)
+    if args.debug:
+        print(f"[DEBUG] CSV {args.csv}: {len(rows)} rows, columns {reader.fieldnames}")
 
-        for row in reader:
-            if args.call_analytics:
-                if not args.role_arn:
-                    print("ERROR: --role-arn is required for --call-analytics", file=sys.stderr)
-                    sys.exit(2)
-                name = start_analytics_job(client, row, args)
-            else:
-                name = start_standard_job(client, row, args)
-            started.append(name)
-            print(f"Started job: {name}")
+    if args.call_analytics and not args.role_arn:
+        print("ERROR: --role-arn is required for --call-analytics", file=sys.stderr)
+        sys.exit(2)
+
+    start_fn = start_analytics_job if args.call_analytics else start_standard_job
+    request_fn = analytics_job_request if args.call_analytics else standard_job_request
+    if args.debug:
+        start_fn = debug_start_fn(request_fn, "start_call_analytics_job" if args.call_analytics else "start_transcription_job")
+    ledger = JobLedger(args.ledger) if args.ledger else None
+    in_flight: List[str] = []
+    resubmit: List[str] = []
+    if ledger:
+        plan = plan_with_ledger(rows, ledger, request_fn, args, resubmit_changed=args.resubmit_changed)
+        print(f"Ledger {args.ledger}: {len(plan['completed'])} completed, {len(plan['in_flight'])} in flight, "
+              f"{len(plan['resubmit'])} to resubmit, {len(plan['submit'])} new")
+        rows = plan["submit"] + plan["resubmit"]
+        in_flight = plan["in_flight"]
+        resubmit = [row_job_name(row) for row in plan["resubmit"]]
+
+    bucket = TokenBucket(rate=args.submit_rate, burst=args.submit_concurrency)
+    summary = submit_jobs(client, rows, args, start_fn, concurrency=args.submit_concurrency,
+                          bucket=bucket, retries=args.max_retries, delete_first=resubmit)
+    print(f"Submitted: {len(summary['submitted'])}, failed: {len(summary['failed'])}, skipped: {len(summary['skipped'])}")
+    started = summary["submitted"] + summary["existing"]
+
+    if ledger:
+        by_name = {row_job_name(r): r for r in rows if (r.get("s3_uri") or "").strip()}
+        for name in started:
+            request = request_fn(by_name[name], args)
+            ledger.record_submitted(name, by_name[name]["s3_uri"].strip(), settings_hash(request),
+                                    expected_output_uri(request))
+        for name in summary["failed"]:
+            if name in by_name and ledger.get(name):
+                ledger.update_status(name, "FAILED", error="submission failed")
 
     if args.wait:
-        wait_for_jobs(client, started, analytics=args.call_analytics, show_transcript=args.show_transcript, poll_sec=args.poll_seconds)
+        on_status = None
+        if ledger:
+            def on_status(name: str, status: str):
+                if status in ("QUEUED", "IN_PROGRESS", "COMPLETED", "FAILED"):
+                    ledger.update_status(name, status)
+        wait_for_jobs(client, started + in_flight, analytics=args.call_analytics, show_transcript=args.show_transcript,
+                      poll_sec=args.poll_seconds, max_poll_sec=args.max_poll_seconds, on_status=on_status)
+    elif in_flight:
+        print(f"{len(in_flight)} job(s) from earlier runs are still in flight; rerun with --wait to track them.")
+
+    if ledger:
+        ledger.close()
 
 if __name__ == "__main__":
     main()
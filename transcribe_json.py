@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+transcribe_json.py
+------------------
+Incremental reader for Amazon Transcribe JSON outputs.
+
+The tools in this folder only need two arrays out of a Transcribe result:
+- results.items                   : one dict per word / punctuation token
+- results.speaker_labels.segments : one dict per diarized speaker turn
+
+Loading the whole document with json.load keeps the full transcript string,
+audio_segments and every item dict alive at once. The functions here walk the
+file in fixed-size chunks instead and yield the elements of one array at a time,
+skipping everything else without building Python objects for it, so peak memory
+stays flat regardless of recording length.
+
+If `ijson` is installed it is used; otherwise a pure-Python scanner is used.
+Both yield plain dicts with the same values json.load would produce.
+
+USAGE (as a library):
+    from transcribe_json import iter_items, iter_segments
+    for it in iter_items("output.json"):
+        ...
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, Tuple
+
+try:
+    import ijson  # optional fast path
+except ImportError:
+    ijson = None
+
+ITEMS_PATH = ("results", "items")
+SEGMENTS_PATH = ("results", "speaker_labels", "segments")
+
+CHUNK_SIZE = 1 << 16
+
+_WS = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_STRUCT = re.compile(r'["\[\]{}]')
+_SCALAR = re.compile(r"[^,\]}\s]+")
+_DELIMS = ",]} \t\n\r"
+
+class _Scanner:
+    """Chunked cursor over a text stream with just enough JSON lexing to
+    navigate keys and skip values without materializing them."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"Expected {ch!r} at offset {self.pos}, got {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def read_string(self) -> str:
+        self.peek()
+        while True:
+            m = _STRING.match(self.buf, self.pos)
+            if m:
+                self.pos = m.end()
+                return json.loads(m.group(0))
+            if not self.fill():
+                raise ValueError("Unterminated string in JSON input")
+
+    def decode_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut by the buffer edge decodes as its prefix (12|3, -1|.5e3): accept
+            # a scalar only once a delimiter follows it, or at the end of the input.
+            complete = isinstance(obj, (dict, list, str)) or (end < len(self.buf) and self.buf[end] in _DELIMS)
+            if not complete and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+    def skip_value(self):
+        ch = self.peek()
+        if ch == '"':
+            self.read_string()
+            return
+        if ch not in "[{":
+            while True:
+                m = _SCALAR.match(self.buf, self.pos)
+                if m and (m.end() < len(self.buf) or self.eof):
+                    self.pos = m.end()
+                    return
+                if not self.fill():
+                    raise ValueError("Unexpected end of JSON input")
+        depth = 0
+        while True:
+            m = _STRUCT.search(self.buf, self.pos)
+            if not m:
+                self.pos = len(self.buf)
+                if not self.fill():
+                    raise ValueError("Unexpected end of JSON input")
+                continue
+            self.pos = m.start()
+            c = m.group(0)
+            if c == '"':
+                self.read_string()
+                continue
+            self.pos += 1
+            depth += 1 if c in "[{" else -1
+            if depth == 0:
+                return
+
+def _walk(sc: _Scanner, path: Tuple[str, ...], target: Tuple[str, ...]) -> Iterator[Any]:
+    """Yield elements of the array at `target`, descending only along its prefix."""
+    ch = sc.peek()
+    if path == target:
+        if ch != "[":
+            sc.skip_value()
+            return
+        sc.pos += 1
+        if sc.peek() == "]":
+            sc.pos += 1
+            return
+        while True:
+            yield sc.decode_value()
+            if sc.peek() == ",":
+                sc.pos += 1
+                continue
+            sc.expect("]")
+            return
+    if ch != "{":
+        sc.skip_value()
+        return
+    sc.pos += 1
+    if sc.peek() == "}":
+        sc.pos += 1
+        return
+    while True:
+        key = sc.read_string()
+        sc.expect(":")
+        sub = path + (key,)
+        if sub == target[:len(sub)]:
+            yield from _walk(sc, sub, target)
+        else:
+            sc.skip_value()
+        if sc.peek() == ",":
+            sc.pos += 1
+            continue
+        sc.expect("}")
+        return
+
+def iter_json_array(path: str, keys: Tuple[str, ...], chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Stream the elements of the array found at `keys` inside the JSON document at `path`.
+    A missing key yields nothing (mirrors `.get(..., [])` on a fully loaded object)."""
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.items(f, ".".join(keys) + ".item", use_float=True)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from _walk(_Scanner(f, chunk_size), (), keys)
+
+def iter_items(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream results.items from a Transcribe JSON."""
+    return iter_json_array(path, ITEMS_PATH)
+
+def iter_segments(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream results.speaker_labels.segments from a Transcribe JSON."""
+    return iter_json_array(path, SEGMENTS_PATH)
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Count streamed items/segments in a Transcribe JSON.")
+    ap.add_argument("json", help="Transcribe JSON path")
+    args = ap.parse_args()
+    n_items = sum(1 for _ in iter_items(args.json))
+    n_segs = sum(1 for _ in iter_segments(args.json))
+    backend = "ijson" if ijson is not None else "pure-python"
+    print(f"{args.json}: {n_items} items, {n_segs} speaker segments ({backend})")
+
+if __name__ == "__main__":
+    main()
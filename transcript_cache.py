@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+transcript_cache.py
+-------------------
+On-disk cache of parsed transcripts (Transcribe JSON, or any other format
+transcript_ingest.py reads), so re-rendering or re-merging the same archive files
+(while tuning speaker maps, --keep-top-speakers, merge settings...) skips the parse.
+
+Each entry is one file, <sha1 of the file bytes>-v<PARSER_VERSION>.wtc, holding a
+WordTable (with its speaker column) and a SegmentTable (see word_table.py) as
+fixed-width arrays plus UTF-8 string tables:
+
+    b"WTC1" | uint32 header length | JSON header (padded to 4 KiB) | arrays, each 64-byte aligned
+
+The header maps every array name to (dtype, offset, length). Loading mmaps the file
+read-only and wraps each array with numpy.frombuffer, so nothing is copied until
+it is used; only the (small) vocabulary and speaker label lists are decoded.
+
+- Keys come from the file content, not its path or mtime: a re-downloaded but
+  identical file still hits, and an edited one misses.
+- Bump PARSER_VERSION whenever transcript_ingest / WordTable.from_items / SegmentTable parsing changes;
+  old entries then stop matching and age out.
+- Hits bump the entry's mtime; when the directory grows past max_bytes the least
+  recently used entries are deleted.
+- Entries are written to a temp file and renamed into place, so concurrent batch
+  workers never see a partial entry.
+
+USAGE (as a library):
+    cache = open_cache(".transcript_cache", max_mb=2048)
+    table, segments = load_transcript("output.json", cache=cache)
+
+USAGE (inspect / clear a cache directory):
+    python transcript_cache.py .transcript_cache
+    python transcript_cache.py .transcript_cache --clear
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import incr, span
+from transcript_ingest import ingest
+from word_table import SegmentTable, WordTable
+
+PARSER_VERSION = 3
+MAGIC = b"WTC1"
+HEADER_SIZE = 4096  # magic + length + JSON header, zero padded; arrays start here
+ALIGN = 64
+SUFFIX = ".wtc"
+DEFAULT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", ".transcript_cache")
+
+def parse_transcript(path: str, stream: bool = False) -> Tuple[WordTable, SegmentTable]:
+    """Parse a transcript (see transcript_ingest.ingest) into (WordTable, SegmentTable) without the cache."""
+    return ingest(path, stream)
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+class TranscriptCache:
+    def __init__(self, directory: str, max_bytes: int = 2048 << 20):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, path: str) -> str:
+        return f"{file_sha1(path)}-v{PARSER_VERSION}"
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{SUFFIX}"
+
+    def get(self, key: str) -> Optional[Tuple[WordTable, SegmentTable]]:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            if mm[:4] != MAGIC:
+                raise ValueError("bad magic")
+            (header_len,) = struct.unpack_from("<I", mm, 4)
+            header = json.loads(mm[8:8 + header_len].decode("utf-8"))
+            if header.get("parser_version") != PARSER_VERSION:
+                raise ValueError("parser version mismatch")
+            arrays = {name: np.frombuffer(mm, dtype=np.dtype(dtype), count=count, offset=offset)
+                      for name, (dtype, offset, count) in header["arrays"].items()}
+        except (ValueError, KeyError, struct.error):
+            mm.close()
+            self._discard(path)  # corrupt or stale entry: re-parse and overwrite
+            return None
+        try:
+            os.utime(path)  # LRU: a hit counts as a use
+        except OSError:
+            pass
+        table = WordTable(arrays["start"], arrays["end"], arrays["conf"], arrays["token"],
+                          arrays["is_word"], _unpack_strings(arrays["vocab"], arrays["vocab_offsets"]))
+        table.speaker = arrays["speaker"]
+        segments = SegmentTable(arrays["seg_start"], arrays["seg_end"], arrays["seg_speaker"],
+                                _unpack_strings(arrays["labels"], arrays["label_offsets"]))
+        return table, segments
+
+    def put(self, key: str, table: WordTable, segments: SegmentTable):
+        vocab, vocab_offsets = _pack_strings(table.vocab)
+        labels, label_offsets = _pack_strings(segments.labels)
+        arrays: Dict[str, np.ndarray] = {
+            "start": table.start, "end": table.end, "conf": table.conf, "token": table.token,
+            "is_word": table.is_word, "speaker": table.speaker, "vocab": vocab, "vocab_offsets": vocab_offsets,
+            "seg_start": segments.start, "seg_end": segments.end, "seg_speaker": segments.speaker,
+            "labels": labels, "label_offsets": label_offsets,
+        }
+        layout: Dict[str, Tuple[str, int, int]] = {}
+        offset = HEADER_SIZE
+        for name, arr in arrays.items():
+            layout[name] = (arr.dtype.str, offset, int(arr.size))
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+        header = json.dumps({"parser_version": PARSER_VERSION, "arrays": layout}).encode("utf-8")
+        if 8 + len(header) > HEADER_SIZE:
+            raise ValueError("cache header too large")
+
+        fd, tmp = tempfile.mkstemp(prefix=f".{key}.", suffix=".part", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(MAGIC + struct.pack("<I", len(header)) + header)
+                for name, arr in arrays.items():
+                    f.seek(layout[name][1])
+                    f.write(np.ascontiguousarray(arr).tobytes())
+                f.truncate(max(f.tell(), HEADER_SIZE))
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            self._discard(Path(tmp))
+            raise
+        self.evict()
+
+    def entries(self) -> List[Tuple[Path, float, int]]:
+        """(path, mtime, size) of every entry, least recently used first."""
+        out = []
+        for p in self.directory.glob(f"*{SUFFIX}"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:  # evicted by another worker
+                continue
+            out.append((p, st.st_mtime, st.st_size))
+        return sorted(out, key=lambda e: e[1])
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in max_bytes. Returns entries removed."""
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        removed = 0
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self) -> int:
+        entries = self.entries()
+        for path, _, _ in entries:
+            self._discard(path)
+        return len(entries)
+
+    @staticmethod
+    def _discard(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+def open_cache(directory: Optional[str], max_mb: float = 2048) -> Optional[TranscriptCache]:
+    """TranscriptCache for a --cache-dir value, or None when caching is off."""
+    if not directory:
+        return None
+    return TranscriptCache(directory, int(max_mb * (1 << 20)))
+
+def load_transcript(path: str, stream: bool = False,
+                    cache: Optional[TranscriptCache] = None) -> Tuple[WordTable, SegmentTable]:
+    """(WordTable, SegmentTable) for a transcript file, from the cache when possible."""
+    if cache is None:
+        return _parse_counted(path, stream)
+    key = cache.key(path)
+    with span("cache.get"):
+        hit = cache.get(key)
+    if hit is not None:
+        incr("cache.hits")
+        return hit
+    incr("cache.misses")
+    table, segments = _parse_counted(path, stream)
+    cache.put(key, table, segments)
+    return table, segments
+
+def _parse_counted(path: str, stream: bool) -> Tuple[WordTable, SegmentTable]:
+    with span("parse"):
+        table, segments = parse_transcript(path, stream)
+    incr("parse.bytes", os.path.getsize(path))
+    incr("parse.items", len(table))  # words and punctuation
+    return table, segments
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Inspect or clear a parsed-transcript cache directory.")
+    ap.add_argument("cache_dir", nargs="?", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--clear", action="store_true", help="Delete every entry")
+    args = ap.parse_args()
+
+    cache = TranscriptCache(args.cache_dir)
+    if args.clear:
+        print(f"Removed {cache.clear()} entries from {args.cache_dir}")
+        return
+    entries = cache.entries()
+    for path, _mtime, size in entries:
+        print(f"{path.name}\t{size / 1024:.1f} KiB")
+    print(f"{len(entries)} entries, {sum(s for _, _, s in entries) / (1 << 20):.1f} MiB")
+
+if __name__ == "__main__":
+    main()
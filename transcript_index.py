@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+transcript_index.py
+-------------------
+Full-text search over the rendered transcript archive (outputs/EFRL-*.txt): every
+hit comes back with its show ID, speaker and timestamps in milliseconds.
+
+The index is one SQLite file:
+- shows     : one row per show (ID = file stem, e.g. EFRL-1989-10-07-1; air date
+              parsed from it), with the indexed file's path, size and mtime
+- turns     : one row per speaker turn (show, speaker, start_ms, end_ms, text)
+- turns_fts : FTS5 index over turns.text (unicode61, diacritics folded). It is an
+              external-content table kept in sync by triggers, so text is stored once.
+
+Turns are read with transcript_ingest.py: rendered Markdown (.txt/.md), JSONL turn
+records (--formats jsonl, full-precision times), SRT/VTT cues, or the diarized turns
+of a Transcribe JSON. When a folder holds several files for one show, the first
+suffix in PREFERRED_SUFFIXES wins (rendered turns before the raw JSON).
+
+update() is incremental: shows whose file size and mtime match the index are
+skipped, changed ones have their turns replaced, and prune=True drops shows whose
+file is gone. diarization_to_markdown.py --index DB calls it for what it just rendered.
+
+Queries use FTS5 syntax: words (all must match), "quoted phrases", OR, NOT,
+prefix*, NEAR(a b, 10). A hit's at_ms estimates when its first matched word is
+said, from the word's character offset into the turn.
+
+USAGE:
+    python transcript_index.py update outputs/
+    python transcript_index.py search '"minimum wage"' --speaker "Thomas Sowell"
+    python transcript_index.py search 'inflation NEAR(price control*)' --from 1990 --to 1995-06 --order aired
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from metrics import add_metrics_argument, incr, observe, start_metrics
+from transcript_ingest import SUFFIXES, ingest, iter_cues, turn_records
+
+DEFAULT_DB = os.environ.get("TRANSCRIPT_INDEX", "transcript_index.db")
+PREFERRED_SUFFIXES = [".jsonl", ".txt", ".md", ".vtt", ".srt", ".json"]
+OPTIMIZE_AFTER = 100  # merge FTS segments after an update that (re)indexed this many shows
+_AIRED = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_QUERY_TERM = re.compile(r'(?<![\w^])(\w+)(\*?)')
+_OPERATORS = {"AND", "OR", "NOT", "NEAR"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    id         INTEGER PRIMARY KEY,
+    show_id    TEXT NOT NULL UNIQUE,
+    aired      TEXT,
+    path       TEXT NOT NULL,
+    size       INTEGER,
+    mtime      REAL,
+    turns      INTEGER,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id       INTEGER PRIMARY KEY,
+    show     INTEGER NOT NULL REFERENCES shows(id),
+    speaker  TEXT,
+    start_ms INTEGER,
+    end_ms   INTEGER,
+    text     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_show ON turns(show);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    text, content='turns', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS turns_ai AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS turns_ad AFTER DELETE ON turns BEGIN
+    INSERT INTO turns_fts(turns_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+@dataclass
+class Hit:
+    show_id: str
+    speaker: Optional[str]
+    at_ms: Optional[int]
+    start_ms: Optional[int]
+    end_ms: Optional[int]
+    snippet: str
+
+def show_files(paths: Iterable[str]) -> Dict[str, str]:
+    """{show ID: file to index} for files and directories (searched recursively)."""
+    candidates: Dict[str, List[Path]] = {}
+    for p in map(Path, paths):
+        files = sorted(f for f in p.rglob("*") if f.is_file()) if p.is_dir() else [p]
+        for f in files:
+            if f.suffix.lower() in SUFFIXES and f.suffix.lower() in PREFERRED_SUFFIXES:
+                candidates.setdefault(f.stem, []).append(f)
+    return {show: str(min(files, key=lambda f: PREFERRED_SUFFIXES.index(f.suffix.lower())))
+            for show, files in candidates.items()}
+
+def _ms(t: float) -> Optional[int]:
+    return int(round(t * 1000)) if t == t else None
+
+def iter_show_turns(path: str) -> Iterator[Tuple[Optional[str], Optional[int], Optional[int], str]]:
+    """(speaker, start_ms, end_ms, text) per turn of one transcript file."""
+    if Path(path).suffix.lower() == ".json":
+        turns = turn_records(*ingest(path))
+    else:
+        turns = ((c.speaker, c.start, c.end, c.text) for c in iter_cues(path))
+    for speaker, start, end, text in turns:
+        if text.strip():
+            yield speaker, _ms(start), _ms(end), text
+
+def match_offset(query: str, text: str) -> Optional[int]:
+    """Character offset of the first word in text that one of the query's terms matches."""
+    terms = [(w, star) for w, star in _QUERY_TERM.findall(query) if w not in _OPERATORS and not w.isdigit()]
+    if not terms:
+        return None
+    pattern = "|".join(re.escape(w) + (r"\w*" if star else r"\b") for w, star in terms)
+    m = re.search(rf"\b(?:{pattern})", text, re.IGNORECASE)
+    return m.start() if m else None
+
+class TranscriptIndex:
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, paths: Iterable[str], prune: bool = False, verbose: bool = True) -> Dict[str, int]:
+        """Index new and changed shows among paths. Returns counts of added, updated,
+        unchanged, removed shows and turns written."""
+        t0 = time.perf_counter()
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "turns": 0}
+        files = show_files(paths)
+        known = {show_id: (rowid, path, size, mtime) for rowid, show_id, path, size, mtime in
+                 self.conn.execute("SELECT id, show_id, path, size, mtime FROM shows")}
+        with self.conn:
+            for show_id, path in sorted(files.items()):
+                st = os.stat(path)
+                old = known.get(show_id)
+                if old and old[1] == path and old[2] == st.st_size and old[3] == st.st_mtime:
+                    counts["unchanged"] += 1
+                    continue
+                if old:
+                    self.conn.execute("DELETE FROM turns WHERE show = ?", (old[0],))
+                    self.conn.execute("DELETE FROM shows WHERE id = ?", (old[0],))
+                aired = _AIRED.search(show_id)
+                rowid = self.conn.execute(
+                    "INSERT INTO shows (show_id, aired, path, size, mtime, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (show_id, aired.group(1) if aired else None, path, st.st_size, st.st_mtime, time.time())).lastrowid
+                rows = [(rowid, spk, start, end, text) for spk, start, end, text in iter_show_turns(path)]
+                self.conn.executemany("INSERT INTO turns (show, speaker, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.execute("UPDATE shows SET turns = ? WHERE id = ?", (len(rows), rowid))
+                counts["updated" if old else "added"] += 1
+                counts["turns"] += len(rows)
+                if verbose:
+                    print(f"{'Updated' if old else 'Added'} {show_id}: {len(rows)} turns ({path})")
+            if prune:
+                for show_id, (rowid, path, _size, _mtime) in known.items():
+                    if not os.path.exists(path):
+                        self.conn.execute("DELETE FROM turns WHERE show = ?", (rowid,))
+                        self.conn.execute("DELETE FROM shows WHERE id = ?", (rowid,))
+                        counts["removed"] += 1
+                        if verbose:
+                            print(f"Removed {show_id} ({path} is gone)")
+        if counts["added"] + counts["updated"] >= OPTIMIZE_AFTER:
+            self.optimize()
+        observe("index.update", time.perf_counter() - t0)
+        incr("index.turns", counts["turns"])
+        return counts
+
+    def optimize(self):
+        """Merge the FTS index into one b-tree (faster queries after large updates)."""
+        with self.conn:
+            self.conn.execute("INSERT INTO turns_fts(turns_fts) VALUES ('optimize')")
+
+    def search(self, query: str, speaker: Optional[str] = None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None, order: str = "rank", limit: int = 20) -> List[Hit]:
+        """Turns matching an FTS5 query, best first (order="rank") or by air date and time
+        (order="aired"). Dates compare as prefixes: date_to="1995" includes all of 1995."""
+        sql = ["SELECT shows.show_id, turns.speaker, turns.start_ms, turns.end_ms, turns.text,",
+               "snippet(turns_fts, 0, '[', ']', '...', 16)",
+               "FROM turns_fts JOIN turns ON turns.id = turns_fts.rowid JOIN shows ON shows.id = turns.show",
+               "WHERE turns_fts MATCH ?"]
+        params: List = [query]
+        if speaker:
+            sql.append("AND turns.speaker = ? COLLATE NOCASE")
+            params.append(speaker)
+        if date_from:
+            sql.append("AND shows.aired >= ?")
+            params.append(date_from)
+        if date_to:
+            sql.append("AND shows.aired <= ?")
+            params.append(date_to + "~")  # '~' sorts after digits and '-': "1995" covers 1995-12-31
+        sql.append("ORDER BY rank" if order == "rank" else "ORDER BY shows.aired, shows.show_id, turns.start_ms")
+        sql.append("LIMIT ?")
+        params.append(limit)
+        hits = []
+        for show_id, spk, start, end, text, snippet in self.conn.execute(" ".join(sql), params):
+            at = start
+            offset = match_offset(query, text)
+            if offset is not None and start is not None and end is not None:
+                at = start + int((end - start) * offset / max(1, len(text)))
+            hits.append(Hit(show_id, spk, at, start, end, snippet))
+        return hits
+
+    def stats(self) -> Dict[str, object]:
+        shows, turns, first, last = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(turns), 0), MIN(aired), MAX(aired) FROM shows").fetchone()
+        return {"shows": shows, "turns": turns, "first_aired": first, "last_aired": last,
+                "mb": os.path.getsize(self.path) / 1e6 if os.path.exists(self.path) else 0.0}
+
+def format_ms(ms: Optional[int]) -> str:
+    if ms is None:
+        return "--:--:--.---"
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+def main():
+    ap = argparse.ArgumentParser(description="Full-text index of rendered transcripts with timestamped hits.")
+    ap.add_argument("--db", default=DEFAULT_DB, help="Index file (env TRANSCRIPT_INDEX)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("update", help="Index new or changed shows")
+    up.add_argument("paths", nargs="+", help="Transcript files or folders (e.g. outputs/)")
+    up.add_argument("--prune", action="store_true", help="Drop shows whose indexed file no longer exists")
+    up.add_argument("--quiet", action="store_true", help="Only print the summary")
+    se = sub.add_parser("search", help="Query the index")
+    se.add_argument("query", help="FTS5 query, e.g. '\"minimum wage\"' or 'inflat* NOT deflation'")
+    se.add_argument("--speaker", help="Only turns by this speaker label (case-insensitive)")
+    se.add_argument("--from", dest="date_from", help="Earliest air date (YYYY, YYYY-MM or YYYY-MM-DD)")
+    se.add_argument("--to", dest="date_to", help="Latest air date (YYYY, YYYY-MM or YYYY-MM-DD)")
+    se.add_argument("--order", choices=["rank", "aired"], default="rank", help="Best matches first, or chronological")
+    se.add_argument("--limit", type=int, default=20)
+    sub.add_parser("stats", help="Print index size")
+    add_metrics_argument(ap)
+    args = ap.parse_args()
+    start_metrics(args.metrics_out)
+
+    index = TranscriptIndex(args.db)
+    try:
+        if args.command == "update":
+            t0 = time.perf_counter()
+            c = index.update(args.paths, prune=args.prune, verbose=not args.quiet)
+            print(f"Added: {c['added']}, updated: {c['updated']}, unchanged: {c['unchanged']}, removed: {c['removed']} "
+                  f"({c['turns']} turns in {time.perf_counter() - t0:.1f}s)")
+        elif args.command == "search":
+            try:
+                hits = index.search(args.query, args.speaker, args.date_from, args.date_to, args.order, args.limit)
+            except sqlite3.OperationalError as e:
+                raise SystemExit(f"Bad query {args.query!r}: {e}")
+            print("show_id\tspeaker\tat_ms\tstart_ms\tend_ms\tat\tsnippet")
+            for h in hits:
+                print(f"{h.show_id}\t{h.speaker or ''}\t{h.at_ms if h.at_ms is not None else ''}\t"
+                      f"{h.start_ms if h.start_ms is not None else ''}\t{h.end_ms if h.end_ms is not None else ''}\t"
+                      f"{format_ms(h.at_ms)}\t{h.snippet}")
+            print(f"{len(hits)} hits")
+        else:
+            s = index.stats()
+            print(f"{s['shows']} shows ({s['first_aired']} to {s['last_aired']}), {s['turns']} turns, {s['mb']:.1f} MB")
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
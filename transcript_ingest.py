@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+transcript_ingest.py
+--------------------
+Readers that turn every transcript format we collect into one timed-token stream:
+Transcribe-shaped item dicts ({"type", "start_time", "end_time", "alternatives":
+[{"content", "confidence"}]}), which WordTable.from_items packs into the columnar
+model (word_table.py). Merging, scoring and the transcript cache then load any
+format through transcript_cache.load_transcript with no per-format code.
+
+- Transcribe JSON: results.items as they are; speakers from speaker_labels.
+- SRT / WebVTT: cues are read one at a time. A cue's time span is spread over its
+  words in proportion to their length, so word times are interpolated inside each
+  cue. Files joined from per-chunk outputs without shifting (2011_full.srt restarts
+  at 00:00:00 every ten minutes) are repaired: when the clock jumps back by more
+  than CLOCK_RESTART_SEC, the previous chunk is taken to have lasted its last cue's
+  end rounded up to a whole minute (fixed-length chunks are whole minutes). A
+  diarized prefix ("SPK00: ..." from transcribe_diarize.py, "[SPEAKER_01] ...") or
+  a VTT voice tag (<v Name>) sets the cue's speaker.
+- transcribe_diarize.py's _diarized.txt ("[SPK00] 00:00:01,000 - 00:00:05,000  text")
+  and diarization_to_markdown.py's Markdown ("**Name:** [mm:ss.ss - mm:ss.ss] text")
+  and JSONL turn records: one cue per line.
+- Otter text exports: a "Name  0:03" header starts a turn, whose words are spread
+  between its stamp and the next header (the one turn is buffered until then); the
+  last turn gets SEC_PER_WORD per word.
+- Word (.docx) and plain text: label lines (short, no sentence punctuation, as in
+  control.txt and Word exports) set the speaker; there are no times (NaN). Word
+  paragraphs are streamed out of the .docx XML.
+
+Trailing punctuation is split off into punctuation items, as Transcribe does, so
+"policies," in a Whisper SRT votes against "policies" in a Transcribe run;
+table_text() joins the rows back into running text. Words from formats without
+confidences get NaN (merge_majority_vote fills them in). Every reader is one pass
+over the file holding at most one cue or turn.
+
+ingest() also sets WordTable.speaker for every format (for Transcribe JSON via
+assign_speakers), so speaker turns come out the same way everywhere (turn_records,
+over the same word_table.table_turns the renderer uses).
+
+USAGE (as a library):
+    from transcript_ingest import ingest, iter_cues, table_text, turn_records
+    table, segments = ingest("Transcription Options/Other Transcripts/2011_full.srt")
+    table.start, table.speaker, table_text(table)
+
+USAGE (summarize files):
+    python transcript_ingest.py "Transcription Options/Other Transcripts"/*
+"""
+
+import json
+import math
+import re
+import zipfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+
+from transcribe_json import iter_items, iter_segments
+from word_table import SegmentTable, WordTable, table_turns
+
+SUFFIXES = {".json", ".srt", ".vtt", ".txt", ".md", ".jsonl", ".docx"}
+SEC_PER_WORD = 0.4  # length given to an Otter export's last turn, which has no end stamp
+CLOCK_RESTART_SEC = 30.0  # a cue starting this much before the previous one restarts the clock
+
+_CLOCK = r"(?:\d+:)?\d{1,2}:\d{2}(?:[,.]\d{1,3})?"
+_LINE_NUMBER = re.compile(r"^\s*\d+\|")
+_CUE_TIMES = re.compile(rf"^({_CLOCK})\s+-->\s+({_CLOCK})")
+_CUE_SPEAKER = re.compile(r"^\[?(SPK\d+|SPK\?|SPEAKER_\d+|spk_\d+)\]?:?\s+(.*)$")
+_DIARIZED_LINE = re.compile(rf"^\[([^\]]+)\]\s+({_CLOCK})\s+-\s+({_CLOCK})\s+(.*)$")
+_MARKDOWN_TURN = re.compile(r"^\*\*(.+?):\*\*\s+\[(\d+:\d{2}(?:\.\d+)?)\s+-\s+(\d+:\d{2}(?:\.\d+)?)\]\s*(.*)$")
+_OTTER_HEADER = re.compile(rf"^(\S.*?)\s{{2,}}({_CLOCK})$")
+_VOICE = re.compile(r"<v(?:\.[^\s>]*)?\s+([^>]+)>")
+_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+_TRAILING_PUNCT = re.compile(r"^(.*\w)([.,?!;:]+)$")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+class Cue(NamedTuple):
+    start: float  # seconds, NaN when the format has no times
+    end: float
+    speaker: Optional[str]
+    text: str
+
+def parse_clock(value: str) -> float:
+    """'01:02:03,450', '02:03.450' or '2:03' -> seconds."""
+    seconds = 0.0
+    for part in value.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def is_speaker_line(line: str) -> bool:
+    """Speaker label lines in control.txt / Word exports: short and without sentence punctuation."""
+    return len(line.split()) <= 3 and not re.search(r"[.,?!]", line)
+
+def _cue(start: float, end: float, text: str) -> Cue:
+    speaker = None
+    voice = _VOICE.search(text)
+    if voice:
+        speaker = voice.group(1).strip()
+    if "<" in text:
+        text = _TAG.sub("", text)
+    m = _CUE_SPEAKER.match(text)
+    if m:
+        speaker, text = m.group(1), m.group(2)
+    return Cue(start, end, speaker, text)
+
+def iter_subtitle_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    """Cues of an SRT or WebVTT file. Lines outside a cue (WEBVTT header, NOTE/STYLE
+    blocks, cue ids) are skipped; a cue ends at a blank line or at the next timing line.
+    Without a blank line between cues, the line before a timing line is taken as that
+    cue's id only if it is the number after the previous cue's id, so a cue whose last
+    line is a number ("1989") keeps it."""
+    start = end = None
+    text: List[str] = []
+    last_id: Optional[int] = None
+    for raw in lines:
+        line = _LINE_NUMBER.sub("", raw).strip()
+        times = _CUE_TIMES.match(line)
+        if times:
+            if start is not None:
+                if text and text[-1].isdigit() and last_id is not None and int(text[-1]) == last_id + 1:
+                    last_id = int(text.pop())
+                yield _cue(start, end, " ".join(text))
+            start, end, text = parse_clock(times.group(1)), parse_clock(times.group(2)), []
+        elif not line:
+            if start is not None:
+                yield _cue(start, end, " ".join(text))
+            start = None
+        elif start is not None:
+            text.append(line)
+        elif line.isdigit():
+            last_id = int(line)
+    if start is not None:
+        yield _cue(start, end, " ".join(text))
+
+def continuous_clock(cues: Iterable[Cue]) -> Iterator[Cue]:
+    """Cues with clock restarts (see CLOCK_RESTART_SEC) folded into a running offset."""
+    offset, last_start, last_end = 0.0, float("-inf"), 0.0
+    for cue in cues:
+        if cue.start == cue.start:
+            if cue.start + offset < last_start - CLOCK_RESTART_SEC:
+                offset += math.ceil((last_end - offset) / 60.0) * 60.0
+            if offset:
+                cue = cue._replace(start=cue.start + offset, end=cue.end + offset)
+            last_start, last_end = cue.start, cue.end
+        yield cue
+
+def iter_text_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    """Cues of a text export: one per line (untimed, or timed Markdown / diarized
+    lines), or one per Otter turn."""
+    nan = float("nan")
+    speaker = None
+    turn: Optional[Tuple[Optional[str], float, List[str]]] = None  # Otter turn waiting for its end
+    for raw in lines:
+        line = _LINE_NUMBER.sub("", raw).strip()
+        if not line:
+            continue
+        m = _MARKDOWN_TURN.match(line) or _DIARIZED_LINE.match(line)
+        if m:
+            yield Cue(parse_clock(m.group(2)), parse_clock(m.group(3)), m.group(1), m.group(4))
+            continue
+        m = _OTTER_HEADER.match(line)
+        if m and is_speaker_line(m.group(1)):
+            start = parse_clock(m.group(2))
+            if turn is not None:
+                yield Cue(turn[1], start, turn[0], " ".join(turn[2]))
+            turn = (m.group(1), start, [])
+        elif turn is not None:
+            turn[2].append(line)
+        elif is_speaker_line(line):
+            speaker = line
+        else:
+            yield Cue(nan, nan, speaker, line)
+    if turn is not None:
+        text = " ".join(turn[2])
+        yield Cue(turn[1], turn[1] + SEC_PER_WORD * len(text.split()), turn[0], text)
+
+def iter_jsonl_cues(lines: Iterable[str]) -> Iterator[Cue]:
+    """Cues of diarization_to_markdown.py's JSONL turn records ({"speaker", "label", "start", "end", "text"})."""
+    for line in lines:
+        if line.strip():
+            rec = json.loads(line)
+            yield Cue(float(rec["start"]), float(rec["end"]), rec.get("label") or rec.get("speaker"), rec["text"])
+
+def iter_docx_lines(path: str) -> Iterator[str]:
+    """Paragraph texts of a Word document (line breaks inside a paragraph split it too),
+    streamed from word/document.xml."""
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        parts: List[str] = []
+        for _event, el in ElementTree.iterparse(f, events=("end",)):
+            if el.tag == f"{_W}t":
+                parts.append(el.text or "")
+            elif el.tag == f"{_W}tab":
+                parts.append("\t")
+            elif el.tag in (f"{_W}br", f"{_W}cr", f"{_W}p"):
+                yield "".join(parts)
+                parts = []
+                if el.tag == f"{_W}p":
+                    el.clear()
+
+def cue_items(cue: Cue) -> Iterator[Dict[str, Any]]:
+    """Transcribe-shaped items for one cue: its words with times interpolated across the
+    cue (weighted by length + 1 for the following gap), trailing punctuation split off."""
+    tokens = cue.text.split()
+    if not tokens:
+        return
+    scale = (cue.end - cue.start) / (sum(len(t) for t in tokens) + len(tokens))
+    t = cue.start
+    nan = float("nan")
+    for tok in tokens:
+        end = t + (len(tok) + 1) * scale
+        m = _TRAILING_PUNCT.match(tok)
+        word = m.group(1) if m else tok
+        yield {"type": "pronunciation", "start_time": t, "end_time": end,
+               "alternatives": [{"content": word, "confidence": nan}]}
+        if m:
+            yield {"type": "punctuation", "alternatives": [{"content": m.group(2), "confidence": 0.0}]}
+        t = end
+
+def tables_from_cues(cues: Iterable[Cue]) -> Tuple[WordTable, SegmentTable]:
+    """(WordTable, SegmentTable) for a cue stream. Every row gets its cue's speaker;
+    consecutive timed cues of one speaker become one segment."""
+    labels: List[str] = []
+    ids: Dict[str, int] = {}
+    row_speaker = array("h")
+    seg_start, seg_end, seg_speaker = array("d"), array("d"), array("h")
+
+    def items() -> Iterator[Dict[str, Any]]:
+        for cue in cues:
+            spk = -1
+            if cue.speaker:
+                spk = ids.get(cue.speaker, -1)
+                if spk < 0:
+                    spk = ids[cue.speaker] = len(labels)
+                    labels.append(cue.speaker)
+                if cue.start == cue.start:  # timed
+                    if seg_speaker and seg_speaker[-1] == spk:
+                        seg_end[-1] = max(seg_end[-1], cue.end)
+                    else:
+                        seg_start.append(cue.start)
+                        seg_end.append(cue.end)
+                        seg_speaker.append(spk)
+            for item in cue_items(cue):
+                row_speaker.append(spk)
+                yield item
+
+    table = WordTable.from_items(items())
+    table.speaker = np.frombuffer(row_speaker, dtype=np.int16)
+    segments = SegmentTable(np.frombuffer(seg_start, dtype=np.float64), np.frombuffer(seg_end, dtype=np.float64),
+                            np.frombuffer(seg_speaker, dtype=np.int16), labels)
+    return table, segments
+
+def ingest(path: str, stream: bool = False) -> Tuple[WordTable, SegmentTable]:
+    """(WordTable, SegmentTable) for a transcript in any supported format, with
+    WordTable.speaker set. stream only matters for Transcribe JSON (the others always stream)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".json":
+        if stream:
+            table = WordTable.from_items(iter_items(path))
+            segments = SegmentTable.from_segments(iter_segments(path))
+        else:
+            res = json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+            table = WordTable.from_items(res.get("items", []))
+            segments = SegmentTable.from_segments(res.get("speaker_labels", {}).get("segments", []))
+        if len(segments):
+            table.assign_speakers(segments)
+        return table, segments
+    return tables_from_cues(iter_cues(path))
+
+def iter_cues(path: str) -> Iterator[Cue]:
+    """Cues of any supported transcript other than Transcribe JSON, streamed from the file."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".docx":
+        yield from iter_text_cues(iter_docx_lines(path))
+        return
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if suffix in (".srt", ".vtt"):
+            yield from continuous_clock(iter_subtitle_cues(f))
+        elif suffix == ".jsonl":
+            yield from iter_jsonl_cues(f)
+        else:
+            yield from iter_text_cues(f)
+
+def table_text(table: WordTable, rows: Optional[np.ndarray] = None) -> str:
+    """Running text of the given rows (all by default): words separated by spaces,
+    punctuation attached to the word before it, as in a Transcribe transcript."""
+    rows = np.arange(len(table)) if rows is None else rows
+    parts: List[str] = []
+    for tok, is_word in zip(table.token[rows].tolist(), table.is_word[rows].tolist()):
+        if is_word and parts:
+            parts.append(" ")
+        parts.append(table.vocab[tok])
+    return "".join(parts)
+
+def turn_records(table: WordTable, segments: SegmentTable) -> Iterator[Tuple[Optional[str], float, float, str]]:
+    """(speaker label or None, start, end, running text) per word_table.table_turns turn,
+    the turns diarization_to_markdown renders (plus those with no speaker)."""
+    for turn in table_turns(table):
+        yield (segments.labels[turn.speaker] if turn.speaker >= 0 else None, turn.start, turn.end,
+               table_text(table, np.arange(turn.first, turn.stop)))
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Read transcripts of any supported format and print a summary of each.")
+    ap.add_argument("files", nargs="+")
+    args = ap.parse_args()
+
+    for path in args.files:
+        if Path(path).suffix.lower() not in SUFFIXES:
+            continue
+        table, segments = ingest(path)
+        words = table.is_word
+        timed = words & ~np.isnan(table.start)
+        span = f"{table.start[timed].min():.1f}-{table.end[timed].max():.1f}s" if timed.any() else "untimed"
+        print(f"{path}: {int(words.sum())} words, {int((~words).sum())} punctuation, {span}, "
+              f"speakers: {', '.join(segments.labels) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+word_table.py
+-------------
+Columnar (NumPy) representation of a Transcribe transcript, shared by
+diarization_to_markdown.py and merge_majority_vote.py.
+
+A Transcribe result is tens of thousands of small dicts (one per word or
+punctuation token, each with string times and a nested alternatives list).
+WordTable keeps the same information as parallel arrays, one row per item,
+in item order:
+- start, end : float64 seconds (NaN for punctuation, which has no timestamps)
+- conf       : float64 confidence of the first alternative
+- token      : int32 id into `vocab` (contents are interned, so "the" is stored once)
+- is_word    : bool, True for pronunciation items
+- speaker    : int16 id into a SegmentTable's `labels` (-1 = unresolved), see assign_speakers
+
+That is ~30 bytes per row instead of ~1 KB of dicts and strings, and per-show
+work (speaker assignment, durations, time bucketing) runs as array operations.
+
+SegmentTable is the same idea for results.speaker_labels.segments.
+
+USAGE (as a library):
+    from word_table import WordTable, SegmentTable
+    table = WordTable.from_items(iter_items("output.json"))
+    segs = SegmentTable.from_segments(iter_segments("output.json"))
+    table.assign_speakers(segs)
+
+USAGE (inspect a JSON):
+    python word_table.py outputs/EFRL-1989-10-07-1.json
+"""
+
+import heapq
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from metrics import span
+
+def _intern(vocab: List[str], ids: Dict[str, int], text: str) -> int:
+    i = ids.get(text)
+    if i is None:
+        i = ids[text] = len(vocab)
+        vocab.append(text)
+    return i
+
+def _parse_floats(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """(floats, which parsed). NumPy parses the whole column at once; only a column holding
+    something float() rejects is redone value by value, with those values as NaN."""
+    if None not in values:  # NumPy would read None as NaN; float() rejects it
+        try:
+            return np.array(values, dtype=np.float64), np.ones(len(values), dtype=bool)
+        except (TypeError, ValueError):
+            pass
+    out = np.full(len(values), np.nan)
+    ok = np.ones(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(v)
+        except (TypeError, ValueError):
+            ok[i] = False
+    return out, ok
+
+def bucket_keys(times: np.ndarray, bucket: float) -> np.ndarray:
+    """Vectorized merge_majority_vote.bucketize: round(t / bucket) * bucket (round half to even)."""
+    return np.round(np.asarray(times, dtype=np.float64) / bucket) * bucket
+
+def interval_slots(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten closed intervals into elementary slots for point lookups.
+
+    Returns (points, at_point, after_point): the sorted distinct boundary points, and
+    for each point the index of the winning interval at that point and in the open gap
+    after it (-1 = none). The winner is the first interval in input order containing
+    the time, i.e. what a linear first-match scan would return.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    points = np.unique(np.concatenate([starts, ends]))
+    by_start = np.argsort(starts, kind="stable").tolist()
+    start_list, end_list = starts.tolist(), ends.tolist()
+    at_point = np.full(len(points), -1, dtype=np.int64)
+    after_point = np.full(len(points), -1, dtype=np.int64)
+    active: List[Tuple[int, float]] = []  # heap of (interval index, end)
+    j = 0
+    for k, p in enumerate(points.tolist()):
+        while j < len(by_start) and start_list[by_start[j]] <= p:
+            i = by_start[j]
+            heapq.heappush(active, (i, end_list[i]))
+            j += 1
+        while active and active[0][1] < p:
+            heapq.heappop(active)
+        if active:
+            at_point[k] = active[0][0]
+        while active and active[0][1] <= p:
+            heapq.heappop(active)
+        if active:
+            after_point[k] = active[0][0]
+    return points, at_point, after_point
+
+class SegmentTable:
+    """Diarized speaker segments as arrays: start, end, speaker (id into labels)."""
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, speaker: np.ndarray, labels: List[str]):
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.labels = labels
+        self._slots: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_timeline(cls, timeline: Iterable[Tuple[float, float, str]]) -> "SegmentTable":
+        labels: List[str] = []
+        ids: Dict[str, int] = {}
+        start, end, speaker = array("d"), array("d"), array("h")
+        for s, e, spk in timeline:
+            start.append(s)
+            end.append(e)
+            speaker.append(_intern(labels, ids, spk))
+        return cls(np.frombuffer(start, dtype=np.float64), np.frombuffer(end, dtype=np.float64),
+                   np.frombuffer(speaker, dtype=np.int16), labels)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "SegmentTable":
+        return cls.from_timeline((float(seg["start_time"]), float(seg["end_time"]), seg["speaker_label"])
+                                 for seg in segments)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def timeline(self) -> List[Tuple[float, float, str]]:
+        """Back to diarization_to_markdown's [(start, end, speaker_label)] form."""
+        return [(s, e, self.labels[k]) for s, e, k in zip(self.start.tolist(), self.end.tolist(), self.speaker.tolist())]
+
+    def slots(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._slots is None:
+            self._slots = interval_slots(self.start, self.end)
+        return self._slots
+
+    def lookup(self, times: np.ndarray) -> np.ndarray:
+        """Speaker id of the first segment whose closed [start, end] contains each time (-1 = none)."""
+        times = np.asarray(times, dtype=np.float64)
+        points, at_point, after_point = self.slots()
+        if len(points) == 0:
+            return np.full(times.shape, -1, dtype=np.int16)
+        i = np.searchsorted(points, times, side="left")
+        clipped = np.minimum(i, len(points) - 1)
+        exact = (i < len(points)) & (points[clipped] == times)
+        seg = np.where(exact, at_point[clipped], np.where(i > 0, after_point[np.maximum(i - 1, 0)], -1))
+        return np.where(seg >= 0, self.speaker[np.maximum(seg, 0)], -1).astype(np.int16)
+
+    def durations(self) -> np.ndarray:
+        """Total speaking time per label id (summed in segment order)."""
+        return np.bincount(self.speaker, weights=np.maximum(0.0, self.end - self.start),
+                           minlength=len(self.labels))
+
+    def speaking_durations(self) -> Dict[str, float]:
+        """{label: seconds}, labels in order of first appearance."""
+        return dict(zip(self.labels, self.durations().tolist()))
+
+class WordTable:
+    """Transcribe items as parallel arrays, one row per item in item order (see module docstring)."""
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, conf: np.ndarray, token: np.ndarray,
+                 is_word: np.ndarray, vocab: List[str]):
+        self.start = start
+        self.end = end
+        self.conf = conf
+        self.token = token
+        self.is_word = is_word
+        self.vocab = vocab
+        self.speaker = np.full(len(start), -1, dtype=np.int16)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict[str, Any]]) -> "WordTable":
+        """Build from results.items (a list or a streamed iterator). Pronunciation items
+        without usable times are dropped, as extract_words has always done."""
+        ids: Dict[str, int] = {}
+        starts: List[Any] = []
+        ends: List[Any] = []
+        confs: List[Any] = []
+        tokens: List[int] = []
+        words: List[bool] = []
+        # Bound methods hoisted out of the loop: this runs once per item on every file. Times
+        # and confidences are kept as the strings Transcribe writes and parsed by NumPy at the end.
+        add_start, add_end, add_conf, add_token, add_word = (starts.append, ends.append, confs.append,
+                                                             tokens.append, words.append)
+        intern = ids.setdefault
+        nan = float("nan")
+        for it in items:
+            try:
+                alt = it["alternatives"][0]
+                c = alt.get("confidence", "0.0")
+                if it.get("type") == "pronunciation":
+                    s = it["start_time"]
+                    e = it.get("end_time", s)
+                    w = True
+                else:
+                    s = e = nan
+                    w = False
+                tok = intern(alt["content"], len(ids))
+            except Exception:
+                continue
+            add_start(s)
+            add_end(e)
+            add_conf(c)
+            add_token(tok)
+            add_word(w)
+        (start, ok_start), (end, ok_end), (conf, ok_conf) = (_parse_floats(col) for col in (starts, ends, confs))
+        is_word = np.array(words, dtype=bool)
+        keep = ok_start & ok_end & ok_conf
+        token = np.array(tokens, dtype=np.int32)
+        if not keep.all():
+            start, end, conf, token, is_word = start[keep], end[keep], conf[keep], token[keep], is_word[keep]
+        return cls(start, end, conf, token, is_word, list(ids))
+
+    @classmethod
+    def concat(cls, tables: List["WordTable"]) -> "WordTable":
+        """Stack several tables into one with a shared vocabulary (rows keep their order)."""
+        vocab: List[str] = []
+        ids: Dict[str, int] = {}
+        tokens = []
+        for t in tables:
+            remap = np.array([_intern(vocab, ids, v) for v in t.vocab], dtype=np.int32)
+            tokens.append(remap[t.token] if len(t.token) else t.token)
+        out = cls(np.concatenate([t.start for t in tables]), np.concatenate([t.end for t in tables]),
+                  np.concatenate([t.conf for t in tables]), np.concatenate(tokens).astype(np.int32),
+                  np.concatenate([t.is_word for t in tables]), vocab)
+        out.speaker = np.concatenate([t.speaker for t in tables])
+        return out
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.start, self.end, self.conf, self.token, self.is_word, self.speaker))
+
+    def text(self, rows: Optional[np.ndarray] = None) -> List[str]:
+        """Token strings for the given rows (all rows by default)."""
+        token = self.token if rows is None else self.token[rows]
+        return [self.vocab[i] for i in token.tolist()]
+
+    def normalized_ids(self) -> Tuple[np.ndarray, List[str]]:
+        """(casefolded token id per row, casefolded vocabulary)."""
+        norms: List[str] = []
+        ids: Dict[str, int] = {}
+        remap = np.array([_intern(norms, ids, v.casefold()) for v in self.vocab], dtype=np.int32)
+        return (remap[self.token] if len(self.token) else self.token.copy()), norms
+
+    def anchor_times(self) -> np.ndarray:
+        """Start time of each row's word, or of the preceding word for punctuation (NaN if none)."""
+        rows = np.arange(len(self))
+        last_word = np.maximum.accumulate(np.where(self.is_word, rows, -1)) if len(self) else rows
+        return np.where(last_word >= 0, self.start[np.maximum(last_word, 0)], np.nan)
+
+    def assign_speakers(self, segments: SegmentTable) -> np.ndarray:
+        """Set `speaker` for every row from the diarized segments and return it.
+
+        A word outside every segment keeps the previous word's speaker, and punctuation
+        takes its preceding word's, mirroring `index.lookup(t) or cur_spk` in
+        diarization_to_markdown. Rows before the first resolved word stay -1.
+        """
+        with span("assign_speakers"):
+            return self._assign_speakers(segments)
+
+    def _assign_speakers(self, segments: SegmentTable) -> np.ndarray:
+        rows = np.arange(len(self))
+        raw = np.full(len(self), -1, dtype=np.int16)
+        raw[self.is_word] = segments.lookup(self.start[self.is_word])
+        last = np.maximum.accumulate(np.where(raw >= 0, rows, -1)) if len(self) else rows
+        self.speaker = np.where(last >= 0, raw[np.maximum(last, 0)], -1).astype(np.int16)
+        return self.speaker
+
+class TableTurn(NamedTuple):
+    speaker: int  # id into the SegmentTable's labels, -1 where no speaker was resolved
+    start: float  # first word's start
+    end: float    # last word's end
+    first: int    # the turn is table rows [first, stop): its words and the punctuation after each
+    stop: int
+
+def table_turns(table: WordTable) -> Iterator[TableTurn]:
+    """One turn per run of consecutive words with the same `speaker` (see assign_speakers).
+    Punctuation belongs to the word before it; rows before the first word belong to no turn.
+    The renderer (diarization_to_markdown), the search index and corpus scoring all group
+    words into turns here, so they agree on every boundary."""
+    words = np.flatnonzero(table.is_word)
+    if not len(words):
+        return
+    spk = table.speaker[words]
+    firsts = np.flatnonzero(np.diff(spk, prepend=-2) != 0)  # -2 is no speaker id: the first word opens a turn
+    starts = words[firsts]
+    stops = np.append(starts[1:], len(table))
+    last_words = words[np.append(firsts[1:], len(words)) - 1]
+    for speaker, start, end, r0, r1 in zip(spk[firsts].tolist(), table.start[starts].tolist(),
+                                           table.end[last_words].tolist(), starts.tolist(), stops.tolist()):
+        yield TableTurn(speaker, start, end, r0, r1)
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Load a Transcribe JSON into a WordTable and print a summary.")
+    ap.add_argument("json", help="Transcribe JSON path")
+    args = ap.parse_args()
+
+    from transcribe_json import iter_items, iter_segments
+    table = WordTable.from_items(iter_items(args.json))
+    segs = SegmentTable.from_segments(iter_segments(args.json))
+    table.assign_speakers(segs)
+    durs = segs.durations()
+    print(f"{args.json}: {int(table.is_word.sum())} words, {int((~table.is_word).sum())} punctuation, "
+          f"{len(table.vocab)} distinct tokens, {table.nbytes / 1024:.1f} KiB")
+    for k in np.argsort(-durs, kind="stable").tolist():
+        words = int(((table.speaker == k) & table.is_word).sum())
+        print(f"  {segs.labels[k]}: {durs[k]:.1f}s, {words} words")
+
+if __name__ == "__main__":
+    main()